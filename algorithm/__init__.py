@@ -0,0 +1,18 @@
+"""
+Ядро трассировки без зависимостей от GUI (pygame/tkinter не импортируются).
+"""
+from algorithm.grid import Grid, find_endpoints, prepare_trace_grid
+from algorithm.path import reconstruct_path, full_path, path_arrows
+from algorithm.stats import TraceStats
+from algorithm.tracer import Tracer
+
+__all__ = [
+    "Grid",
+    "find_endpoints",
+    "prepare_trace_grid",
+    "reconstruct_path",
+    "full_path",
+    "path_arrows",
+    "TraceStats",
+    "Tracer",
+]
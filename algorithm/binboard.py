@@ -0,0 +1,326 @@
+"""
+Двоичный формат поля (.wtb).
+
+Файл:
+    заголовок (32 байта, little-endian): сигнатура b"WTBF", версия (uint16),
+        сжатие клеток (uint16), rows (uint32), cols (uint32),
+        смещение клеток (uint64), длина клеток в файле (uint64);
+    клетки – rows * cols байт по строкам (коды Grid), возможно сжатые;
+    секции до конца файла: тег (4 байта), сжатие (uint8), 3 байта выравнивания,
+        длина данных (uint64), данные.
+
+Секции: b"NETS" – JSON-список цепей, b"WAVS" – сохранённые волны (по каждой
+стороне int32-номера, -1 – нет метки, затем uint8-коды направлений),
+b"LAYR" – дополнительные слои многослойного поля: длина JSON-описания (uint32),
+описание {"count", "preferred"}, затем клетки слоёв 1..N-1 подряд (клетки
+основного файла – слой 0). Старые версии пропускают секцию и видят слой 0.
+
+Несжатые клетки лежат со смещения, кратного CELLS_ALIGN, и читаются через mmap
+без копирования: файл отображается целиком, а Grid работает поверх среза
+memoryview отображения (ACCESS_COPY – правки поля в памяти не попадают в файл).
+"""
+import json
+import mmap
+import re
+import struct
+import sys
+import zlib
+from array import array
+
+from algorithm.grid import Grid
+
+MAGIC = b"WTBF"
+VERSION = 1
+CELLS_ALIGN = 4096
+
+COMPRESSIONS = {"none": 0, "zlib": 1, "rle": 2}
+_COMPRESSION_NAMES = {code: name for name, code in COMPRESSIONS.items()}
+
+_HEADER = struct.Struct("<4sHHIIQQ")
+_SECTION = struct.Struct("<4sB3xQ")
+_RUN = struct.Struct("<BI")
+
+# Коды направлений в секции волн: 0 – нет направления (исходная клетка).
+_DIRECTION_CODES = {"U": 1, "R": 2, "D": 3, "L": 4}
+_DIRECTION_NAMES = {code: name for name, code in _DIRECTION_CODES.items()}
+
+
+class _RleEncoder:
+    """
+    Потоковое RLE: пары (значение uint8, длина uint32). Последняя серия
+    придерживается до следующего куска, чтобы серии не рвались на границах.
+    """
+
+    def __init__(self):
+        self.value = None
+        self.length = 0
+
+    def compress(self, data):
+        out = bytearray()
+        for match in re.finditer(rb"(.)\1*", data, re.DOTALL):
+            value = match.group()[0]
+            length = match.end() - match.start()
+            if value == self.value:
+                self.length += length
+                continue
+            out += self._flush_run()
+            self.value, self.length = value, length
+        return bytes(out)
+
+    def _flush_run(self):
+        out = bytearray()
+        while self.length > 0:
+            run = min(self.length, 0xFFFFFFFF)
+            out += _RUN.pack(self.value, run)
+            self.length -= run
+        return out
+
+    def flush(self):
+        return bytes(self._flush_run())
+
+
+class _RawEncoder:
+    @staticmethod
+    def compress(data):
+        return bytes(data)
+
+    @staticmethod
+    def flush():
+        return b""
+
+
+def _encoder(compression):
+    if compression == "none":
+        return _RawEncoder()
+    if compression == "zlib":
+        return zlib.compressobj(6)
+    if compression == "rle":
+        return _RleEncoder()
+    raise ValueError(f"Неизвестное сжатие: {compression}")
+
+
+def _rle_decode(data):
+    out = bytearray()
+    for value, run in _RUN.iter_unpack(data):
+        out += bytes((value,)) * run
+    return out
+
+
+def _compress(data, compression):
+    encoder = _encoder(compression)
+    return encoder.compress(data) + encoder.flush()
+
+
+def _decompress(data, code):
+    if code == COMPRESSIONS["none"]:
+        return bytearray(data)
+    if code == COMPRESSIONS["zlib"]:
+        return bytearray(zlib.decompress(data))
+    if code == COMPRESSIONS["rle"]:
+        return _rle_decode(data)
+    raise ValueError(f"Неизвестный код сжатия: {code}")
+
+
+def _encode_wave(wave, rows, cols):
+    """
+    Волна (2D-список (label, direction) или WaveView) -> байты номеров и направлений.
+    """
+    labels = getattr(wave, "labels", None)
+    if labels is not None and hasattr(labels, "astype"):
+        return (labels.astype("<i4").tobytes() + wave.directions.astype("u1").tobytes())
+    label_array = array("i", [-1]) * (rows * cols)
+    directions = bytearray(rows * cols)
+    for r in range(rows):
+        row = wave[r]
+        base = r * cols
+        for c in range(cols):
+            data = row[c]
+            if data is not None:
+                label_array[base + c] = data[0]
+                directions[base + c] = _DIRECTION_CODES.get(data[1], 0)
+    if sys.byteorder == "big":
+        label_array.byteswap()
+    return label_array.tobytes() + bytes(directions)
+
+
+def _decode_wave(data, rows, cols):
+    n = rows * cols
+    labels = array("i")
+    labels.frombytes(data[:4 * n])
+    if sys.byteorder == "big":
+        labels.byteswap()
+    directions = data[4 * n:5 * n]
+    wave = []
+    for r in range(rows):
+        base = r * cols
+        wave.append([(labels[base + c], _DIRECTION_NAMES.get(directions[base + c]))
+                     if labels[base + c] >= 0 else None for c in range(cols)])
+    return wave
+
+
+class BoardWriter:
+    """
+    Потоковая запись .wtb: клетки пишутся строками по мере поступления,
+    число строк и длина клеток вписываются в заголовок в finish. Так поле
+    можно записать, ни разу не держа его в памяти целиком.
+    """
+
+    def __init__(self, f, cols, compression="none"):
+        """
+        :param f: файл, открытый на запись в двоичном режиме (с поддержкой seek)
+        :param cols: число столбцов
+        :param compression: "none", "zlib" или "rle"
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Неизвестное сжатие: {compression}")
+        self.f = f
+        self.cols = cols
+        self.rows = 0
+        self.compression = compression
+        self.offset = CELLS_ALIGN if compression == "none" else _HEADER.size
+        self.length = 0
+        self._encoder = _encoder(compression)
+        # Место под заголовок (и выравнивание несжатых клеток) заполняется в finish.
+        f.write(bytes(self.offset))
+
+    def write_rows(self, data):
+        """Дописывает целое число строк клеток (байты в кодах Grid)."""
+        if self.cols == 0 or len(data) % self.cols:
+            raise ValueError(f"Длина данных {len(data)} не кратна ширине поля {self.cols}")
+        self.rows += len(data) // self.cols
+        self._write_cells(self._encoder.compress(data))
+
+    def _write_cells(self, chunk):
+        self.f.write(chunk)
+        self.length += len(chunk)
+
+    def finish(self, nets=None, waves=None, layers=None, preferred=None):
+        """
+        Завершает клетки, дописывает секции и заголовок.
+
+        :param nets: список цепей или None
+        :param waves: (wave_start, wave_finish) или None
+        :param layers: дополнительные слои (Grid или 2D-списки размера поля) или None
+        :param preferred: предпочтительные направления всех слоёв ["H", "V", None, ...] или None
+        """
+        self._write_cells(self._encoder.flush())
+        sections = []
+        if nets:
+            sections.append((b"NETS", json.dumps(nets).encode("utf-8")))
+        if waves is not None:
+            sections.append((b"WAVS", b"".join(_encode_wave(wave, self.rows, self.cols) for wave in waves)))
+        if layers or preferred:
+            sections.append((b"LAYR", self._encode_layers(layers or [], preferred)))
+        for tag, payload in sections:
+            payload = _compress(payload, "zlib")
+            self.f.write(_SECTION.pack(tag, COMPRESSIONS["zlib"], len(payload)))
+            self.f.write(payload)
+
+        end = self.f.tell()
+        self.f.seek(0)
+        self.f.write(_HEADER.pack(MAGIC, VERSION, COMPRESSIONS[self.compression],
+                                  self.rows, self.cols, self.offset, self.length))
+        self.f.seek(end)
+
+    def _encode_layers(self, layers, preferred):
+        grids = [grid if isinstance(grid, Grid) else Grid.from_rows(grid) for grid in layers]
+        for grid in grids:
+            if (grid.rows, grid.cols) != (self.rows, self.cols):
+                raise ValueError(f"Слой {grid.rows}x{grid.cols} не совпадает с полем {self.rows}x{self.cols}")
+        meta = json.dumps({"count": len(grids), "preferred": preferred}).encode("utf-8")
+        return struct.pack("<I", len(meta)) + meta + b"".join(bytes(grid.data) for grid in grids)
+
+
+def _decode_layers(payload, rows, cols):
+    (size,) = struct.unpack_from("<I", payload)
+    meta = json.loads(bytes(payload[4:4 + size]).decode("utf-8"))
+    cells = payload[4 + size:]
+    count = meta["count"]
+    if len(cells) != count * rows * cols:
+        raise ValueError(f"Секция слоёв: {len(cells)} байт вместо {count * rows * cols}")
+    layers = [Grid(rows, cols, bytearray(cells[i * rows * cols:(i + 1) * rows * cols])) for i in range(count)]
+    return layers, meta.get("preferred")
+
+
+def write_board(filename, grid, nets=None, waves=None, compression="none", layers=None, preferred=None):
+    """
+    Записывает поле в формате .wtb.
+
+    :param grid: Grid или 2D-список
+    :param nets: список цепей (словари name/start/finish) или None
+    :param waves: (wave_start, wave_finish) для сохранения результата трассировки или None
+    :param compression: "none" (файл читается через mmap), "zlib" или "rle"
+    :param layers: дополнительные слои (слой 0 – grid) или None
+    :param preferred: предпочтительные направления всех слоёв или None
+    """
+    grid = grid if isinstance(grid, Grid) else Grid.from_rows(grid)
+    with open(filename, "wb") as f:
+        writer = BoardWriter(f, grid.cols, compression)
+        if grid.rows and grid.cols:
+            writer.write_rows(grid.data)
+        writer.finish(nets=nets, waves=waves, layers=layers, preferred=preferred)
+
+
+def read_header(f):
+    """
+    :return: (compression, rows, cols, cells_offset, cells_length)
+    :raises ValueError: не файл .wtb или неподдерживаемая версия
+    """
+    raw = f.read(_HEADER.size)
+    if len(raw) < _HEADER.size:
+        raise ValueError("Файл слишком короткий для заголовка .wtb")
+    magic, version, compression, rows, cols, offset, length = _HEADER.unpack(raw)
+    if magic != MAGIC:
+        raise ValueError("Неверная сигнатура файла .wtb")
+    if version > VERSION:
+        raise ValueError(f"Неподдерживаемая версия .wtb: {version}")
+    if compression not in _COMPRESSION_NAMES:
+        raise ValueError(f"Неизвестный код сжатия: {compression}")
+    return compression, rows, cols, offset, length
+
+
+def read_board(filename, use_mmap=True):
+    """
+    Читает поле .wtb.
+
+    :param use_mmap: несжатые клетки отображать в память без копирования
+    :return: словарь {"grid", "nets", "waves", "layers", "preferred"};
+             waves – (wave_start, wave_finish) или None, layers – дополнительные слои
+             (список Grid, пустой для однослойного поля), preferred – направления слоёв или None
+    """
+    with open(filename, "rb") as f:
+        compression, rows, cols, offset, length = read_header(f)
+        if use_mmap and compression == COMPRESSIONS["none"] and length > 0:
+            # Файл отображается с начала: смещение mmap должно быть кратно
+            # ALLOCATIONGRANULARITY (64 КБ в Windows), а клетки выровнены лишь по CELLS_ALIGN.
+            mapping = mmap.mmap(f.fileno(), offset + length, access=mmap.ACCESS_COPY)
+            data = memoryview(mapping)[offset:offset + length]
+        else:
+            f.seek(offset)
+            data = _decompress(f.read(length), compression)
+        if len(data) != rows * cols:
+            raise ValueError(f"Размер клеток {len(data)} не совпадает с полем {rows}x{cols}")
+        grid = Grid(rows, cols, data)
+
+        f.seek(offset + length)
+        nets = []
+        waves = None
+        layers = []
+        preferred = None
+        while True:
+            raw = f.read(_SECTION.size)
+            if len(raw) < _SECTION.size:
+                break
+            tag, section_compression, size = _SECTION.unpack(raw)
+            payload = f.read(size)
+            if tag == b"NETS":
+                nets = json.loads(bytes(_decompress(payload, section_compression)).decode("utf-8"))
+            elif tag == b"WAVS":
+                payload = _decompress(payload, section_compression)
+                half = len(payload) // 2
+                waves = (_decode_wave(payload[:half], rows, cols),
+                         _decode_wave(payload[half:], rows, cols))
+            elif tag == b"LAYR":
+                layers, preferred = _decode_layers(_decompress(payload, section_compression), rows, cols)
+            # Неизвестные секции пропускаются: их могли добавить более новые версии.
+    return {"grid": grid, "nets": nets, "waves": waves, "layers": layers, "preferred": preferred}
@@ -0,0 +1,150 @@
+"""
+Встречная волна «только путь» на битовых досках.
+
+Компромисс по времени: каждый уровень волны – несколько операций над целым
+int на всё поле (сдвиги фронта, AND с маской свободных клеток, OR в visited и
+битовые плоскости), то есть O(N / 64) машинных слов независимо от размера фронта.
+Всего выходит O(levels * N / 64): на открытых полях, где фронт занимает заметную
+долю поля, это быстрее очереди клеток, а на длинных узких коридорах (змейка,
+спираль – сотни уровней с фронтом в несколько клеток) медленнее обычной волны.
+Ограничить работу строками фронта нельзя без отказа от одного int на поле:
+OR сдвинутого окна в visited всё равно создаёт новое число размером с поле.
+"""
+from algorithm.grid import Grid
+from algorithm.tracer import DEFAULT_DIRECTIONS
+
+# Таблица перевода клеток в символы двоичной строки: свободная (0) -> "1", иначе "0".
+_FREE_BITS = bytes.maketrans(bytes(range(256)), b"1" + b"0" * 255)
+
+
+class BitsetTracer:
+    """
+    Встречная волна «только путь» на битовых досках (Python int).
+
+    Клетка (r, c) – бит r * stride + c; stride кратен 8 и больше cols, поэтому
+    справа от каждой строки есть нулевые (занятые) столбцы и сдвиги на ±1 не
+    переносят волну между строками (ходы – не длиннее одной клетки, в том числе
+    диагональные). Фронт расширяется сдвигами и AND/OR сразу
+    для всего поля. Вместо номеров каждая сторона хранит номер уровня по модулю 4
+    в двух битовых плоскостях – у соседей уровни отличаются не больше чем на 1,
+    этого достаточно для обратного прохода. Итого около 9 бит на клетку
+    (свободность + по 4 бита на сторону) вместо кортежей (label, direction).
+    """
+
+    def __init__(self, grid, directions=None):
+        """
+        :param grid: 2D-список или Grid (A и B уже заменены на 0)
+        :param directions: порядок просмотра соседей при восстановлении пути
+        """
+        grid = Grid.from_rows(grid) if not isinstance(grid, Grid) else grid
+        self.rows = grid.rows
+        self.cols = grid.cols
+        self.stride = (self.cols // 8 + 1) * 8
+        self.directions = list(directions or DEFAULT_DIRECTIONS)
+        if any(abs(dr) > 1 or abs(dc) > 1 for _, dr, dc in self.directions):
+            raise ValueError("Ходы длиннее одной клетки не поддерживаются")
+        # Сдвиг бита клетки для каждого хода: волна растёт по тем же направлениям,
+        # по которым _walk_back идёт обратно.
+        self.shifts = [dr * self.stride + dc for _, dr, dc in self.directions]
+        self.free = self._build_free_mask(grid)
+        self.cells_expanded = 0
+
+    def _build_free_mask(self, grid):
+        row_bytes = self.stride // 8
+        pad = b"0" * (self.stride - self.cols)
+        chunks = []
+        for r in range(self.rows):
+            bits = bytes(grid[r]).translate(_FREE_BITS) + pad
+            chunks.append(int(bits[::-1], 2).to_bytes(row_bytes, "little"))
+        return int.from_bytes(b"".join(chunks), "little")
+
+    def _bit(self, cell):
+        return 1 << (cell[0] * self.stride + cell[1])
+
+    def _grow(self, front, visited):
+        spread = 0
+        for shift in self.shifts:
+            spread |= front << shift if shift > 0 else front >> -shift
+        return spread & self.free & ~visited
+
+    def trace(self, start, finish):
+        """
+        Ищет кратчайший путь A -> B.
+
+        :return: (path, meeting_point); если пути нет – (None, None).
+                 Точка встречи – клетка пересечения волн с наименьшим индексом;
+                 путь кратчайший, но может отличаться от пути списочной волны.
+        """
+        if start == finish:
+            self.cells_expanded = 1
+            return [start], start
+        sides = []
+        for origin in (start, finish):
+            bit = self._bit(origin)
+            sides.append({"visited": bit, "front": bit, "planes": [0, 0], "level": 0})
+
+        meeting = None
+        while sides[0]["front"] and sides[1]["front"]:
+            for side, other in ((sides[0], sides[1]), (sides[1], sides[0])):
+                new = self._grow(side["front"], side["visited"])
+                side["level"] += 1
+                side["visited"] |= new
+                side["front"] = new
+                if side["level"] & 1:
+                    side["planes"][0] |= new
+                if side["level"] & 2:
+                    side["planes"][1] |= new
+                hits = new & other["visited"]
+                if hits:
+                    index = (hits & -hits).bit_length() - 1
+                    meeting = divmod(index, self.stride)
+                    break
+            if meeting is not None:
+                break
+
+        self.cells_expanded = sides[0]["visited"].bit_count() + sides[1]["visited"].bit_count()
+        if meeting is None:
+            return None, None
+        path_s = self._walk_back(sides[0], meeting)
+        path_f = self._walk_back(sides[1], meeting)
+        path_f.reverse()
+        return path_s + path_f[1:], meeting
+
+    def _walk_back(self, side, meeting):
+        """
+        Обратный проход от meeting к источнику стороны: на каждом шаге ищется
+        посещённый сосед с уровнем на единицу меньше (по модулю 4).
+        """
+        size = (self.rows * self.stride + 7) // 8 + 1
+        visited = side["visited"].to_bytes(size, "little")
+        plane0 = side["planes"][0].to_bytes(size, "little")
+        plane1 = side["planes"][1].to_bytes(size, "little")
+
+        def level_mod(index):
+            shift = index & 7
+            return ((plane0[index >> 3] >> shift) & 1) | (((plane1[index >> 3] >> shift) & 1) << 1)
+
+        def is_visited(r, c):
+            if not (0 <= r < self.rows and 0 <= c < self.cols):
+                return False
+            index = r * self.stride + c
+            return (visited[index >> 3] >> (index & 7)) & 1
+
+        # При первом пересечении волн точка встречи лежит на последнем уровне
+        # обеих сторон (иначе пересечение нашлось бы на предыдущей итерации).
+        r, c = meeting
+        path = [(r, c)]
+        remaining = side["level"]
+        while remaining > 0:
+            want = (remaining - 1) & 3
+            for _, dr, dc in self.directions:
+                nr, nc = r + dr, c + dc
+                if is_visited(nr, nc) and level_mod(nr * self.stride + nc) == want:
+                    r, c = nr, nc
+                    break
+            else:
+                raise RuntimeError("Нарушена целостность битовых плоскостей волны")
+            path.append((r, c))
+            remaining -= 1
+        path.reverse()
+        return path
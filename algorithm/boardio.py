@@ -0,0 +1,102 @@
+import json
+
+from algorithm import binboard
+from algorithm.grid import Grid
+from algorithm.importer import import_board
+
+BOARD_EXTENSIONS = (".json", ".csv", ".wtb")
+
+
+def read_board_file(filename):
+    """
+    Читает файл поля в форматах FileManager (JSON, CSV или .wtb) без диалогов.
+    Расширенный JSON может содержать список цепей:
+    "nets": [{"name": "n1", "start": [r, c], "finish": [r, c]}, ...].
+    CSV и JSON разбираются потоково (algorithm.importer), двоичный .wtb
+    (algorithm.binboard) отображается в память – поле сразу получается в виде Grid.
+
+    Многослойное поле хранит слои 1..N-1 в "layers" (в JSON – списком 2D-массивов,
+    в .wtb – секцией LAYR) и направления слоёв в "preferred".
+
+    :return: словарь {"grid_size", "board", "nets", "waves", "layers", "preferred"};
+             board – Grid (для .wtb – поверх файла), nets – список словарей,
+             waves – сохранённые волны (только .wtb) или None,
+             layers – дополнительные слои (список Grid), preferred – направления слоёв или None
+    :raises ValueError: неподдерживаемое расширение файла
+    """
+    lower = filename.lower()
+    if lower.endswith(".wtb"):
+        data = binboard.read_board(filename)
+        grid = data["grid"]
+        return {
+            "grid_size": max(grid.rows, grid.cols),
+            "board": grid,
+            "nets": data["nets"],
+            "waves": data["waves"],
+            "layers": data["layers"],
+            "preferred": data["preferred"],
+        }
+    if lower.endswith((".json", ".csv")):
+        data = import_board(filename)
+        data["waves"] = None
+        return data
+    raise ValueError(f"Неподдерживаемый формат файла: {filename}")
+
+
+def load_board(filename):
+    """
+    :return: (grid_size, board) – board в виде 2D-списка
+    """
+    data = read_board_file(filename)
+    board = data["board"]
+    if isinstance(board, Grid):
+        board = board.to_rows()
+    return data["grid_size"], board
+
+
+def load_nets(filename):
+    """
+    :return: список цепей файла поля (словари name/start/finish)
+    """
+    return read_board_file(filename)["nets"]
+
+
+def save_board(filename, grid_size, board, nets=None, waves=None, compression="none",
+               layers=None, preferred=None):
+    """
+    Записывает поле в JSON, CSV или .wtb (по расширению файла).
+    board – Grid или 2D-список; поле может быть прямоугольным.
+    Цепи и слои сохраняются в JSON и .wtb, волны и сжатие – только в .wtb.
+
+    :param waves: (wave_start, wave_finish) или None
+    :param compression: сжатие клеток .wtb: "none", "zlib" или "rle"
+    :param layers: дополнительные слои (2D-списки или Grid; слой 0 – board) или None
+    :param preferred: предпочтительные направления всех слоёв ["H", "V", None, ...] или None
+    :raises ValueError: неподдерживаемое расширение файла, цепи или слои для CSV
+    """
+    lower = filename.lower()
+    if lower.endswith(".wtb"):
+        binboard.write_board(filename, board, nets=nets, waves=waves, compression=compression,
+                             layers=layers, preferred=preferred)
+    elif lower.endswith(".json"):
+        grid = board if isinstance(board, Grid) else Grid.from_rows(board)
+        # grid_size – сторона для старых читателей; размеры прямоугольного поля – rows и cols.
+        data = {"grid_size": grid_size, "rows": grid.rows, "cols": grid.cols, "board": grid.to_rows()}
+        if nets:
+            data["nets"] = nets
+        if layers:
+            data["layers"] = [layer.to_rows() if isinstance(layer, Grid) else layer for layer in layers]
+        if preferred:
+            data["preferred"] = preferred
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+    elif lower.endswith(".csv"):
+        if nets:
+            raise ValueError("Формат CSV не поддерживает список цепей")
+        if layers:
+            raise ValueError("Формат CSV не поддерживает несколько слоёв")
+        with open(filename, "w", encoding="utf-8") as f:
+            for row in board:
+                f.write(",".join(map(str, row)) + "\n")
+    else:
+        raise ValueError(f"Неподдерживаемый формат файла: {filename}")
@@ -0,0 +1,118 @@
+"""
+Кэш результатов трассировки.
+
+Ключ – SHA-256 от размеров поля, карты препятствий (свободна клетка или нет),
+A, B, порядка просмотра соседей и режима поиска. Любая правка клетки, которая
+меняет проходимость, даёт другой ключ, поэтому устаревших записей не бывает:
+кэш не нужно сбрасывать при редактировании поля.
+
+Записи – словари {"path", "meeting", "cells_expanded", "cells_labelled"} и,
+только в памяти, "waves" – (wave_start, wave_finish). В памяти хранится LRU
+на max_entries записей, на диске (необязательно) – sqlite-файл в каталоге.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+from collections import OrderedDict
+
+from algorithm.grid import Grid
+from algorithm.tracer import DEFAULT_DIRECTIONS
+
+CACHE_FILENAME = "routes.sqlite"
+
+# Таблица перевода клеток в карту препятствий: 0 – свободно, 1 – занято.
+_OBSTACLE_MAP = bytes.maketrans(bytes(range(256)), b"\x00" + b"\x01" * 255)
+
+
+def route_key(grid, start, finish, direction_order=None, mode="wave"):
+    """
+    :param grid: поле для трассировки (Grid или 2D-список, A и B уже свободны)
+    :return: шестнадцатеричный SHA-256 ключ
+    """
+    grid = grid if isinstance(grid, Grid) else Grid.from_rows(grid)
+    digest = hashlib.sha256()
+    digest.update(struct.pack("<II", grid.rows, grid.cols))
+    digest.update(bytes(grid.data).translate(_OBSTACLE_MAP))
+    directions = [tuple(d) for d in (direction_order or DEFAULT_DIRECTIONS)]
+    digest.update(repr((tuple(start), tuple(finish), directions, mode)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class RouteCache:
+    """
+    LRU-кэш маршрутов в памяти с необязательным хранилищем sqlite.
+    """
+
+    def __init__(self, max_entries=128, directory=None):
+        """
+        :param max_entries: сколько записей держать в памяти
+        :param directory: каталог для sqlite-хранилища или None (только память)
+        """
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.db = None
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            # Несколько процессов пакетной трассировки пишут в один файл: WAL и ожидание блокировки.
+            self.db = sqlite3.connect(os.path.join(directory, CACHE_FILENAME), timeout=30)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS routes (key TEXT PRIMARY KEY, entry TEXT NOT NULL)")
+            self.db.commit()
+
+    def get(self, key):
+        """
+        :return: запись или None; запись с диска поднимается в память (без волн)
+        """
+        entry = self.memory.get(key)
+        if entry is None and self.db is not None:
+            row = self.db.execute("SELECT entry FROM routes WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                entry = self._decode(row[0])
+                self._remember(key, entry)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.memory.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        """
+        Сохраняет запись. Волны (entry["waves"]) остаются только в памяти.
+        """
+        self._remember(key, entry)
+        if self.db is not None:
+            stored = {name: value for name, value in entry.items() if name != "waves"}
+            self.db.execute("INSERT OR REPLACE INTO routes (key, entry) VALUES (?, ?)",
+                            (key, json.dumps(stored)))
+            self.db.commit()
+
+    def _remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    @staticmethod
+    def _decode(text):
+        entry = json.loads(text)
+        if entry.get("path") is not None:
+            entry["path"] = [tuple(cell) for cell in entry["path"]]
+        if entry.get("meeting") is not None:
+            entry["meeting"] = tuple(entry["meeting"])
+        return entry
+
+    def clear(self):
+        self.memory.clear()
+        if self.db is not None:
+            self.db.execute("DELETE FROM routes")
+            self.db.commit()
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
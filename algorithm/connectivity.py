@@ -0,0 +1,198 @@
+import re
+from array import array
+from collections import deque
+
+from algorithm.grid import Grid
+from algorithm.tracer import DEFAULT_DIRECTIONS
+
+# Ходы, при которых компоненты совпадают с отрезками строк, пересекающимися по столбцам.
+_ORTHOGONAL = {(-1, 0), (0, 1), (1, 0), (0, -1)}
+
+
+class ConnectivityIndex:
+    """
+    Индекс связности поля: номер компоненты для каждой проходимой клетки и
+    система непересекающихся множеств над номерами. Вопрос «достижима ли B из A»
+    решается за O(α) без запуска волны.
+
+    Индекс обновляется по одной клетке (set_cell): открытая клетка объединяет
+    компоненты соседей, закрытая может разрезать компоненту – тогда от её
+    соседей запускаются поочерёдные обходы, и перенумеровываются только
+    отрезанные (меньшие) части.
+    """
+
+    def __init__(self, grid, blocked=None, direction_order=None):
+        """
+        :param grid: Grid или 2D-список
+        :param blocked: коды непроходимых клеток; по умолчанию – все, кроме FREE
+                        (как у Tracer); для Board.board – (OBSTACLE,), т.к. A, B и
+                        отметки пути проходимы
+        :param direction_order: ходы [(name, dr, dc), ...] – те же, что у Tracer,
+                                с которым используется индекс; набор ходов симметричен
+        """
+        grid = grid if isinstance(grid, Grid) else Grid.from_rows(grid)
+        self.rows = grid.rows
+        self.cols = grid.cols
+        self.directions = list(direction_order or DEFAULT_DIRECTIONS)
+        codes = range(1, 256) if blocked is None else blocked
+        self._open_table = bytes(0 if code in codes else 1 for code in range(256))
+        self.open = bytearray(grid.data).translate(self._open_table)
+        self.labels = array("i", [-1]) * (self.rows * self.cols)
+        self.parent = array("i")
+        if {(dr, dc) for _, dr, dc in self.directions} == _ORTHOGONAL:
+            self._label_runs()
+        else:
+            self._label_cells()
+
+    def _new_label(self):
+        self.parent.append(len(self.parent))
+        return len(self.parent) - 1
+
+    def find(self, label):
+        parent = self.parent
+        root = label
+        while parent[root] != root:
+            root = parent[root]
+        while parent[label] != root:
+            parent[label], label = root, parent[label]
+        return root
+
+    def _union(self, a, b):
+        a = self.find(a)
+        b = self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+        return min(a, b)
+
+    def _label_runs(self):
+        """
+        Начальная разметка по отрезкам строк: отрезки проходимых клеток ищутся
+        регулярным выражением, пересекающиеся отрезки соседних строк объединяются.
+        """
+        cols = self.cols
+        previous = []
+        for r in range(self.rows):
+            base = r * cols
+            current = []
+            row = bytes(self.open[base:base + cols])
+            j = 0
+            for match in re.finditer(rb"\x01+", row):
+                start, end = match.span()
+                label = self._new_label()
+                self.labels[base + start:base + end] = array("i", [label]) * (end - start)
+                while j < len(previous) and previous[j][1] <= start:
+                    j += 1
+                k = j
+                while k < len(previous) and previous[k][0] < end:
+                    self._union(label, previous[k][2])
+                    k += 1
+                current.append((start, end, label))
+            previous = current
+
+    def _label_cells(self):
+        """
+        Начальная разметка для произвольного набора ходов: каждая открытая клетка
+        объединяется с уже размеченными соседями.
+        """
+        labels = self.labels
+        for index in range(self.rows * self.cols):
+            if not self.open[index]:
+                continue
+            label = self._new_label()
+            for n in self._neighbours(index):
+                if labels[n] >= 0:
+                    label = self._union(label, labels[n])
+            labels[index] = label
+
+    def component(self, cell):
+        """
+        :return: номер (корень) компоненты клетки или None для непроходимой клетки
+        """
+        index = cell[0] * self.cols + cell[1]
+        if not self.open[index]:
+            return None
+        return self.find(self.labels[index])
+
+    def connected(self, a, b):
+        """True, если клетки a и b проходимы и лежат в одной компоненте."""
+        component = self.component(a)
+        return component is not None and component == self.component(b)
+
+    def _neighbours(self, index):
+        r, c = divmod(index, self.cols)
+        for _, dr, dc in self.directions:
+            nr = r + dr
+            nc = c + dc
+            if 0 <= nr < self.rows and 0 <= nc < self.cols:
+                yield nr * self.cols + nc
+
+    def set_cell(self, r, c, value):
+        """
+        Обновляет индекс после записи value в клетку (r, c).
+        """
+        index = r * self.cols + c
+        is_open = self._open_table[value]
+        if is_open == self.open[index]:
+            return
+        self.open[index] = is_open
+        if is_open:
+            roots = {self.find(self.labels[n]) for n in self._neighbours(index) if self.open[n]}
+            if not roots:
+                self.labels[index] = self._new_label()
+                return
+            label = min(roots)
+            for root in roots:
+                label = self._union(label, root)
+            self.labels[index] = label
+        else:
+            self.labels[index] = -1
+            self._split(index)
+
+    def _split(self, index):
+        """
+        Проверяет, разрезала ли закрытая клетка компоненту. От открытых соседей
+        идут поочерёдные обходы; встретившиеся обходы сливаются. Обход, которому
+        некуда идти, обошёл отдельную компоненту – её клетки получают новый номер.
+        Как только активной остаётся одна группа обходов, она сохраняет старый номер.
+        """
+        seeds = [n for n in self._neighbours(index) if self.open[n]]
+        count = len(seeds)
+        group = list(range(count))
+
+        def root(i):
+            while group[i] != i:
+                i = group[i]
+            return i
+
+        owner = {seed: i for i, seed in enumerate(seeds)}
+        queues = [deque([seed]) for seed in seeds]
+        visited = [[seed] for seed in seeds]
+        done = [False] * count
+
+        while len({root(i) for i in range(count) if not done[i]}) > 1:
+            for i in range(count):
+                if not queues[i]:
+                    continue
+                for n in self._neighbours(queues[i].popleft()):
+                    if not self.open[n]:
+                        continue
+                    other = owner.get(n)
+                    if other is None:
+                        owner[n] = i
+                        queues[i].append(n)
+                        visited[i].append(n)
+                    elif root(other) != root(i):
+                        group[root(other)] = root(i)
+
+            members = {}
+            for i in range(count):
+                if not done[i]:
+                    members.setdefault(root(i), []).append(i)
+            for searches in members.values():
+                if len(members) > 1 and not any(queues[i] for i in searches):
+                    label = self._new_label()
+                    for i in searches:
+                        for cell in visited[i]:
+                            self.labels[cell] = label
+                        visited[i] = []
+                        done[i] = True
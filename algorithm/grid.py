@@ -0,0 +1,130 @@
+FREE = 0
+OBSTACLE = 1
+START = 2
+FINISH = 3
+
+
+class Grid:
+    """
+    Компактное поле трассировки: все клетки лежат в одном bytearray построчно.
+    grid[r] возвращает memoryview строки, поэтому сохраняется привычный доступ
+    grid[r][c] (чтение и запись) без Python-объекта на каждую клетку.
+    """
+
+    __slots__ = ("rows", "cols", "data", "_view")
+
+    def __init__(self, rows, cols, data=None):
+        """
+        :param rows: число строк
+        :param cols: число столбцов
+        :param data: изменяемый буфер из rows * cols байт (bytearray, mmap или memoryview);
+                     по умолчанию – пустое поле
+        """
+        if data is None:
+            data = bytearray(rows * cols)
+        if len(data) != rows * cols:
+            raise ValueError(f"Размер буфера {len(data)} не совпадает с полем {rows}x{cols}")
+        self.rows = rows
+        self.cols = cols
+        self.data = data
+        self._view = memoryview(data)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Создаёт поле из 2D-списка (как Board.board)."""
+        if isinstance(rows, Grid):
+            return rows.copy()
+        height = len(rows)
+        width = len(rows[0]) if height > 0 else 0
+        data = bytearray()
+        for row in rows:
+            if len(row) != width:
+                raise ValueError("Строки поля имеют разную длину")
+            data.extend(row)
+        return cls(height, width, data)
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, r):
+        if not 0 <= r < self.rows:
+            raise IndexError(r)
+        start = r * self.cols
+        return self._view[start:start + self.cols]
+
+    def __iter__(self):
+        for r in range(self.rows):
+            yield self[r]
+
+    def __eq__(self, other):
+        if isinstance(other, Grid):
+            if (self.rows, self.cols) != (other.rows, other.cols):
+                return False
+            if isinstance(self.data, bytearray) and isinstance(other.data, bytearray):
+                # bytearray сравнивается через memcmp, memoryview – поэлементно.
+                return self.data == other.data
+            return self._view == other._view
+        return NotImplemented
+
+    def get(self, r, c):
+        return self.data[r * self.cols + c]
+
+    def set(self, r, c, value):
+        self.data[r * self.cols + c] = value
+
+    def copy(self):
+        return Grid(self.rows, self.cols, bytearray(self.data))
+
+    def to_rows(self):
+        """Возвращает поле в виде 2D-списка."""
+        return [list(self[r]) for r in range(self.rows)]
+
+    def find(self, value):
+        """Первая клетка со значением value или None."""
+        # У memoryview (срез mmap, слой LayeredGrid) нет find.
+        data = self.data if hasattr(self.data, "find") else bytes(self.data)
+        idx = data.find(bytes((value,)))
+        if idx < 0:
+            return None
+        return divmod(idx, self.cols)
+
+    def replace(self, old, new):
+        """Заменяет все клетки old на new."""
+        data = self.data if isinstance(self.data, bytearray) else bytes(self.data)
+        self.data[:] = data.replace(bytes((old,)), bytes((new,)))
+
+
+def find_endpoints(board):
+    """
+    Ищет клетки A (2) и B (3) на поле.
+
+    :param board: 2D-список или Grid
+    :return: (start, finish), отсутствующая клетка – None
+    """
+    if isinstance(board, Grid):
+        return board.find(START), board.find(FINISH)
+    start = None
+    finish = None
+    for r, row in enumerate(board):
+        for c, cell in enumerate(row):
+            if cell == START and start is None:
+                start = (r, c)
+            elif cell == FINISH and finish is None:
+                finish = (r, c)
+    return start, finish
+
+
+def prepare_trace_grid(board):
+    """
+    Готовит поле для Tracer: копирует его в Grid и освобождает клетки A и B,
+    чтобы волна могла в них войти.
+
+    :return: (grid, start, finish); если A или B не заданы, grid – None
+    """
+    start, finish = find_endpoints(board)
+    if start is None or finish is None:
+        return None, start, finish
+    grid = Grid.from_rows(board)
+    grid.set(start[0], start[1], FREE)
+    grid.set(finish[0], finish[1], FREE)
+    return grid, start, finish
@@ -0,0 +1,283 @@
+import heapq
+
+from algorithm.grid import FREE
+from algorithm.tracer import DEFAULT_DIRECTIONS
+
+SEARCH_MODES = ("wave", "astar", "bidirectional_astar", "jps")
+# Ходы 4-связной сетки: только для них манхэттенская эвристика допустима, а JPS полон.
+ORTHOGONAL_MOVES = frozenset(((-1, 0), (0, 1), (1, 0), (0, -1)))
+
+
+def manhattan(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+class HeuristicSearch:
+    """
+    Целенаправленный поиск на сетке: A*, двунаправленный A* и Jump Point Search
+    с манхэттенской эвристикой (4-связная сетка, единичная стоимость шага).
+
+    Результат имеет тот же вид, что и у Tracer.bidirectional_trace:
+    (wave_start, wave_finish, meeting_point), где wave[r][c] = (label, direction),
+    label – порядковый номер открытия клетки. Так Board.draw показывает
+    исследованную область, а Tracer.reconstruct_path восстанавливает путь.
+    """
+
+    def __init__(self, grid, directions=None):
+        """
+        :param grid: 2D-список или Grid (A и B уже заменены на 0)
+        :param directions: порядок просмотра соседей [(name, dr, dc), ...] –
+                           перестановка четырёх ортогональных ходов
+        :raises ValueError: направления не образуют 4-связную сетку (диагонали,
+                            длинные ходы, пропущенные или повторённые ходы)
+        """
+        directions = list(directions or DEFAULT_DIRECTIONS)
+        moves = [(dr, dc) for _, dr, dc in directions]
+        if len(moves) != len(ORTHOGONAL_MOVES) or set(moves) != ORTHOGONAL_MOVES:
+            raise ValueError(f"Эвристический поиск работает только на 4-связной сетке, получены ходы {moves}")
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0]) if self.rows > 0 else 0
+        self.directions = directions
+        # Число открытых (помеченных) и раскрытых клеток за последний поиск.
+        self.cells_labelled = 0
+        self.cells_expanded = 0
+
+    def _free(self, r, c):
+        return 0 <= r < self.rows and 0 <= c < self.cols and self.grid[r][c] == FREE
+
+    def _empty_waves(self, start, finish):
+        wave_start = [[None for _ in range(self.cols)] for _ in range(self.rows)]
+        wave_finish = [[None for _ in range(self.cols)] for _ in range(self.rows)]
+        wave_start[start[0]][start[1]] = (0, None)
+        wave_finish[finish[0]][finish[1]] = (0, None)
+        return wave_start, wave_finish
+
+    def astar(self, start, finish):
+        """
+        A* от A к B. Волна финиша содержит только клетку B, точка встречи – B.
+        """
+        wave_start, wave_finish = self._empty_waves(start, finish)
+        g = {start: 0}
+        closed = set()
+        heap = [(manhattan(start, finish), 0, 0, start)]
+        label = 1
+        order = 1
+        self.cells_expanded = 0
+        meeting = None
+
+        while heap:
+            _, _, _, cell = heapq.heappop(heap)
+            if cell in closed:
+                continue
+            closed.add(cell)
+            self.cells_expanded += 1
+            if cell == finish:
+                meeting = finish
+                break
+            r, c = cell
+            for dname, dr, dc in self.directions:
+                nxt = (r + dr, c + dc)
+                if nxt in closed or not self._free(*nxt):
+                    continue
+                new_g = g[cell] + 1
+                if new_g < g.get(nxt, new_g + 1):
+                    g[nxt] = new_g
+                    current = wave_start[nxt[0]][nxt[1]]
+                    if current is None:
+                        wave_start[nxt[0]][nxt[1]] = (label, dname)
+                        label += 1
+                    else:
+                        wave_start[nxt[0]][nxt[1]] = (current[0], dname)
+                    h = manhattan(nxt, finish)
+                    # При равных f раньше раскрываются клетки ближе к цели.
+                    heapq.heappush(heap, (new_g + h, h, order, nxt))
+                    order += 1
+
+        self.cells_labelled = label + 1
+        return wave_start, wave_finish, meeting
+
+    def bidirectional_astar(self, start, finish):
+        """
+        Двунаправленный A*: раскрывается сторона с меньшим минимальным f.
+        Поиск останавливается, когда минимальный f одной из сторон не меньше длины
+        лучшего найденного пути – с согласованной эвристикой путь кратчайший.
+        """
+        wave_start, wave_finish = self._empty_waves(start, finish)
+        if start == finish:
+            # Как в Tracer.bidirectional_trace: встреча в исходной клетке без поиска,
+            # иначе встреча в соседней клетке дала бы путь туда и обратно.
+            self.cells_expanded = 0
+            self.cells_labelled = 2
+            return wave_start, wave_finish, start
+        sides = [
+            {"wave": wave_start, "target": finish, "g": {start: 0}, "closed": set(),
+             "heap": [(manhattan(start, finish), 0, 0, start)], "label": 1},
+            {"wave": wave_finish, "target": start, "g": {finish: 0}, "closed": set(),
+             "heap": [(manhattan(start, finish), 0, 0, finish)], "label": 1},
+        ]
+        order = 1
+        best = None
+        meeting = None
+        self.cells_expanded = 0
+
+        while sides[0]["heap"] and sides[1]["heap"]:
+            if best is not None and (sides[0]["heap"][0][0] >= best or sides[1]["heap"][0][0] >= best):
+                break
+            side = sides[0] if sides[0]["heap"][0] <= sides[1]["heap"][0] else sides[1]
+            other = sides[1] if side is sides[0] else sides[0]
+            _, _, _, cell = heapq.heappop(side["heap"])
+            if cell in side["closed"]:
+                continue
+            side["closed"].add(cell)
+            self.cells_expanded += 1
+            r, c = cell
+            wave = side["wave"]
+            for dname, dr, dc in self.directions:
+                nxt = (r + dr, c + dc)
+                if nxt in side["closed"] or not self._free(*nxt):
+                    continue
+                new_g = side["g"][cell] + 1
+                if new_g < side["g"].get(nxt, new_g + 1):
+                    side["g"][nxt] = new_g
+                    current = wave[nxt[0]][nxt[1]]
+                    if current is None:
+                        wave[nxt[0]][nxt[1]] = (side["label"], dname)
+                        side["label"] += 1
+                    else:
+                        wave[nxt[0]][nxt[1]] = (current[0], dname)
+                    h = manhattan(nxt, side["target"])
+                    heapq.heappush(side["heap"], (new_g + h, h, order, nxt))
+                    order += 1
+                    if nxt in other["g"]:
+                        total = new_g + other["g"][nxt]
+                        if best is None or total < best:
+                            best = total
+                            meeting = nxt
+
+        self.cells_labelled = sides[0]["label"] + sides[1]["label"]
+        return wave_start, wave_finish, meeting
+
+    def jps(self, start, finish):
+        """
+        Jump Point Search для 4-связной сетки с единичной стоимостью.
+        Вертикальные ходы играют роль диагоналей JPS: на каждой клетке вертикального
+        прыжка запускаются горизонтальные прыжки, а горизонтальный прыжок
+        останавливается на цели или у «вынужденного» соседа.
+        Метки получают только точки прыжка; клетки найденного пути между ними
+        дописываются в волну, чтобы путь восстанавливался обычным образом.
+        cells_expanded считает раскрытые точки прыжка, а не просмотренные при прыжках клетки.
+        """
+        wave_start, wave_finish = self._empty_waves(start, finish)
+        g = {start: 0}
+        parent = {start: None}
+        closed = set()
+        heap = [(manhattan(start, finish), 0, 0, start)]
+        label = 1
+        order = 1
+        meeting = None
+        self.cells_expanded = 0
+        names = {(dr, dc): dname for dname, dr, dc in self.directions}
+
+        while heap:
+            _, _, _, cell = heapq.heappop(heap)
+            if cell in closed:
+                continue
+            closed.add(cell)
+            self.cells_expanded += 1
+            if cell == finish:
+                meeting = finish
+                break
+            for dr, dc in self._jps_directions(cell, parent[cell]):
+                jump = self._jump(cell, dr, dc, finish)
+                if jump is None or jump in closed:
+                    continue
+                new_g = g[cell] + manhattan(cell, jump)
+                if new_g < g.get(jump, new_g + 1):
+                    g[jump] = new_g
+                    parent[jump] = cell
+                    current = wave_start[jump[0]][jump[1]]
+                    wave_start[jump[0]][jump[1]] = (label if current is None else current[0], names[(dr, dc)])
+                    if current is None:
+                        label += 1
+                    h = manhattan(jump, finish)
+                    heapq.heappush(heap, (new_g + h, h, order, jump))
+                    order += 1
+
+        if meeting is not None:
+            self._fill_segments(wave_start, parent, finish, names)
+        self.cells_labelled = label + 1
+        return wave_start, wave_finish, meeting
+
+    def _jps_directions(self, cell, parent):
+        r, c = cell
+        if parent is None:
+            return [(dr, dc) for _, dr, dc in self.directions]
+        dr = (r > parent[0]) - (r < parent[0])
+        dc = (c > parent[1]) - (c < parent[1])
+        if dr:
+            # После вертикального хода допустимы вертикаль дальше и обе горизонтали.
+            return [(dr, 0), (0, 1), (0, -1)]
+        result = [(0, dc)]
+        for vr in (-1, 1):
+            if self._free(r + vr, c) and not self._free(r + vr, c - dc):
+                result.append((vr, 0))
+        return result
+
+    def _jump(self, cell, dr, dc, finish):
+        r, c = cell
+        while True:
+            r += dr
+            c += dc
+            if not self._free(r, c):
+                return None
+            if (r, c) == finish:
+                return r, c
+            if dc:
+                for vr in (-1, 1):
+                    if self._free(r + vr, c) and not self._free(r + vr, c - dc):
+                        return r, c
+            elif (self._jump((r, c), 0, 1, finish) is not None
+                  or self._jump((r, c), 0, -1, finish) is not None):
+                return r, c
+
+    @staticmethod
+    def _fill_segments(wave, parent, finish, names):
+        cell = finish
+        while parent[cell] is not None:
+            prev = parent[cell]
+            dr = (cell[0] > prev[0]) - (cell[0] < prev[0])
+            dc = (cell[1] > prev[1]) - (cell[1] < prev[1])
+            label = wave[cell[0]][cell[1]][0]
+            r, c = prev
+            while (r, c) != cell:
+                r += dr
+                c += dc
+                current = wave[r][c]
+                wave[r][c] = (label if current is None else current[0], names[(dr, dc)])
+            cell = prev
+
+
+def compare_modes(grid, start, finish, modes=SEARCH_MODES, direction_order=None):
+    """
+    Сравнивает режимы поиска на одном поле.
+
+    :return: {mode: {"cells_expanded": ..., "cells_labelled": ..., "path_length": ...}};
+             для "wave" раскрытые и помеченные клетки совпадают
+    """
+    from algorithm.path import full_path
+    from algorithm.tracer import Tracer
+
+    report = {}
+    for mode in modes:
+        tracer = Tracer(grid, direction_order=direction_order)
+        wave_s, wave_f, meeting = tracer.search_trace(start, finish, mode)
+        path_length = None
+        if meeting is not None:
+            path_length = len(full_path(wave_s, wave_f, start, finish, meeting)) - 1
+        report[mode] = {
+            "cells_expanded": tracer.cells_expanded,
+            "cells_labelled": tracer.cells_labelled,
+            "path_length": path_length,
+        }
+    return report
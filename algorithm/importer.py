@@ -0,0 +1,236 @@
+"""
+Потоковый импорт больших полей из CSV и JSON.
+
+Строки поля разбираются по одной прямо в байтовый буфер (коды Grid), без
+списков Python-чисел на всё поле. Ширина строк и коды клеток проверяются
+по ходу чтения, ошибки сообщают номер строки. Поле можно сразу переписать
+в .wtb (algorithm.binboard), не собирая его в памяти целиком.
+
+Пример:
+    python -m algorithm.importer legacy.csv board.wtb --compression zlib
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+from algorithm.binboard import COMPRESSIONS, BoardWriter
+from algorithm.grid import Grid
+
+CHUNK_SIZE = 1 << 20
+# Допустимые коды клеток: 0–3 (свободно, препятствие, A, B), 4–5 (отметки пути).
+VALID_CODES = b"012345"
+_TO_CODES = bytes.maketrans(VALID_CODES, bytes(range(len(VALID_CODES))))
+_WHITESPACE = b" \t\r\n"
+
+_BOARD_KEY = re.compile(rb'"board"\s*:\s*\[')
+_ROW = re.compile(rb"\s*\[([^\[\]]*)\]\s*([,\]])")
+_EMPTY_BOARD = re.compile(rb"\s*\]")
+
+
+def parse_row(text, line):
+    """
+    Разбирает строку поля "0,1,0,2" в байты кодов.
+
+    :param text: байты строки (пробелы и переводы строк допускаются)
+    :param line: номер строки для сообщения об ошибке
+    :raises ValueError: пустое поле, лишние запятые, многозначные или недопустимые коды
+    """
+    cells = text.translate(None, _WHITESPACE)
+    values = cells.replace(b",", b"")
+    # Коды и запятые чередуются: код на чётных позициях, запятая – на нечётных.
+    if (not values or len(cells) != 2 * len(values) - 1
+            or cells[1::2] != b"," * (len(cells) // 2) or b"," in cells[::2]):
+        raise ValueError(f"Строка {line}: ожидаются однозначные коды через запятую")
+    bad = values.translate(None, VALID_CODES)
+    if bad:
+        raise ValueError(f"Строка {line}: недопустимый код клетки {bad[:1].decode(errors='replace')!r}")
+    return values.translate(_TO_CODES)
+
+
+def iter_csv_rows(f):
+    """
+    Строки CSV-поля (файл открыт в двоичном режиме); пустые строки пропускаются.
+
+    :return: генератор пар (номер строки, байты кодов)
+    """
+    for line_no, line in enumerate(f, 1):
+        if line.strip():
+            yield line_no, parse_row(line, line_no)
+
+
+def iter_json_rows(f, meta):
+    """
+    Строки массива "board" JSON-поля, прочитанного кусками по CHUNK_SIZE.
+    Остальные ключи файла (grid_size, nets) после разбора кладутся в meta –
+    они малы и разбираются обычным json без массива поля.
+
+    :param f: файл, открытый в двоичном режиме
+    :param meta: словарь, который заполняется ключами файла верхнего уровня
+    :return: генератор пар (номер строки поля, байты кодов)
+    """
+    buffer = b""
+    while True:
+        match = _BOARD_KEY.search(buffer)
+        if match:
+            break
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            raise ValueError("В JSON нет массива board")
+        buffer += chunk
+    prefix = buffer[:match.end() - 1]
+    buffer = buffer[match.end():]
+
+    row = 0
+    pos = 0
+    eof = False
+    finished = False
+    while not finished:
+        if row == 0:
+            empty = _EMPTY_BOARD.match(buffer, pos)
+            if empty:
+                pos = empty.end()
+                break
+        match = _ROW.match(buffer, pos)
+        if match is None:
+            if eof:
+                raise ValueError(f"Строка поля {row + 1}: неверный формат массива board")
+            chunk = f.read(CHUNK_SIZE)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        row += 1
+        yield row, parse_row(match.group(1), row)
+        pos = match.end()
+        finished = match.group(2) == b"]"
+
+    rest = buffer[pos:] + f.read()
+    meta.update(json.loads(prefix + b"null" + rest))
+
+
+def _iter_rows(filename, f, meta):
+    lower = filename.lower()
+    if lower.endswith(".csv"):
+        return iter_csv_rows(f)
+    if lower.endswith(".json"):
+        return iter_json_rows(f, meta)
+    raise ValueError(f"Неподдерживаемый формат файла: {filename}")
+
+
+def _stream(filename, progress, consume):
+    """
+    Читает строки поля и передаёт их consume(row_bytes), проверяя ширину.
+
+    :return: (rows, cols, meta)
+    """
+    total = os.path.getsize(filename)
+    meta = {}
+    rows = 0
+    cols = None
+    with open(filename, "rb") as f:
+        for line_no, cells in _iter_rows(filename, f, meta):
+            if cols is None:
+                cols = len(cells)
+            elif len(cells) != cols:
+                raise ValueError(f"Строка {line_no}: {len(cells)} клеток вместо {cols}")
+            consume(cells)
+            rows += 1
+            if progress is not None and rows % 256 == 0:
+                progress(f.tell(), total)
+    if cols is None:
+        raise ValueError(f"Файл {filename} не содержит строк поля")
+    if progress is not None:
+        progress(total, total)
+    return rows, cols, meta
+
+
+def _check_dimensions(meta, rows, cols):
+    """
+    Сверяет размеры из ключей rows/cols JSON-поля (если они есть) с прочитанным полем.
+    """
+    for key, actual in (("rows", rows), ("cols", cols)):
+        if key in meta and meta[key] != actual:
+            raise ValueError(f"В файле {key} = {meta[key]}, а в массиве board {actual}")
+
+
+def import_board(filename, progress=None):
+    """
+    Читает CSV или JSON поле в Grid потоково.
+
+    :param progress: функция progress(bytes_read, total_bytes) или None
+    :return: словарь {"grid_size", "board", "nets", "layers", "preferred"}; board – Grid,
+             layers – дополнительные слои JSON-поля (список Grid)
+    :raises ValueError: ошибка формата (с номером строки)
+    """
+    data = bytearray()
+    filled = 0
+
+    def consume(cells):
+        nonlocal data, filled
+        if not data:
+            # Число строк заранее неизвестно, а поле может быть длинным и узким
+            # (200x20000): буфер начинается с CHUNK_SIZE и растёт в полтора раза.
+            data = bytearray(max(len(cells), CHUNK_SIZE))
+        end = filled + len(cells)
+        if end > len(data):
+            data.extend(bytes(max(len(cells), len(data) // 2)))
+        data[filled:end] = cells
+        filled = end
+
+    rows, cols, meta = _stream(filename, progress, consume)
+    del data[filled:]
+    _check_dimensions(meta, rows, cols)
+    return {
+        "grid_size": meta.get("grid_size", max(rows, cols)),
+        "board": Grid(rows, cols, data),
+        "nets": meta.get("nets", []),
+        "layers": [Grid.from_rows(layer) for layer in meta.get("layers", [])],
+        "preferred": meta.get("preferred"),
+    }
+
+
+def convert_board(src, dst, compression="none", progress=None):
+    """
+    Переписывает CSV/JSON поле в .wtb, держа в памяти только текущую строку.
+
+    :param compression: сжатие клеток .wtb ("none", "zlib", "rle")
+    :return: (rows, cols)
+    """
+    writer = None
+    with open(dst, "wb") as out:
+
+        def consume(cells):
+            nonlocal writer
+            if writer is None:
+                writer = BoardWriter(out, len(cells), compression)
+            writer.write_rows(cells)
+
+        rows, cols, meta = _stream(src, progress, consume)
+        _check_dimensions(meta, rows, cols)
+        writer.finish(nets=meta.get("nets"), layers=meta.get("layers"), preferred=meta.get("preferred"))
+    return rows, cols
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Потоковый импорт CSV/JSON поля в .wtb")
+    parser.add_argument("source", help="файл поля CSV или JSON")
+    parser.add_argument("target", help="файл .wtb")
+    parser.add_argument("--compression", choices=list(COMPRESSIONS), default="none")
+    args = parser.parse_args(argv)
+
+    def progress(done, total):
+        print(f"\r{done * 100 // max(total, 1):3d}%", end="", file=sys.stderr)
+
+    try:
+        rows, cols = convert_board(args.source, args.target, args.compression, progress)
+    except ValueError as e:
+        print(f"\nОшибка импорта: {e}", file=sys.stderr)
+        return 1
+    print(f"\nЗаписано поле {rows}x{cols}: {args.target}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+from bisect import bisect_right
+
+from algorithm.grid import FREE, Grid
+from algorithm.kernel import BLOCKED, MARK_BASE, FlatWaveKernel
+from algorithm.tracer import DEFAULT_DIRECTIONS
+
+
+class IncrementalTracer:
+    """
+    Встречная волна с инкрементальной перетрассировкой после правки одной клетки.
+
+    Номера клеток зависят от порядка обхода, поэтому «локально» их исправить нельзя:
+    изменение клетки сдвигает номера всех клеток, помеченных после неё. Зато всё,
+    что было помечено до первой итерации, затронутой правкой, остаётся в силе.
+    Трассировщик хранит границы уровней в очередях волн, откатывает обе волны только
+    до этой итерации (снимая метки с клеток более поздних уровней) и продолжает
+    BFS оттуда – результат совпадает с полной перетрассировкой Tracer.
+
+    Волны – FlatWave общего ядра (algorithm.kernel): правка клетки меняет её байт
+    состояния в обеих волнах, откат – сброс состояний хвоста очереди.
+    """
+
+    def __init__(self, grid, start, finish, direction_order=None):
+        """
+        :param grid: поле для трассировки (A и B уже заменены на 0); копируется
+        :param start: координаты A
+        :param finish: координаты B
+        """
+        self.grid = Grid.from_rows(grid)
+        self.rows = self.grid.rows
+        self.cols = self.grid.cols
+        self.start = start
+        self.finish = finish
+        self.directions = list(direction_order or DEFAULT_DIRECTIONS)
+
+        self.kernel = None
+        self.flat_start = None
+        self.flat_finish = None
+        self.wave_start = None
+        self.wave_finish = None
+        self.meeting = None
+        # ends_*[k] – позиция в очереди волны сразу за клетками, помеченными на k-й итерации.
+        self.ends_start = []
+        self.ends_finish = []
+        self.iterations = 0
+        # С какой итерации волны пересчитаны при последнем обновлении (None – не менялись).
+        self.repaired_from = None
+        # Клетки матриц волн, изменённые последним update (None – волны построены заново).
+        self.changed_cells = None
+        # Последняя трассировка прервана через cancel; волны в этом случае неполные.
+        self.cancelled = False
+
+    @property
+    def cells_labelled(self):
+        """Помеченные клетки обеих волн, включая A и B."""
+        if self.flat_start is None:
+            return 0
+        return self.flat_start.tail + self.flat_finish.tail
+
+    def trace(self, progress=None, cancel=None):
+        """
+        Полная трассировка.
+
+        :param progress: функция progress(iteration, cells_labelled), вызывается после каждой итерации
+        :param cancel: threading.Event; если он установлен, трассировка прерывается
+                       после текущей итерации и cancelled становится True
+        :return: (wave_start, wave_finish, meeting_point) в формате Tracer.bidirectional_trace
+        """
+        self.kernel = FlatWaveKernel(self.grid, self.directions)
+        self.flat_start = self.kernel.wave(self.start)
+        self.flat_finish = self.kernel.wave(self.finish)
+        self.wave_start = self.flat_start.fill([[None for _ in range(self.cols)] for _ in range(self.rows)])
+        self.wave_finish = self.flat_finish.fill([[None for _ in range(self.cols)] for _ in range(self.rows)])
+        self.ends_start = [1]
+        self.ends_finish = [1]
+        self.iterations = 0
+        self.repaired_from = 0
+        self.changed_cells = None
+        if tuple(self.start) == tuple(self.finish):
+            # Как в Tracer.bidirectional_trace: встреча в исходной клетке, волны не раскрываются.
+            # Правки других клеток эту встречу не меняют – update не откатывает уровней.
+            self.meeting = tuple(self.start)
+            self.cancelled = False
+            return self.wave_start, self.wave_finish, self.meeting
+        self._run(progress, cancel)
+        return self.wave_start, self.wave_finish, self.meeting
+
+    def update(self, r, c, value):
+        """
+        Меняет клетку поля и восстанавливает волны.
+
+        :return: (wave_start, wave_finish, meeting_point), как после полной трассировки
+        """
+        if (r, c) in (self.start, self.finish):
+            raise ValueError("Нельзя менять клетки A и B")
+        was_free = self.grid.get(r, c) == FREE
+        self.grid.set(r, c, value)
+        if self.wave_start is None:
+            return self.trace()
+        self.changed_cells = []
+        if was_free == (value == FREE):
+            self.repaired_from = None
+            return self.wave_start, self.wave_finish, self.meeting
+
+        index = self.kernel.index((r, c))
+        if was_free:
+            affected = min(self._labelled_level(self.flat_start, self.ends_start, index),
+                           self._labelled_level(self.flat_finish, self.ends_finish, index))
+        else:
+            affected = min(self._reachable_level(self.flat_start, self.ends_start, index),
+                           self._reachable_level(self.flat_finish, self.ends_finish, index))
+
+        repair = affected <= self.iterations
+        if repair:
+            self._rollback(affected)
+        # После отката клетка не помечена ни одной волной: меняется только её состояние.
+        for wave in (self.flat_start, self.flat_finish):
+            wave.state[index] = BLOCKED if was_free else 0
+            if not was_free:
+                # Свободных клеток стало больше – очередь растёт на одну позицию.
+                wave.queue.append(0)
+        if not repair:
+            self.repaired_from = None
+            return self.wave_start, self.wave_finish, self.meeting
+
+        self.repaired_from = affected
+        keep_start, keep_finish = self.flat_start.tail, self.flat_finish.tail
+        self._run()
+        for wave, keep in ((self.flat_start, keep_start), (self.flat_finish, keep_finish)):
+            self.changed_cells += [(r, c) for r, c, _, _ in wave.cells(keep, wave.tail)]
+        return self.wave_start, self.wave_finish, self.meeting
+
+    def _labelled_level(self, wave, ends, index):
+        # Занятая клетка влияет на волну с той итерации, на которой была помечена.
+        if wave.state[index] < MARK_BASE:
+            return self.iterations + 1
+        return bisect_right(ends, wave.label(index))
+
+    def _reachable_level(self, wave, ends, index):
+        # Освобождённая клетка будет помечена при расширении ближайшего уровня соседей,
+        # из которых в неё ведёт ход; рамка поля занята, проверки границ не нужны.
+        best = self.iterations + 1
+        for _, offset in self.kernel.moves:
+            best = min(best, self._labelled_level(wave, ends, index - offset) + 1)
+        return best
+
+    def _rollback(self, iteration):
+        """Снимает метки, поставленные на итерациях >= iteration."""
+        for wave, ends, matrix in ((self.flat_start, self.ends_start, self.wave_start),
+                                   (self.flat_finish, self.ends_finish, self.wave_finish)):
+            keep = ends[iteration - 1]
+            state, queue = wave.state, wave.queue
+            for r, c, _, _ in wave.cells(keep, wave.tail):
+                matrix[r][c] = None
+                self.changed_cells.append((r, c))
+            for pos in range(keep, wave.tail):
+                state[queue[pos]] = 0
+            del ends[iteration:]
+            wave.head = ends[-2] if len(ends) > 1 else 0
+            wave.tail = keep
+            wave.met = False
+        self.iterations = iteration - 1
+        self.meeting = None
+
+    def _run(self, progress=None, cancel=None):
+        """Продолжает встречную волну с текущего состояния уровней."""
+        kernel = self.kernel
+        wave_s, wave_f = self.flat_start, self.flat_finish
+        self.meeting = None
+        self.cancelled = False
+
+        while wave_s.pending and wave_f.pending:
+            if cancel is not None and cancel.is_set():
+                self.cancelled = True
+                return
+            self.iterations += 1
+            new_s = wave_s.expand(wave_f)
+            new_f = wave_f.expand(wave_s)
+            self.ends_start.append(wave_s.tail)
+            self.ends_finish.append(wave_f.tail)
+            wave_s.fill(self.wave_start, *new_s)
+            wave_f.fill(self.wave_finish, *new_f)
+            if progress is not None:
+                progress(self.iterations, wave_s.tail + wave_f.tail)
+
+            if wave_s.met or wave_f.met:
+                self.meeting = kernel.meeting(wave_s, new_s, wave_f, new_f)
+                return
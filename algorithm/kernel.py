@@ -0,0 +1,267 @@
+"""
+Общее ядро волны Tracer на плоских индексах клеток.
+
+Поле дополняется рамкой из занятых клеток, поэтому клетка (r, c) – индекс
+(r + 1) * stride + c + 1, а соседи – постоянные смещения индекса в порядке
+просмотра направлений, без проверок границ. Состояние клетки для каждой волны –
+один байт: свободна, занята или помечена (и каким направлением).
+
+Каждая клетка попадает в очередь волны не больше одного раза, поэтому очередь –
+заранее выделенный array('i') на все свободные клетки без переполнения по кругу:
+позиция клетки в очереди и есть её номер (label), а уровень волны – отрезок очереди.
+
+Ядро общее для Tracer, IncrementalTracer и MultiNetRouter: IncrementalTracer откатывает
+волну, сбрасывая состояния клеток хвоста очереди, и продолжает раскрытие тем же expand,
+а MultiNetRouter держит одно ядро на всю разводку и меняет в нём клетки через set_free.
+"""
+from array import array
+
+# Состояние клетки в волне: 0 – свободна и не помечена, BLOCKED – препятствие или рамка,
+# MARK_BASE + k – помечена ходом по направлению k, ORIGIN – исходная клетка волны.
+BLOCKED = 1
+MARK_BASE = 2
+ORIGIN = 255
+# Перевод клеток поля в состояния: 0 – свободна, любое другое значение – препятствие.
+_BLOCKED_TABLE = bytes.maketrans(bytes(range(256)), b"\x00" + bytes((BLOCKED,)) * 255)
+
+
+class FlatWaveKernel:
+    """
+    Поле с рамкой и таблица ходов; общие для обеих волн одной трассировки.
+    """
+
+    def __init__(self, grid, directions):
+        """
+        :param grid: 2D-список или Grid (A и B уже заменены на 0)
+        :param directions: порядок просмотра соседей [(name, dr, dc), ...], |dr|, |dc| <= 1
+        """
+        if any(abs(dr) > 1 or abs(dc) > 1 for _, dr, dc in directions):
+            raise ValueError("Ходы длиннее одной клетки не поддерживаются")
+        self.rows = len(grid)
+        self.cols = len(grid[0]) if self.rows > 0 else 0
+        self.stride = self.cols + 2
+        self.directions = list(directions)
+        # (состояние помеченной клетки, смещение индекса) в порядке просмотра направлений.
+        self.moves = [(MARK_BASE + k, dr * self.stride + dc)
+                      for k, (_, dr, dc) in enumerate(self.directions)]
+        # Имя направления по состоянию клетки.
+        self.names = [None] * 256
+        for k, (dname, _, _) in enumerate(self.directions):
+            self.names[MARK_BASE + k] = dname
+
+        border = bytes((BLOCKED,))
+        rows = [border * self.stride]
+        for row in grid:
+            rows.append(border + bytes(row).translate(_BLOCKED_TABLE) + border)
+        rows.append(border * self.stride)
+        self.cells = bytearray(b"".join(rows))
+        # Очередь вмещает все свободные клетки.
+        self.capacity = self.cells.count(0)
+
+    def set_free(self, cell, free):
+        """
+        Освобождает или занимает клетку поля; действует на волны, созданные после вызова.
+        """
+        index = self.index(cell)
+        value = 0 if free else BLOCKED
+        if self.cells[index] != value:
+            self.cells[index] = value
+            self.capacity += 1 if free else -1
+
+    def index(self, cell):
+        return (cell[0] + 1) * self.stride + cell[1] + 1
+
+    def cell(self, index):
+        r, c = divmod(index, self.stride)
+        return r - 1, c - 1
+
+    def wave(self, origin):
+        """
+        :return: FlatWave с одной исходной клеткой origin
+        """
+        return FlatWave(self, origin)
+
+    def meeting(self, wave_s, new_s, wave_f, new_f, stats=None):
+        """
+        Пересечения волн среди клеток, помеченных на последнем уровне.
+
+        :param new_s: (begin, end) – отрезок очереди wave_s, помеченный на уровне
+        :param new_f: то же для wave_f
+        :return: клетка с минимальной суммой label_s + label_f или None
+        """
+        intersections = []
+        # Волна, которая за шаг не раскрывалась, даёт пустой отрезок.
+        if new_s[0] < new_s[1]:
+            queue, state = wave_s.queue, wave_f.state
+            intersections += [queue[pos] for pos in range(*new_s) if state[queue[pos]] >= MARK_BASE]
+        if new_f[0] < new_f[1]:
+            queue, state = wave_f.queue, wave_s.state
+            intersections += [queue[pos] for pos in range(*new_f) if state[queue[pos]] >= MARK_BASE]
+        if not intersections and stats is None:
+            return None
+        if stats is not None:
+            stats.intersection_checks += new_s[1] - new_s[0] + new_f[1] - new_f[0]
+            stats.intersections += len(intersections)
+        best_meeting = None
+        best_sum = None
+        for index in intersections:
+            total = wave_s.label(index) + wave_f.label(index)
+            if best_sum is None or total < best_sum:
+                best_sum = total
+                best_meeting = index
+        return None if best_meeting is None else self.cell(best_meeting)
+
+
+class FlatWave:
+    """
+    Одна волна BFS: байтовые состояния клеток и очередь-массив номеров.
+    """
+
+    __slots__ = ("kernel", "state", "queue", "labels", "head", "tail", "previous", "met")
+
+    def __init__(self, kernel, origin):
+        self.kernel = kernel
+        self.state = bytearray(kernel.cells)
+        self.queue = array("i", bytes(4 * (kernel.capacity + 1)))
+        # Номер по индексу клетки; читается только для помеченных клеток.
+        self.labels = array("i", bytes(4 * len(kernel.cells)))
+        index = kernel.index(origin)
+        self.state[index] = ORIGIN
+        self.queue[0] = index
+        # Отрезок очереди head:tail – клетки текущего фронта (последнего уровня).
+        self.head = 0
+        self.tail = 1
+        # Размер предыдущего фронта – для прогноза роста волны.
+        self.previous = 1
+        # На последнем уровне помечена клетка, уже помеченная встречной волной.
+        self.met = False
+
+    @property
+    def pending(self):
+        return self.tail > self.head
+
+    @property
+    def frontier(self):
+        return self.tail - self.head
+
+    def label(self, index):
+        """Номер помеченной клетки – её позиция в очереди."""
+        return self.labels[index]
+
+    def is_labelled(self, cell):
+        return self.state[self.kernel.index(cell)] >= MARK_BASE
+
+    def expand(self, other=None):
+        """
+        Раскрывает весь текущий фронт: соседи помечаются в порядке извлечения
+        клеток и просмотра направлений.
+
+        :param other: встречная волна; met станет True, если новая клетка уже помечена ею
+        :return: (begin, end) – отрезок очереди с клетками, помеченными на этом уровне
+        """
+        # Без встречной волны сверка идёт с исходным полем, где помеченных клеток нет.
+        other_state = self.kernel.cells if other is None else other.state
+        met = False
+        state = self.state
+        queue = self.queue
+        labels = self.labels
+        moves = self.kernel.moves
+        begin = end = self.tail
+        for pos in range(self.head, begin):
+            index = queue[pos]
+            for mark, offset in moves:
+                n = index + offset
+                if not state[n]:
+                    state[n] = mark
+                    labels[n] = end
+                    queue[end] = n
+                    end += 1
+                    if other_state[n] >= MARK_BASE:
+                        met = True
+        self.previous = max(begin - self.head, 1)
+        self.met = met
+        self.head = begin
+        self.tail = end
+        return begin, end
+
+    def expand_counting(self, rejected, other=None):
+        """
+        expand, который считает отвергнутых соседей по причинам в rejected
+        ("bounds" – рамка поля, "obstacle", "visited"); для профилирования.
+        """
+        other_state = self.kernel.cells if other is None else other.state
+        met = False
+        state = self.state
+        queue = self.queue
+        labels = self.labels
+        moves = self.kernel.moves
+        stride = self.kernel.stride
+        last_row = self.kernel.rows + 1
+        begin = end = self.tail
+        for pos in range(self.head, begin):
+            index = queue[pos]
+            for mark, offset in moves:
+                n = index + offset
+                value = state[n]
+                if not value:
+                    state[n] = mark
+                    labels[n] = end
+                    queue[end] = n
+                    end += 1
+                    if other_state[n] >= MARK_BASE:
+                        met = True
+                elif value >= MARK_BASE:
+                    rejected["visited"] += 1
+                else:
+                    r, c = divmod(n, stride)
+                    on_border = r == 0 or r == last_row or c == 0 or c == stride - 1
+                    rejected["bounds" if on_border else "obstacle"] += 1
+        self.previous = max(begin - self.head, 1)
+        self.met = met
+        self.head = begin
+        self.tail = end
+        return begin, end
+
+    def trace_back(self, cell):
+        """
+        Путь от исходной клетки волны до помеченной клетки cell по состояниям клеток,
+        без матрицы волны.
+        """
+        kernel = self.kernel
+        offsets = dict(kernel.moves)
+        state = self.state
+        index = kernel.index(cell)
+        path = [cell]
+        while state[index] != ORIGIN:
+            index -= offsets[state[index]]
+            path.append(kernel.cell(index))
+        path.reverse()
+        return path
+
+    def cells(self, begin, end):
+        """
+        Помеченные клетки отрезка очереди: список (r, c, label, direction).
+        """
+        queue = self.queue
+        state = self.state
+        names = self.kernel.names
+        stride = self.kernel.stride
+        result = []
+        for pos in range(begin, end):
+            r, c = divmod(queue[pos], stride)
+            result.append((r - 1, c - 1, pos, names[state[queue[pos]]]))
+        return result
+
+    def fill(self, wave, begin=0, end=None):
+        """
+        Записывает клетки отрезка очереди в матрицу wave[r][c] = (label, direction).
+        """
+        queue = self.queue
+        state = self.state
+        names = self.kernel.names
+        stride = self.kernel.stride
+        for pos in range(begin, self.tail if end is None else end):
+            index = queue[pos]
+            r, c = divmod(index, stride)
+            wave[r - 1][c - 1] = (pos, names[state[index]])
+        return wave
@@ -0,0 +1,312 @@
+"""
+Многослойное поле и трассировка с переходными отверстиями (via).
+
+Все слои лежат в одном bytearray подряд: клетка (layer, row, col) – байт
+(layer * rows + row) * cols + col, поэтому память растёт линейно с числом слоёв,
+а слой – обычный Grid поверх среза общего буфера.
+
+Поиск идёт по плоскому массиву с рамкой: каждый слой дополнен занятыми клетками
+по краям, и соседи клетки – постоянные смещения индекса (±1, ±ширина строки,
+±размер слоя для via) без проверок границ строк и столбцов.
+"""
+from array import array
+
+from algorithm.grid import FINISH, FREE, START, Grid
+from algorithm.tracer import DEFAULT_DIRECTIONS
+
+# Предпочтительные направления слоя: "H" – горизонтальные ходы, "V" – вертикальные.
+PREFERRED_DIRECTIONS = ("H", "V")
+# Направления ходов через via в волне слоя: "+" – со слоя ниже, "-" – со слоя выше.
+VIA_UP = "+"
+VIA_DOWN = "-"
+_UNLABELLED = -1
+
+
+def _move_axis(dr, dc):
+    """
+    Ось хода по смещению: "H" – по строке, "V" – по столбцу, None – диагональ
+    (поперёк предпочтительного направления любого слоя).
+    """
+    if dr == 0:
+        return "H"
+    if dc == 0:
+        return "V"
+    return None
+
+
+class LayeredGrid:
+    """
+    Поле из нескольких слоёв одинакового размера в одном буфере.
+    """
+
+    __slots__ = ("layers", "rows", "cols", "data")
+
+    def __init__(self, layers, rows, cols, data=None):
+        """
+        :param layers: число слоёв
+        :param rows: число строк
+        :param cols: число столбцов
+        :param data: буфер из layers * rows * cols байт; по умолчанию – пустое поле
+        """
+        if layers < 1:
+            raise ValueError(f"Нужен хотя бы один слой, получено {layers}")
+        if data is None:
+            data = bytearray(layers * rows * cols)
+        if len(data) != layers * rows * cols:
+            raise ValueError(f"Размер буфера {len(data)} не совпадает с полем {layers}x{rows}x{cols}")
+        self.layers = layers
+        self.rows = rows
+        self.cols = cols
+        self.data = data
+
+    @classmethod
+    def from_layers(cls, grids):
+        """
+        Собирает поле из списка слоёв (Grid или 2D-списки одного размера).
+        """
+        grids = [grid if isinstance(grid, Grid) else Grid.from_rows(grid) for grid in grids]
+        if not grids:
+            raise ValueError("Нужен хотя бы один слой")
+        rows, cols = grids[0].rows, grids[0].cols
+        data = bytearray()
+        for grid in grids:
+            if (grid.rows, grid.cols) != (rows, cols):
+                raise ValueError(f"Слой {grid.rows}x{grid.cols} не совпадает с размером поля {rows}x{cols}")
+            data += grid.data
+        return cls(len(grids), rows, cols, data)
+
+    def layer(self, index):
+        """
+        :return: Grid слоя index поверх общего буфера (запись меняет это поле)
+        """
+        if not 0 <= index < self.layers:
+            raise IndexError(index)
+        size = self.rows * self.cols
+        return Grid(self.rows, self.cols, memoryview(self.data)[index * size:(index + 1) * size])
+
+    def __getitem__(self, cell):
+        layer, r, c = cell
+        return self.data[(layer * self.rows + r) * self.cols + c]
+
+    def __setitem__(self, cell, value):
+        layer, r, c = cell
+        self.data[(layer * self.rows + r) * self.cols + c] = value
+
+
+class LayeredTracer:
+    """
+    Трассировка по слоям с переходами между соседними слоями (алгоритм Дейкстры
+    с очередью-корзинами Дайала, как в algorithm.weighted).
+
+    Шаг в слое стоит 1, шаг поперёк предпочтительного направления слоя – 1 + wrong_way_cost,
+    переход на соседний слой в той же клетке – via_cost. Метки, расстояния и ходы
+    хранятся в array/bytearray по клеткам, без Python-объектов на клетку.
+    """
+
+    def __init__(self, grid, via_cost=3, preferred=None, wrong_way_cost=2, directions=None):
+        """
+        :param grid: LayeredGrid (A и B уже заменены на 0; непустые клетки непроходимы)
+        :param via_cost: стоимость перехода между слоями (целое >= 1)
+        :param preferred: предпочтительные направления слоёв ["H", "V", None, ...] или None
+        :param wrong_way_cost: доплата за шаг поперёк предпочтительного направления (целое >= 0)
+        :param directions: порядок просмотра соседей [(name, dr, dc), ...]
+        """
+        if via_cost < 1 or wrong_way_cost < 0:
+            raise ValueError("Стоимость via должна быть >= 1, доплата за направление – >= 0")
+        preferred = list(preferred or [None] * grid.layers)
+        if len(preferred) != grid.layers:
+            raise ValueError(f"Направлений слоёв {len(preferred)}, а слоёв {grid.layers}")
+        for axis in preferred:
+            if axis is not None and axis not in PREFERRED_DIRECTIONS:
+                raise ValueError(f"Неизвестное направление слоя: {axis}")
+        self.grid = grid
+        self.layers = grid.layers
+        self.rows = grid.rows
+        self.cols = grid.cols
+        self.via_cost = via_cost
+        self.preferred = preferred
+        self.directions = list(directions or DEFAULT_DIRECTIONS)
+        self.wrong_way_cost = wrong_way_cost
+
+        self.stride = self.cols + 2
+        self.plane = (self.rows + 2) * self.stride
+        self.free = self._padded_free()
+        # Ходы каждого слоя: (код хода, смещение индекса, стоимость); код – номер в self.moves.
+        self.moves = [dname for dname, _, _ in self.directions] + [VIA_UP, VIA_DOWN]
+        self.layer_moves = []
+        for layer in range(self.layers):
+            moves = []
+            for k, (_, dr, dc) in enumerate(self.directions):
+                axis = preferred[layer]
+                cost = 1 if axis is None or _move_axis(dr, dc) == axis else 1 + wrong_way_cost
+                moves.append((k, dr * self.stride + dc, cost))
+            if layer + 1 < self.layers:
+                moves.append((len(self.directions), self.plane, via_cost))
+            if layer > 0:
+                moves.append((len(self.directions) + 1, -self.plane, via_cost))
+            self.layer_moves.append(moves)
+
+        self.labels = None
+        self.came = None
+        self.path_cost = None
+        self.vias = 0
+        self.cells_expanded = 0
+
+    def _padded_free(self):
+        free = bytearray(self.layers * self.plane)
+        size = self.rows * self.cols
+        table = bytes.maketrans(bytes(range(256)), b"\x01" + b"\x00" * 255)
+        for layer in range(self.layers):
+            for r in range(self.rows):
+                src = layer * size + r * self.cols
+                dst = layer * self.plane + (r + 1) * self.stride + 1
+                free[dst:dst + self.cols] = bytes(self.grid.data[src:src + self.cols]).translate(table)
+        return free
+
+    def _index(self, cell):
+        layer, r, c = cell
+        return layer * self.plane + (r + 1) * self.stride + c + 1
+
+    def _cell(self, index):
+        layer, rest = divmod(index, self.plane)
+        r, c = divmod(rest, self.stride)
+        return layer, r - 1, c - 1
+
+    def trace(self, start, finish):
+        """
+        :param start: (layer, row, col) клетки A
+        :param finish: (layer, row, col) клетки B
+        :return: путь – список клеток (layer, row, col) от A до B или None, если пути нет
+        """
+        for cell in (start, finish):
+            if not (0 <= cell[0] < self.layers and 0 <= cell[1] < self.rows and 0 <= cell[2] < self.cols):
+                raise ValueError(f"Клетка {cell} вне поля")
+        free = self.free
+        size = self.layers * self.plane
+        distance = array("i", [-1]) * size
+        labels = array("i", [_UNLABELLED]) * size
+        came = bytearray(size)
+        moves = self.layer_moves
+        plane = self.plane
+        width = max(cost for layer_moves in moves for _, _, cost in layer_moves) + 1
+
+        source = self._index(start)
+        target = self._index(finish)
+        distance[source] = 0
+        came[source] = 255
+        buckets = [[] for _ in range(width)]
+        buckets[0].append(source)
+        pending = 1
+        current = 0
+        label = 0
+        found = False
+        self.cells_expanded = 0
+
+        while pending and not found:
+            slot = current % width
+            cells = buckets[slot]
+            buckets[slot] = []
+            pending -= len(cells)
+            for index in cells:
+                if distance[index] != current or labels[index] != _UNLABELLED:
+                    continue
+                labels[index] = label
+                label += 1
+                self.cells_expanded += 1
+                if index == target:
+                    found = True
+                    break
+                for code, offset, cost in moves[index // plane]:
+                    n = index + offset
+                    if not free[n] or labels[n] != _UNLABELLED:
+                        continue
+                    total = current + cost
+                    if distance[n] < 0 or total < distance[n]:
+                        distance[n] = total
+                        came[n] = code
+                        buckets[total % width].append(n)
+                        pending += 1
+            current += 1
+
+        self.labels = labels
+        self.came = came
+        self.vias = 0
+        if not found:
+            self.path_cost = None
+            return None
+        self.path_cost = distance[target]
+        path = []
+        index = target
+        while index != source:
+            path.append(self._cell(index))
+            code = came[index]
+            if code >= len(self.directions):
+                self.vias += 1
+                index -= plane if code == len(self.directions) else -plane
+            else:
+                _, dr, dc = self.directions[code]
+                index -= dr * self.stride + dc
+        path.append(start)
+        path.reverse()
+        return path
+
+    def wave(self, layer):
+        """
+        Волна слоя после trace в виде Tracer: wave[r][c] = (label, direction) или None.
+        Клетки, куда пришли через via, получают направление VIA_UP или VIA_DOWN.
+        Годится для Board.draw.
+        """
+        if self.labels is None:
+            raise ValueError("Волна доступна только после trace")
+        wave = []
+        for r in range(self.rows):
+            base = layer * self.plane + (r + 1) * self.stride + 1
+            row = []
+            for index in range(base, base + self.cols):
+                label = self.labels[index]
+                if label == _UNLABELLED:
+                    row.append(None)
+                elif self.came[index] == 255:
+                    row.append((label, None))
+                else:
+                    row.append((label, self.moves[self.came[index]]))
+            wave.append(row)
+        return wave
+
+
+def layered_endpoints(layers):
+    """
+    Ищет A и B на всех слоях.
+
+    :param layers: список слоёв (2D-списки или Grid)
+    :return: (start, finish) – клетки (layer, row, col) или None
+    """
+    start = finish = None
+    for layer, grid in enumerate(layers):
+        if start is not None and finish is not None:
+            break
+        grid = grid if isinstance(grid, Grid) else Grid.from_rows(grid)
+        # Поиск байта в буфере слоя, как в find_endpoints.
+        if start is None:
+            cell = grid.find(START)
+            start = None if cell is None else (layer,) + cell
+        if finish is None:
+            cell = grid.find(FINISH)
+            finish = None if cell is None else (layer,) + cell
+    return start, finish
+
+
+def prepare_layered_grid(layers):
+    """
+    Собирает LayeredGrid для трассировки и освобождает клетки A и B
+    (как prepare_trace_grid для одного слоя).
+
+    :return: (grid, start, finish); grid – None, если A или B не заданы
+    """
+    start, finish = layered_endpoints(layers)
+    if start is None or finish is None:
+        return None, start, finish
+    grid = LayeredGrid.from_layers(layers)
+    grid[start] = FREE
+    grid[finish] = FREE
+    return grid, start, finish
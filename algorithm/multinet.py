@@ -0,0 +1,282 @@
+from array import array
+
+from algorithm.grid import FINISH, FREE, START, Grid
+from algorithm.kernel import FlatWaveKernel
+from algorithm.path import full_path
+from algorithm.tracer import Tracer
+
+# Значения клеток общей сетки занятости.
+PIN = 2
+ROUTED = 5
+
+
+class Net:
+    """
+    Цепь – пара выводов, которые нужно соединить.
+    """
+
+    def __init__(self, name, start, finish):
+        self.name = name
+        self.start = tuple(start)
+        self.finish = tuple(finish)
+
+    @classmethod
+    def from_dict(cls, data, index=0):
+        """Создаёт цепь из записи файла поля: {"name", "start": [r, c], "finish": [r, c]}."""
+        return cls(data.get("name", f"net{index}"), data["start"], data["finish"])
+
+    def to_dict(self):
+        return {"name": self.name, "start": list(self.start), "finish": list(self.finish)}
+
+    def manhattan(self):
+        return abs(self.start[0] - self.finish[0]) + abs(self.start[1] - self.finish[1])
+
+    def bbox_area(self):
+        return (abs(self.start[0] - self.finish[0]) + 1) * (abs(self.start[1] - self.finish[1]) + 1)
+
+    def __repr__(self):
+        return f"Net({self.name!r}, {self.start}, {self.finish})"
+
+
+# Стратегии порядка разводки: ключ сортировки цепей (сортировка устойчивая).
+ORDERINGS = {
+    "input": None,
+    "shortest": Net.manhattan,
+    "longest": lambda net: -net.manhattan(),
+    "bbox": Net.bbox_area,
+}
+
+
+class RoutingResult:
+    """
+    Итог многоцепной разводки: пути разведённых цепей и причины неудач.
+    """
+
+    def __init__(self):
+        self.routed = {}
+        self.failed = {}
+        self.ripups = 0
+        self.attempts = 0
+
+    def as_dict(self):
+        return {
+            "routed": len(self.routed),
+            "failed": len(self.failed),
+            "ripups": self.ripups,
+            "attempts": self.attempts,
+            "wirelength": sum(len(path) - 1 for path in self.routed.values()),
+            "failed_nets": dict(self.failed),
+        }
+
+    def summary(self):
+        total = len(self.routed) + len(self.failed)
+        text = f"Разведено {len(self.routed)}/{total}, перекладок: {self.ripups}"
+        if self.failed:
+            text += ", не разведены: " + ", ".join(str(name) for name in self.failed)
+        return text
+
+
+class MultiNetRouter:
+    """
+    Последовательная разводка множества цепей встречной волной с перекладкой
+    (rip-up and reroute).
+
+    Все цепи разводятся на одной изменяемой сетке занятости (Grid): выводы всех цепей
+    и уже проложенные пути являются препятствиями для следующих цепей. Копия поля
+    на каждую цепь не создаётся – для трассировки временно освобождаются только
+    выводы текущей цепи.
+
+    Движок "python" держит одно ядро волны (FlatWaveKernel) на всю разводку: проложенные
+    и снятые пути меняют в нём клетки, а путь восстанавливается по состояниям волн
+    без матриц (label, direction) на каждую цепь.
+    """
+
+    def __init__(self, grid, nets, direction_order=None, engine="python",
+                 ordering="shortest", max_ripups=3):
+        """
+        :param grid: поле (2D-список или Grid), ненулевые клетки – препятствия
+        :param nets: список Net
+        :param ordering: имя стратегии из ORDERINGS или функция-ключ net -> значение
+        :param max_ripups: сколько раз одну цепь можно переложить
+        """
+        self.grid = Grid.from_rows(grid)
+        self.nets = list(nets)
+        self.direction_order = direction_order
+        self.engine = engine
+        self.max_ripups = max_ripups
+        if callable(ordering):
+            self.order_key = ordering
+        elif ordering in ORDERINGS:
+            self.order_key = ORDERINGS[ordering]
+        else:
+            raise ValueError(f"Неизвестная стратегия порядка: {ordering}")
+
+        # Владелец каждой занятой путём клетки: индекс цепи или -1.
+        self.owner = array("i", [-1]) * (self.grid.rows * self.grid.cols)
+        self.paths = {}
+        # Ядро волны сетки занятости; строится в route после разметки выводов.
+        self.kernel = None
+        self.tracer = Tracer(self.grid, direction_order=direction_order, engine=engine)
+        self.pins = set()
+        for net in self.nets:
+            self.pins.add(net.start)
+            self.pins.add(net.finish)
+
+    def ordered_nets(self):
+        indexes = list(range(len(self.nets)))
+        if self.order_key is not None:
+            indexes.sort(key=lambda i: self.order_key(self.nets[i]))
+        return indexes
+
+    def route(self):
+        """
+        Разводит все цепи.
+
+        :return: RoutingResult
+        """
+        result = RoutingResult()
+        for r, c in self.pins:
+            if self.grid.get(r, c) in (FREE, START, FINISH):
+                self.grid.set(r, c, PIN)
+        if self.engine == "python":
+            self.kernel = FlatWaveKernel(self.grid, self.tracer.directions)
+
+        queue = []
+        for i in self.ordered_nets():
+            net = self.nets[i]
+            if self._pin_blocked(net):
+                result.failed[net.name] = "blocked_pin"
+            else:
+                queue.append(i)
+
+        ripped = [0] * len(self.nets)
+        for i in queue:
+            net = self.nets[i]
+            result.attempts += 1
+            path = self._trace(net)
+            if path is not None:
+                self._commit(i, path)
+                continue
+
+            # Ищем путь без учёта чужих трасс и перекладываем мешающие цепи.
+            relaxed_path = self._trace_relaxed(net)
+            if relaxed_path is None:
+                result.failed[net.name] = "unreachable"
+                continue
+            blockers = sorted(self._owners(relaxed_path))
+            if any(ripped[j] >= self.max_ripups for j in blockers) or not self._reroute(i, relaxed_path, blockers, result):
+                result.failed[net.name] = "congested"
+                continue
+            for j in blockers:
+                ripped[j] += 1
+
+        for i, path in self.paths.items():
+            result.routed[self.nets[i].name] = path
+        for i, net in enumerate(self.nets):
+            if i not in self.paths and net.name not in result.failed:
+                result.failed[net.name] = "congested"
+        return result
+
+    def _reroute(self, i, path, blockers, result):
+        """
+        Перекладка: снимает мешающие цепи, прокладывает цепь i по path и заново
+        разводит снятые цепи. Если хотя бы одну из них развести не удалось,
+        все изменения откатываются, так что число разведённых цепей не уменьшается.
+        """
+        saved = {j: self.paths[j] for j in blockers}
+        for j in blockers:
+            self._rip_up(j)
+        self._commit(i, path)
+        rerouted = []
+        for j in blockers:
+            result.attempts += 1
+            new_path = self._trace(self.nets[j])
+            if new_path is None:
+                for k in rerouted + [i]:
+                    self._rip_up(k)
+                for k, old_path in saved.items():
+                    self._commit(k, old_path)
+                return False
+            self._commit(j, new_path)
+            rerouted.append(j)
+        result.ripups += len(blockers)
+        return True
+
+    def _pin_blocked(self, net):
+        return any(self.grid.get(r, c) != PIN for r, c in (net.start, net.finish))
+
+    def _trace(self, net, grid=None):
+        """
+        Путь цепи по сетке занятости (или по grid для движка "numpy") либо None.
+        """
+        if net.start == net.finish:
+            return [net.start]
+        if self.kernel is None:
+            return self._trace_grid(net, self.grid if grid is None else grid)
+        kernel = self.kernel
+        for pin in (net.start, net.finish):
+            kernel.set_free(pin, True)
+        try:
+            wave_s, wave_f, meeting = self.tracer.flat_trace(kernel, net.start, net.finish)
+        finally:
+            for pin in (net.start, net.finish):
+                kernel.set_free(pin, False)
+        if meeting is None:
+            return None
+        path_f = wave_f.trace_back(meeting)
+        path_f.reverse()
+        return wave_s.trace_back(meeting) + path_f[1:]
+
+    def _trace_grid(self, net, grid):
+        for r, c in (net.start, net.finish):
+            grid.set(r, c, FREE)
+        try:
+            tracer = Tracer(grid, direction_order=self.direction_order, engine=self.engine)
+            wave_s, wave_f, meeting = tracer.bidirectional_trace(net.start, net.finish)
+        finally:
+            for r, c in (net.start, net.finish):
+                grid.set(r, c, PIN)
+        if meeting is None:
+            return None
+        return full_path(wave_s, wave_f, net.start, net.finish, meeting)
+
+    def _trace_relaxed(self, net):
+        """
+        Путь цепи без учёта чужих трасс: проложенные пути временно освобождаются.
+        """
+        if self.kernel is None:
+            relaxed = self.grid.copy()
+            relaxed.replace(ROUTED, FREE)
+            return self._trace(net, relaxed)
+        routed = [cell for path in self.paths.values() for cell in path if cell not in self.pins]
+        for cell in routed:
+            self.kernel.set_free(cell, True)
+        try:
+            return self._trace(net)
+        finally:
+            for cell in routed:
+                self.kernel.set_free(cell, False)
+
+    def _owners(self, path):
+        cols = self.grid.cols
+        return {self.owner[r * cols + c] for r, c in path if self.owner[r * cols + c] >= 0}
+
+    def _commit(self, i, path):
+        cols = self.grid.cols
+        for r, c in path:
+            if (r, c) in self.pins:
+                continue
+            self.grid.set(r, c, ROUTED)
+            self.owner[r * cols + c] = i
+            if self.kernel is not None:
+                self.kernel.set_free((r, c), False)
+        self.paths[i] = path
+
+    def _rip_up(self, i):
+        cols = self.grid.cols
+        for r, c in self.paths.pop(i):
+            if self.owner[r * cols + c] == i:
+                self.grid.set(r, c, FREE)
+                self.owner[r * cols + c] = -1
+                if self.kernel is not None:
+                    self.kernel.set_free((r, c), True)
@@ -0,0 +1,218 @@
+import numpy as np
+
+from algorithm.grid import Grid
+
+# Коды направлений в массиве directions: 0 – нет направления (исходная клетка).
+DIRECTION_CODES = {"U": 1, "R": 2, "D": 3, "L": 4}
+DIRECTION_NAMES = {code: name for name, code in DIRECTION_CODES.items()}
+# Шаг назад по коду направления: U->(r+1), R->(c-1), D->(r-1), L->(c+1).
+_BACK_MOVES = {1: (1, 0), 2: (0, -1), 3: (-1, 0), 4: (0, 1)}
+
+
+class WaveView:
+    """
+    Представление волны поверх массивов labels/directions, совместимое
+    со списочной волной: wave[r][c] возвращает (label, direction) или None.
+    Кортежи создаются только при обращении к клетке.
+    """
+
+    def __init__(self, labels, directions):
+        self.labels = labels
+        self.directions = directions
+        self.rows, self.cols = labels.shape
+
+    def __len__(self):
+        return self.rows
+
+    def __bool__(self):
+        return True
+
+    def __getitem__(self, r):
+        return _WaveRow(self.labels[r], self.directions[r])
+
+    def cell(self, r, c):
+        label = int(self.labels[r, c])
+        if label < 0:
+            return None
+        return label, DIRECTION_NAMES.get(int(self.directions[r, c]))
+
+    def trace_back(self, origin, meeting):
+        """
+        Восстановление пути по массивам без создания промежуточных кортежей
+        (используется из Tracer.reconstruct_path).
+        """
+        path = []
+        r, c = meeting
+        while (r, c) != origin:
+            path.append((r, c))
+            if self.labels[r, c] < 0:
+                break
+            move = _BACK_MOVES.get(int(self.directions[r, c]))
+            if move is None:
+                break
+            r += move[0]
+            c += move[1]
+        path.append(origin)
+        path.reverse()
+        return path
+
+    def to_lists(self):
+        """Материализует волну в виде списка списков (label, direction)."""
+        return [[self.cell(r, c) for c in range(self.cols)] for r in range(self.rows)]
+
+
+class _WaveRow:
+    def __init__(self, labels, directions):
+        self.labels = labels
+        self.directions = directions
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, c):
+        label = int(self.labels[c])
+        if label < 0:
+            return None
+        return label, DIRECTION_NAMES.get(int(self.directions[c]))
+
+
+class NumpyWaveEngine:
+    """
+    Векторизованная встречная волна на NumPy.
+    Поле хранится как uint8 с рамкой из препятствий, метки – int32 (-1 – не помечена),
+    направления – uint8. Фронт расширяется целиком за одну операцию, при этом
+    порядок нумерации совпадает с поклеточным BFS из Tracer.
+    """
+
+    def __init__(self, grid, directions):
+        """
+        :param grid: Grid, 2D-список или массив (0 – свободно, иначе препятствие)
+        :param directions: порядок просмотра соседей [(name, dr, dc), ...]
+        """
+        if isinstance(grid, Grid):
+            cells = np.frombuffer(grid.data, dtype=np.uint8).reshape(grid.rows, grid.cols)
+        else:
+            cells = np.asarray(grid, dtype=np.uint8)
+        self.rows, self.cols = cells.shape
+        self.width = self.cols + 2
+
+        # Рамка из препятствий избавляет от проверок границ.
+        padded = np.ones((self.rows + 2, self.width), dtype=np.uint8)
+        padded[1:-1, 1:-1] = cells
+        self.free = (padded == 0).ravel()
+        # Рамка отдельно от препятствий – только для подсчёта отказов в статистике.
+        border = np.ones_like(padded, dtype=bool)
+        border[1:-1, 1:-1] = False
+        self.border = border.ravel()
+
+        self.offsets = np.array([dr * self.width + dc for _, dr, dc in directions], dtype=np.int64)
+        self.codes = np.array([DIRECTION_CODES[name] for name, _, _ in directions], dtype=np.uint8)
+        self.cells_expanded = 0
+
+    def _index(self, cell):
+        r, c = cell
+        return (r + 1) * self.width + (c + 1)
+
+    def _new_wave(self, origin):
+        labels = np.full(self.free.shape, -1, dtype=np.int32)
+        directions = np.zeros(self.free.shape, dtype=np.uint8)
+        idx = self._index(origin)
+        labels[idx] = 0
+        return labels, directions, np.array([idx], dtype=np.int64)
+
+    def expand(self, frontier, labels, directions, counter, rejected=None):
+        """
+        Расширяет фронт на один уровень.
+        Кандидаты перебираются в порядке (клетка фронта, направление), и каждая новая
+        клетка получает метку по первому вхождению – как в последовательном BFS.
+
+        :param rejected: словарь отказов TraceStats.rejected или None; повторный кандидат
+                         того же уровня считается уже помеченным, как в Tracer
+        :return: (новый фронт, новое значение счётчика меток)
+        """
+        if frontier.size == 0:
+            return frontier, counter
+        candidates = (frontier[:, None] + self.offsets[None, :]).ravel()
+        codes = np.broadcast_to(self.codes, (frontier.size, self.codes.size)).ravel()
+        free = self.free[candidates]
+        mask = free & (labels[candidates] < 0)
+        if rejected is not None:
+            on_border = int(np.count_nonzero(self.border[candidates]))
+            rejected["bounds"] += on_border
+            rejected["obstacle"] += candidates.size - int(np.count_nonzero(free)) - on_border
+            rejected["visited"] += int(np.count_nonzero(free)) - int(np.count_nonzero(mask))
+        candidates = candidates[mask]
+        codes = codes[mask]
+        if candidates.size == 0:
+            return candidates, counter
+        _, first = np.unique(candidates, return_index=True)
+        first.sort()
+        new_cells = candidates[first]
+        if rejected is not None:
+            rejected["visited"] += candidates.size - new_cells.size
+        labels[new_cells] = np.arange(counter, counter + new_cells.size, dtype=np.int32)
+        directions[new_cells] = codes[first]
+        return new_cells, counter + new_cells.size
+
+    def _meeting(self, new_s, new_f, labels_s, labels_f, stats=None):
+        hits = np.concatenate((new_s[labels_f[new_s] >= 0], new_f[labels_s[new_f] >= 0]))
+        if stats is not None:
+            stats.intersection_checks += new_s.size + new_f.size
+            stats.intersections += hits.size
+        if hits.size == 0:
+            return None
+        sums = labels_s[hits].astype(np.int64) + labels_f[hits]
+        idx = int(hits[np.argmin(sums)])
+        return idx // self.width - 1, idx % self.width - 1
+
+    def _view(self, labels, directions):
+        shape = (self.rows + 2, self.width)
+        return WaveView(labels.reshape(shape)[1:-1, 1:-1], directions.reshape(shape)[1:-1, 1:-1])
+
+    def bidirectional_trace(self, start, finish, stats=None):
+        """
+        Аналог Tracer.bidirectional_trace.
+
+        :param stats: TraceStats (algorithm.stats) или None; матрицы волн здесь ленивые
+                      (WaveView), поэтому фаза "fill" не замеряется
+        :return: (wave_start, wave_finish, meeting_point), где волны – WaveView
+        """
+        if stats is None:
+            return self._trace(start, finish)
+        stats.runs += 1
+        stats.begin()
+        return self._trace(start, finish, stats)
+
+    def _trace(self, start, finish, stats=None):
+        labels_s, dirs_s, q_start = self._new_wave(start)
+        labels_f, dirs_f, q_finish = self._new_wave(finish)
+        counter_s = counter_f = 1
+        rejected = None
+        if stats is not None:
+            rejected = stats.rejected
+            stats.labelled_start += 1
+            stats.labelled_finish += 1
+            stats.lap("setup")
+
+        meeting = None
+        while q_start.size and q_finish.size:
+            if stats is not None:
+                stats.add_level(q_start.size, q_finish.size)
+                stats.expanded_start += q_start.size
+                stats.expanded_finish += q_finish.size
+            q_start, counter_s = self.expand(q_start, labels_s, dirs_s, counter_s, rejected)
+            if stats is not None:
+                stats.lap("expand_start")
+            q_finish, counter_f = self.expand(q_finish, labels_f, dirs_f, counter_f, rejected)
+            if stats is not None:
+                stats.lap("expand_finish")
+            meeting = self._meeting(q_start, q_finish, labels_s, labels_f, stats)
+            if stats is not None:
+                stats.labelled_start += q_start.size
+                stats.labelled_finish += q_finish.size
+                stats.lap("intersect")
+            if meeting is not None:
+                break
+
+        self.cells_expanded = counter_s + counter_f
+        return self._view(labels_s, dirs_s), self._view(labels_f, dirs_f), meeting
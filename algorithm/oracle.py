@@ -0,0 +1,208 @@
+"""
+Оракул расстояний по ориентирам (ALT: A*, Landmarks, Triangle inequality).
+
+Для поля один раз считаются BFS-расстояния от нескольких клеток-ориентиров.
+По неравенству треугольника |d(L, a) - d(L, b)| <= d(a, b) для любого ориентира L,
+поэтому максимум по ориентирам – нижняя оценка расстояния, доступная сразу, и
+согласованная эвристика для A*: повторные запросы «точка – точка» на том же поле
+раскрывают почти только клетки вдоль кратчайшего пути.
+
+Ориентиры покрывают не все компоненты поля, поэтому «нет пути» оракул узнаёт
+по индексу связности (algorithm.connectivity), а не по ориентирам.
+
+Оракул привязан к состоянию поля: после правки клеток его нужно построить заново.
+"""
+import heapq
+from array import array
+from collections import deque
+
+from algorithm.connectivity import ConnectivityIndex
+from algorithm.grid import Grid
+from algorithm.tracer import DEFAULT_DIRECTIONS
+
+UNREACHED = -1
+_ORTHOGONAL_MOVES = {(-1, 0), (0, 1), (1, 0), (0, -1)}
+
+
+class LandmarkOracle:
+    """
+    Предвычисленные расстояния от ориентиров и запросы кратчайшего пути по ним.
+    """
+
+    def __init__(self, grid, landmarks=8, direction_order=None, connectivity=None):
+        """
+        :param grid: Grid или 2D-список (0 – свободно, остальное – препятствие; A и B уже свободны)
+        :param landmarks: число ориентиров; выбираются «дальней точкой»: каждый следующий –
+                          клетка, наиболее удалённая от уже выбранных (пока ориентиры видят
+                          меньше половины свободных клеток – клетка ещё не достигнутой компоненты)
+        :param direction_order: порядок просмотра соседей [(name, dr, dc), ...]
+        :param connectivity: ConnectivityIndex этого поля с теми же ходами;
+                             по умолчанию строится заново
+        """
+        if landmarks < 1:
+            raise ValueError(f"Нужен хотя бы один ориентир, получено {landmarks}")
+        grid = grid if isinstance(grid, Grid) else Grid.from_rows(grid)
+        self.rows = grid.rows
+        self.cols = grid.cols
+        self.free = bytes(grid.data).translate(bytes.maketrans(bytes(range(256)), b"\x01" + b"\x00" * 255))
+        self.directions = list(direction_order or DEFAULT_DIRECTIONS)
+        self.connectivity = connectivity or ConnectivityIndex(grid, direction_order=self.directions)
+        self.landmarks = []
+        self.distances = []
+        self.cells_expanded = 0
+        self._choose_landmarks(landmarks)
+
+    def _neighbours(self, index):
+        r, c = divmod(index, self.cols)
+        for dname, dr, dc in self.directions:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < self.rows and 0 <= nc < self.cols:
+                n = nr * self.cols + nc
+                if self.free[n]:
+                    yield n
+
+    def _bfs(self, source):
+        distance = array("i", [UNREACHED]) * (self.rows * self.cols)
+        distance[source] = 0
+        queue = deque([source])
+        while queue:
+            index = queue.popleft()
+            step = distance[index] + 1
+            for n in self._neighbours(index):
+                if distance[n] == UNREACHED:
+                    distance[n] = step
+                    queue.append(n)
+        return distance
+
+    def _choose_landmarks(self, count):
+        first = self.free.find(1)
+        if first < 0:
+            return
+        total = self.free.count(1)
+        covered = 0
+        # Удалённость каждой клетки от ближайшего выбранного ориентира (-1 – пока не достигнута).
+        nearest = array("i", [UNREACHED]) * (self.rows * self.cols)
+        candidate = first
+        while candidate is not None and len(self.landmarks) < count:
+            distance = self._bfs(candidate)
+            self.landmarks.append(divmod(candidate, self.cols))
+            self.distances.append(distance)
+            for index, d in enumerate(distance):
+                if d == UNREACHED:
+                    continue
+                if nearest[index] == UNREACHED:
+                    covered += 1
+                    nearest[index] = d
+                elif d < nearest[index]:
+                    nearest[index] = d
+            # Пока ориентиры видят меньше половины поля, следующий ставится в недостигнутую
+            # компоненту; дальше – в самую удалённую клетку, мелкие карманы ориентир не тратят.
+            if covered * 2 < total:
+                candidate = next(index for index in range(len(nearest))
+                                 if self.free[index] and nearest[index] == UNREACHED)
+                continue
+            candidate = None
+            best = 0
+            for index, d in enumerate(nearest):
+                if d > best:
+                    best = d
+                    candidate = index
+
+    def _bound(self, a, b):
+        """
+        Нижняя оценка расстояния между свободными клетками с индексами a и b или None,
+        если клетки в разных компонентах. Если ни один ориентир не лежит в их
+        компоненте, оценка – 0.
+        """
+        if not self.connectivity.connected(divmod(a, self.cols), divmod(b, self.cols)):
+            return None
+        bound = 0
+        for distance in self.distances:
+            da = distance[a]
+            if da != UNREACHED and abs(da - distance[b]) > bound:
+                bound = abs(da - distance[b])
+        return bound
+
+    def lower_bound(self, a, b):
+        """
+        Нижняя оценка длины пути (в шагах) из a в b без поиска.
+
+        :return: число или None, если b недостижима из a (клетка занята или в другой компоненте)
+        """
+        ia = a[0] * self.cols + a[1]
+        ib = b[0] * self.cols + b[1]
+        if not (self.free[ia] and self.free[ib]):
+            return None
+        return self._bound(ia, ib)
+
+    def path(self, a, b):
+        """
+        Кратчайший путь A* с эвристикой по ориентирам.
+
+        :return: список клеток от a до b включительно или None, если пути нет
+        """
+        ia = a[0] * self.cols + a[1]
+        ib = b[0] * self.cols + b[1]
+        self.cells_expanded = 0
+        if not (self.free[ia] and self.free[ib]) or self._bound(ia, ib) is None:
+            return None
+        # Расстояния ориентиров до цели для эвристики считаются один раз на запрос.
+        targets = [(distance, distance[ib]) for distance in self.distances if distance[ib] != UNREACHED]
+        br, bc = b
+        cols = self.cols
+        # Геометрическая оценка: манхэттенская для четырёх ортогональных ходов, иначе
+        # расстояние Чебышёва, делённое (с округлением вверх) на самый длинный ход.
+        moves = {(dr, dc) for _, dr, dc in self.directions}
+        orthogonal = moves <= _ORTHOGONAL_MOVES
+        reach = max(max(abs(dr), abs(dc)) for dr, dc in moves)
+
+        def heuristic(index):
+            # Обе геометрические оценки – тоже нижние; максимум оценок остаётся согласованным.
+            r, c = divmod(index, cols)
+            if orthogonal:
+                h = abs(r - br) + abs(c - bc)
+            else:
+                h = -(-max(abs(r - br), abs(c - bc)) // reach)
+            for distance, to_target in targets:
+                d = abs(distance[index] - to_target)
+                if d > h:
+                    h = d
+            return h
+
+        g = {ia: 0}
+        parent = {ia: None}
+        closed = set()
+        heap = [(heuristic(ia), 0, ia)]
+        while heap:
+            _, _, index = heapq.heappop(heap)
+            if index in closed:
+                continue
+            closed.add(index)
+            self.cells_expanded += 1
+            if index == ib:
+                break
+            new_g = g[index] + 1
+            for n in self._neighbours(index):
+                if n not in closed and new_g < g.get(n, new_g + 1):
+                    g[n] = new_g
+                    parent[n] = index
+                    h = heuristic(n)
+                    # При равных f раньше раскрываются клетки ближе к цели.
+                    heapq.heappush(heap, (new_g + h, h, n))
+        if ib not in closed:
+            return None
+
+        path = []
+        index = ib
+        while index is not None:
+            path.append(divmod(index, self.cols))
+            index = parent[index]
+        path.reverse()
+        return path
+
+    def distance(self, a, b):
+        """
+        :return: длина кратчайшего пути из a в b в шагах или None, если пути нет
+        """
+        path = self.path(a, b)
+        return None if path is None else len(path) - 1
@@ -0,0 +1,58 @@
+ARROWS = {(-1, 0): "↑", (1, 0): "↓", (0, 1): "→", (0, -1): "←"}
+
+
+def reconstruct_path(wave, origin, meeting):
+    """
+    Восстанавливает путь в матрице wave (label, direction),
+    двигаясь назад по direction: U->(r+1), R->(c-1), D->(r-1), L->(c+1).
+    Для волн движка "numpy" путь восстанавливается прямо по массивам.
+    """
+    if hasattr(wave, "trace_back"):
+        return wave.trace_back(origin, meeting)
+    path = []
+    r, c = meeting
+    while (r, c) != origin:
+        path.append((r, c))
+        data = wave[r][c]
+        if data is None:
+            break
+        _, direction = data
+        if direction is None:
+            break
+        if direction == "U":
+            r += 1
+        elif direction == "D":
+            r -= 1
+        elif direction == "L":
+            c += 1
+        elif direction == "R":
+            c -= 1
+    path.append(origin)
+    path.reverse()
+    return path
+
+
+def full_path(wave_start, wave_finish, start, finish, meeting):
+    """
+    Склеивает путь A -> meeting -> B из двух волн.
+
+    :return: список клеток от A до B включительно
+    """
+    path_s = reconstruct_path(wave_start, start, meeting)
+    path_f = reconstruct_path(wave_finish, finish, meeting)
+    path_f.reverse()
+    return path_s + path_f[1:]
+
+
+def path_arrows(path):
+    """
+    Стрелки направления движения для клеток пути (кроме первой).
+
+    :return: словарь {(r, c): стрелка}
+    """
+    arrows = {}
+    for i in range(1, len(path)):
+        r1, c1 = path[i - 1]
+        r2, c2 = path[i]
+        arrows[path[i]] = ARROWS.get((r2 - r1, c2 - c1), "")
+    return arrows
@@ -0,0 +1,374 @@
+"""
+Запись и воспроизведение пошаговой трассировки (.wtr).
+
+Файл хранит дельты step_by_step_trace(deltas=True): для каждой итерации и каждой
+стороны – число новых клеток и сами клетки. Номера волн не пишутся: внутри
+стороны они идут подряд. Клетка – varint от zigzag(разность плоских индексов
+с предыдущей клеткой шага) * (число направлений + 1) + код направления, поэтому
+соседние клетки фронта занимают по байту. Код 0 – исходная клетка, код k – k-е
+направление трассировщика; имена направлений хранятся в индексе. Итерации собираются в куски, каждый кусок сжат zlib.
+
+Раз в KEYFRAME_FRACTION поля помеченных клеток после конца куска пишется ключевой
+кадр – полные волны (int32-номера и коды направлений, zlib). Индекс в конце файла
+перечисляет куски и ключевые кадры с номерами их первых итераций: переход к любой
+итерации – бинарный поиск ключевого кадра и куска (O(log n)) и проигрывание дельт
+не дальше следующего кадра. Соседние итерации проигрываются дельтами вперёд
+и назад без ключевых кадров.
+
+Файл:
+    заголовок (28 байт, little-endian): b"WTRC", версия (uint16), резерв (uint16),
+        rows (uint32), cols (uint32), число итераций (uint32), смещение индекса (uint64);
+    поле (zlib, коды Grid), куски и ключевые кадры;
+    индекс – JSON (zlib): {"grid": [offset, length], "chunks": [...], "keyframes": [...],
+        "meeting": [r, c] или null, "directions": [имя, ...]}; элементы chunks и keyframes –
+        [первая итерация, offset, length, помечено клеток старта, финиша].
+        Без "directions" (ранние записи) направления – U, R, D, L.
+"""
+import bisect
+import json
+import struct
+import sys
+import zlib
+from array import array
+
+from algorithm.grid import Grid
+from algorithm.tracer import DEFAULT_DIRECTIONS, Tracer
+
+MAGIC = b"WTRC"
+VERSION = 1
+# Кусок закрывается после CHUNK_ITERATIONS итераций или CHUNK_BYTES байт дельт.
+CHUNK_ITERATIONS = 256
+CHUNK_BYTES = 1 << 16
+# Ключевой кадр – после каждых rows * cols // KEYFRAME_FRACTION помеченных клеток.
+KEYFRAME_FRACTION = 8
+MIN_KEYFRAME_CELLS = 4096
+
+_HEADER = struct.Struct("<4sHHIIIQ")
+_DEFAULT_NAMES = [name for name, _, _ in DEFAULT_DIRECTIONS]
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _encode_cells(out, cells, cols, codes):
+    radix = len(codes)
+    _write_varint(out, len(cells))
+    previous = 0
+    for r, c, _, direction in cells:
+        index = r * cols + c
+        delta = index - previous
+        zigzag = delta << 1 if delta >= 0 else ((-delta) << 1) - 1
+        _write_varint(out, zigzag * radix + codes[direction])
+        previous = index
+
+
+def _decode_cells(data, pos, radix):
+    count, pos = _read_varint(data, pos)
+    cells = []
+    index = 0
+    for _ in range(count):
+        value, pos = _read_varint(data, pos)
+        zigzag, code = divmod(value, radix)
+        index += zigzag >> 1 if not zigzag & 1 else -((zigzag + 1) >> 1)
+        cells.append((index, code))
+    return cells, pos
+
+
+def _int32_bytes(values):
+    values = array("i", values)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def _int32_array(data):
+    values = array("i")
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class TraceRecorder:
+    """
+    Потоковая запись дельт трассировки в .wtr.
+    """
+
+    def __init__(self, f, grid, direction_order=None):
+        """
+        :param f: файл, открытый на запись в двоичном режиме (с поддержкой seek)
+        :param grid: поле трассировки (Grid или 2D-список) – сохраняется для показа при воспроизведении
+        :param direction_order: направления трассировщика [(name, dr, dc), ...]; в дельтах
+                                допустимы только их имена
+        :raises ValueError: имена направлений повторяются
+        """
+        self.direction_names = [name for name, _, _ in direction_order or DEFAULT_DIRECTIONS]
+        if len(set(self.direction_names)) != len(self.direction_names):
+            raise ValueError(f"Имена направлений повторяются: {self.direction_names}")
+        self.codes = {name: code for code, name in enumerate([None] + self.direction_names)}
+        grid = grid if isinstance(grid, Grid) else Grid.from_rows(grid)
+        self.f = f
+        self.rows = grid.rows
+        self.cols = grid.cols
+        self.iterations = 0
+        self.meeting = None
+        size = self.rows * self.cols
+        # Текущие волны для ключевых кадров: номера (-1 – нет) и коды направлений по сторонам.
+        self.labels = [array("i", [-1]) * size, array("i", [-1]) * size]
+        self.directions = [bytearray(size), bytearray(size)]
+        self.counts = [0, 0]
+        self.keyframe_cells = max(size // KEYFRAME_FRACTION, MIN_KEYFRAME_CELLS)
+        self._since_keyframe = 0
+        self.chunks = []
+        self.keyframes = []
+        self._chunk = bytearray()
+        self._chunk_start = 1
+        self._chunk_counts = (0, 0)
+        self._chunk_steps = 0
+
+        f.write(bytes(_HEADER.size))
+        self.grid_entry = self._write_blob(bytes(grid.data))
+
+    def _write_blob(self, payload):
+        offset = self.f.tell()
+        data = zlib.compress(payload, 6)
+        self.f.write(data)
+        return [offset, len(data)]
+
+    def add_step(self, new_start, new_finish, meeting=None):
+        """
+        Дописывает итерацию: клетки (r, c, label, direction) обеих сторон, как их выдаёт
+        step_by_step_trace(deltas=True), и точку встречи (или None).
+        """
+        self.iterations += 1
+        for side, cells in enumerate((new_start, new_finish)):
+            labels = self.labels[side]
+            directions = self.directions[side]
+            for r, c, label, direction in cells:
+                index = r * self.cols + c
+                labels[index] = label
+                directions[index] = self.codes[direction]
+            self.counts[side] += len(cells)
+            self._since_keyframe += len(cells)
+            _encode_cells(self._chunk, cells, self.cols, self.codes)
+        _write_varint(self._chunk, 0 if meeting is None else meeting[0] * self.cols + meeting[1] + 1)
+        if meeting is not None:
+            self.meeting = tuple(meeting)
+        self._chunk_steps += 1
+        if self._chunk_steps >= CHUNK_ITERATIONS or len(self._chunk) >= CHUNK_BYTES:
+            self._flush_chunk()
+
+    def _flush_chunk(self):
+        if not self._chunk_steps:
+            return
+        self.chunks.append([self._chunk_start] + self._write_blob(bytes(self._chunk)) + list(self._chunk_counts))
+        self._chunk = bytearray()
+        self._chunk_steps = 0
+        self._chunk_start = self.iterations + 1
+        self._chunk_counts = tuple(self.counts)
+        if self._since_keyframe >= self.keyframe_cells:
+            payload = b"".join(_int32_bytes(self.labels[side]) + bytes(self.directions[side]) for side in (0, 1))
+            self.keyframes.append([self._chunk_start] + self._write_blob(payload) + list(self.counts))
+            self._since_keyframe = 0
+
+    def finish(self):
+        """Закрывает последний кусок, пишет индекс и заголовок."""
+        self._flush_chunk()
+        index = {
+            "grid": self.grid_entry,
+            "chunks": self.chunks,
+            "keyframes": self.keyframes,
+            "meeting": self.meeting,
+            "directions": self.direction_names,
+        }
+        offset = self.f.tell()
+        self.f.write(zlib.compress(json.dumps(index).encode("utf-8")))
+        end = self.f.tell()
+        self.f.seek(0)
+        self.f.write(_HEADER.pack(MAGIC, VERSION, 0, self.rows, self.cols, self.iterations, offset))
+        self.f.seek(end)
+
+
+def record_trace(filename, grid, start, finish, direction_order=None):
+    """
+    Выполняет пошаговую трассировку и записывает её в .wtr.
+
+    :param grid: поле трассировки (A и B уже свободны)
+    :return: (число итераций, точка встречи или None)
+    """
+    tracer = Tracer(grid, direction_order=direction_order)
+    with open(filename, "wb") as f:
+        recorder = TraceRecorder(f, grid, tracer.directions)
+        for _, new_start, new_finish, meeting in tracer.step_by_step_trace(start, finish, deltas=True):
+            recorder.add_step(new_start, new_finish, meeting)
+        recorder.finish()
+    return recorder.iterations, recorder.meeting
+
+
+class Replay:
+    """
+    Воспроизведение .wtr: волны wave_start/wave_finish (2D-списки (label, direction),
+    как у Tracer) на итерации self.iteration; 0 – до первого шага.
+    """
+
+    # Дальше стольких итераций от текущей переход идёт через ключевой кадр.
+    SCRUB_LIMIT = CHUNK_ITERATIONS
+
+    def __init__(self, filename):
+        """
+        :raises ValueError: не файл .wtr или неподдерживаемая версия
+        """
+        self.f = open(filename, "rb")
+        raw = self.f.read(_HEADER.size)
+        if len(raw) < _HEADER.size:
+            self.f.close()
+            raise ValueError("Файл слишком короткий для заголовка .wtr")
+        magic, version, _, rows, cols, iterations, offset = _HEADER.unpack(raw)
+        if magic != MAGIC:
+            self.f.close()
+            raise ValueError("Неверная сигнатура файла .wtr")
+        if version > VERSION:
+            self.f.close()
+            raise ValueError(f"Неподдерживаемая версия .wtr: {version}")
+        self.rows = rows
+        self.cols = cols
+        self.iterations = iterations
+        self.f.seek(offset)
+        index = json.loads(zlib.decompress(self.f.read()).decode("utf-8"))
+        self.chunks = index["chunks"]
+        self.keyframes = index["keyframes"]
+        self.meeting = tuple(index["meeting"]) if index["meeting"] is not None else None
+        # Имя направления по коду; код 0 – исходная клетка.
+        self.direction_names = [None] + index.get("directions", _DEFAULT_NAMES)
+        self._chunk_starts = [chunk[0] for chunk in self.chunks]
+        self._keyframe_starts = [keyframe[0] for keyframe in self.keyframes]
+        self.grid = Grid(rows, cols, bytearray(self._read_blob(index["grid"])))
+
+        self.wave_start = [[None for _ in range(cols)] for _ in range(rows)]
+        self.wave_finish = [[None for _ in range(cols)] for _ in range(rows)]
+        self.iteration = 0
+        self.counts = [0, 0]
+        self._cached_chunk = None
+
+    def close(self):
+        self.f.close()
+
+    def _read_blob(self, entry):
+        offset, length = entry[0], entry[1]
+        self.f.seek(offset)
+        return zlib.decompress(self.f.read(length))
+
+    def _chunk_steps(self, number):
+        """Декодированные итерации куска number (последний кусок кэшируется)."""
+        if self._cached_chunk is not None and self._cached_chunk[0] == number:
+            return self._cached_chunk[1]
+        data = self._read_blob(self.chunks[number][1:3])
+        steps = []
+        pos = 0
+        while pos < len(data):
+            start_cells, pos = _decode_cells(data, pos, len(self.direction_names))
+            finish_cells, pos = _decode_cells(data, pos, len(self.direction_names))
+            meeting, pos = _read_varint(data, pos)
+            steps.append((start_cells, finish_cells, meeting))
+        self._cached_chunk = (number, steps)
+        return steps
+
+    def _step(self, iteration):
+        number = bisect.bisect_right(self._chunk_starts, iteration) - 1
+        return self._chunk_steps(number)[iteration - self.chunks[number][0]]
+
+    def _forward(self, changed):
+        self.iteration += 1
+        for side, (wave, cells) in enumerate(zip((self.wave_start, self.wave_finish), self._step(self.iteration)[:2])):
+            label = self.counts[side]
+            for index, code in cells:
+                r, c = divmod(index, self.cols)
+                wave[r][c] = (label, self.direction_names[code])
+                label += 1
+                if changed is not None:
+                    changed.add((r, c))
+            self.counts[side] = label
+
+    def _backward(self, changed):
+        for side, (wave, cells) in enumerate(zip((self.wave_start, self.wave_finish), self._step(self.iteration)[:2])):
+            for index, _ in cells:
+                r, c = divmod(index, self.cols)
+                wave[r][c] = None
+                changed.add((r, c))
+            self.counts[side] -= len(cells)
+        self.iteration -= 1
+
+    def _load_keyframe(self, number):
+        """Волны ключевого кадра number или пустые волны (number < 0)."""
+        if number < 0:
+            for wave in (self.wave_start, self.wave_finish):
+                for row in wave:
+                    row[:] = [None] * self.cols
+            self.iteration = 0
+            self.counts = [0, 0]
+            return
+        first, offset, length, count_s, count_f = self.keyframes[number]
+        payload = self._read_blob((offset, length))
+        size = self.rows * self.cols
+        cols = self.cols
+        names = self.direction_names
+        for side, wave in enumerate((self.wave_start, self.wave_finish)):
+            base = side * 5 * size
+            labels = _int32_array(payload[base:base + 4 * size])
+            directions = payload[base + 4 * size:base + 5 * size]
+            for r in range(self.rows):
+                start = r * cols
+                wave[r][:] = [(label, names[code]) if label >= 0 else None
+                              for label, code in zip(labels[start:start + cols], directions[start:start + cols])]
+        self.iteration = first - 1
+        self.counts = [count_s, count_f]
+
+    def seek(self, iteration):
+        """
+        Переходит к итерации iteration (0..self.iterations).
+
+        :return: множество изменившихся клеток (r, c) или None, если волны
+                 перестроены целиком (переход через ключевой кадр)
+        """
+        iteration = min(max(iteration, 0), self.iterations)
+        changed = set()
+        if abs(iteration - self.iteration) <= self.SCRUB_LIMIT:
+            while self.iteration < iteration:
+                self._forward(changed)
+            while self.iteration > iteration:
+                self._backward(changed)
+            return changed
+        keyframe = bisect.bisect_right(self._keyframe_starts, iteration + 1) - 1
+        keyframe_iteration = self._keyframe_starts[keyframe] - 1 if keyframe >= 0 else 0
+        if keyframe_iteration <= self.iteration <= iteration:
+            # Вперёд от текущей итерации не дольше, чем от ключевого кадра.
+            while self.iteration < iteration:
+                self._forward(changed)
+            return changed
+        self._load_keyframe(keyframe)
+        while self.iteration < iteration:
+            self._forward(None)
+        return None
+
+    def meeting_at(self, iteration):
+        """Точка встречи, если волны встретились на этой итерации, иначе None."""
+        if iteration < 1 or iteration > self.iterations:
+            return None
+        meeting = self._step(iteration)[2]
+        return None if meeting == 0 else divmod(meeting - 1, self.cols)
@@ -0,0 +1,125 @@
+"""
+Статистика трассировки: таймеры по фазам и счётчики горячего цикла.
+
+Сбор включается передачей TraceStats в Tracer(stats=...). Без него трассировка
+идёт прежним кодом: таймеры снимаются раз за уровень волны, а подсчёт
+отвергнутых соседей подключается только вместе со статистикой.
+"""
+import time
+from contextlib import contextmanager
+
+# Фазы трассировки: подготовка волн, раскрытие уровня от A и от B, поиск пересечений,
+# заполнение матриц волн кортежами (label, direction), восстановление пути (замеряется
+# вызывающим кодом через timer); "total" – время внутри Tracer, сумма фаз без reconstruct.
+PHASES = ("setup", "expand_start", "expand_finish", "intersect", "fill", "reconstruct", "total")
+# Причины отказа соседу: вне поля (или на рамке), препятствие, уже помечен своей волной.
+REJECT_REASONS = ("bounds", "obstacle", "visited")
+
+
+class TraceStats:
+    """
+    Счётчики и таймеры одного или нескольких запусков трассировки (значения суммируются,
+    пока не вызван reset).
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # Время фаз в секундах.
+        self.times = dict.fromkeys(PHASES, 0.0)
+        # Раскрытые клетки (извлечённые из очереди) и помеченные клетки каждой волны.
+        self.expanded_start = 0
+        self.expanded_finish = 0
+        self.labelled_start = 0
+        self.labelled_finish = 0
+        # Размеры фронтов (очередей) волн в начале каждого уровня.
+        self.frontier_start = []
+        self.frontier_finish = []
+        self.rejected = dict.fromkeys(REJECT_REASONS, 0)
+        # Клетки, проверенные при поиске пересечений, и найденные пересечения.
+        self.intersection_checks = 0
+        self.intersections = 0
+        self.runs = 0
+        self._lap_start = None
+
+    def add_time(self, phase, seconds):
+        if phase not in self.times:
+            raise ValueError(f"Неизвестная фаза: {phase}")
+        self.times[phase] += seconds
+
+    def begin(self):
+        """
+        Начало отсчёта фазы; вызывается Tracer в начале трассировки и после
+        возврата управления из генератора, чтобы время потребителя не попадало в фазы.
+        """
+        self._lap_start = time.perf_counter()
+
+    def lap(self, phase):
+        """
+        Относит время с прошлой отметки к фазе phase (и к "total").
+        """
+        now = time.perf_counter()
+        self.times[phase] += now - self._lap_start
+        self.times["total"] += now - self._lap_start
+        self._lap_start = now
+
+    @contextmanager
+    def timer(self, phase):
+        """
+        Замер фазы вне Tracer, например восстановления пути:
+            with stats.timer("reconstruct"):
+                path = full_path(...)
+        """
+        t0 = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add_time(phase, time.perf_counter() - t0)
+
+    def add_level(self, frontier_start, frontier_finish):
+        self.frontier_start.append(frontier_start)
+        self.frontier_finish.append(frontier_finish)
+
+    @property
+    def levels(self):
+        return len(self.frontier_start)
+
+    @property
+    def peak_frontier(self):
+        """Наибольший суммарный фронт обеих волн за уровень."""
+        return max(map(sum, zip(self.frontier_start, self.frontier_finish)), default=0)
+
+    @property
+    def cells_expanded(self):
+        return self.expanded_start + self.expanded_finish
+
+    @property
+    def cells_labelled(self):
+        return self.labelled_start + self.labelled_finish
+
+    def as_dict(self):
+        """
+        :return: словарь из чисел и списков (для JSON)
+        """
+        return {
+            "runs": self.runs,
+            "times": {phase: round(seconds, 6) for phase, seconds in self.times.items()},
+            "expanded": {"start": self.expanded_start, "finish": self.expanded_finish},
+            "labelled": {"start": self.labelled_start, "finish": self.labelled_finish},
+            "levels": self.levels,
+            "peak_frontier": self.peak_frontier,
+            "frontier": {"start": list(self.frontier_start), "finish": list(self.frontier_finish)},
+            "rejected": dict(self.rejected),
+            "intersection_checks": self.intersection_checks,
+            "intersections": self.intersections,
+        }
+
+    def summary(self):
+        """
+        Короткая строка для строки состояния (время в мс).
+        """
+        times = {phase: seconds * 1000 for phase, seconds in self.times.items()}
+        return (f"{times['total']:.1f} мс: A {times['expand_start']:.1f}, B {times['expand_finish']:.1f}, "
+                f"пересеч. {times['intersect']:.1f}, матр. {times['fill']:.1f}, путь {times['reconstruct']:.1f}; "
+                f"раскрыто {self.expanded_start}+{self.expanded_finish}, пик фронта {self.peak_frontier}")
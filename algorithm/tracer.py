@@ -0,0 +1,385 @@
+from algorithm.kernel import FlatWaveKernel
+from algorithm.path import reconstruct_path
+
+DEFAULT_DIRECTIONS = [
+    ("U", -1, 0),
+    ("R", 0, 1),
+    ("D", 1, 0),
+    ("L", 0, -1),
+]
+
+ENGINES = ("python", "numpy")
+# Порядок раскрытия уровней встречной волны (Tracer(schedule=...)).
+SCHEDULES = ("alternate", "balanced", "cost")
+
+class Tracer:
+    """
+    Двунаправленная трассировка методом встречной волны.
+    Каждая новая ячейка получает уникальный порядковый номер
+    в порядке, в котором она извлекается из очереди BFS (соблюдая приоритет просмотра соседей).
+    """
+
+    def __init__(self, grid, direction_order=None, engine="python", connectivity=None, stats=None,
+                 schedule="alternate"):
+        """
+        :param grid: 2D-список или Grid (копия поля), где:
+                     0 – свободная клетка, 1 – препятствие,
+                     2(A) и 3(B) уже заменены на 0, чтобы волна могла идти.
+        :param direction_order: порядок просмотра соседей [(name, dr, dc), ...],
+                                по умолчанию (вверх, вправо, вниз, влево)
+        :param engine: "python" – списочные волны, "numpy" – векторизованная волна
+                       на массивах (NumpyWaveEngine), результат тот же
+        :param connectivity: ConnectivityIndex этого поля (algorithm.connectivity);
+                             если A и B в разных компонентах, волна не запускается
+        :param stats: TraceStats (algorithm.stats) для профилирования bidirectional_trace
+                      (у движка "numpy" – без фазы "fill") и step_by_step_trace;
+                      None – без сбора статистики
+        :param schedule: порядок раскрытия уровней волн движка "python":
+                         "alternate" – уровень от A, затем уровень от B;
+                         "balanced" – за шаг один уровень той волны, у которой фронт меньше;
+                         "cost" – той, у которой меньше прогноз следующего уровня
+                         (фронт, выросший как на прошлом уровне).
+                         При "balanced" и "cost" каждое пересечение лежит на кратчайшем пути,
+                         точка встречи по-прежнему – с минимальной суммой label_s + label_f
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Неизвестный движок трассировки: {engine}")
+        if schedule not in SCHEDULES:
+            raise ValueError(f"Неизвестный порядок раскрытия волн: {schedule}")
+        if engine == "numpy" and schedule != "alternate":
+            raise ValueError(f"Движок numpy раскрывает волны только поочерёдно, порядок {schedule} не поддерживается")
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0]) if self.rows > 0 else 0
+        self.directions = list(direction_order or DEFAULT_DIRECTIONS)
+        if engine == "numpy":
+            from algorithm.numpy_engine import DIRECTION_CODES
+            for name, dr, dc in self.directions:
+                if name not in DIRECTION_CODES:
+                    raise ValueError(f"Движок numpy не поддерживает направление {name}, допустимы: U, R, D, L")
+                # Рамка поля – одна клетка: более длинный ход перескочил бы её.
+                if abs(dr) > 1 or abs(dc) > 1:
+                    raise ValueError(f"Ходы длиннее одной клетки не поддерживаются: {name} ({dr}, {dc})")
+        self.engine = engine
+        self.connectivity = connectivity
+        # Число раскрытых и помеченных клеток (обеих волн) за последний запуск трассировки;
+        # у волны они совпадают, у эвристических режимов раскрытых меньше.
+        self.cells_expanded = 0
+        self.cells_labelled = 0
+        # Стоимость пути последнего weighted_trace.
+        self.path_cost = None
+        self.stats = stats
+        self.schedule = schedule
+
+    def bidirectional_trace(self, start, finish):
+        """
+        Запускает двунаправленную волну: BFS от A и BFS от B.
+        На каждом уровне берём все клетки очереди старта и все клетки очереди финиша,
+        расширяем их соседей в порядке (вверх, вправо, вниз, влево).
+        Каждая новая клетка получает уникальный порядковый номер (label_s или label_f).
+        Если при расширении появляются пересечения, выбираем клетку с минимальной суммой (label_s + label_f).
+
+        :param start: (sr, sc) координаты A
+        :param finish: (fr, fc) координаты B
+        :return: (wave_start, wave_finish, meeting_point)
+                 wave_start[r][c] = (label_s, direction_s),
+                 wave_finish[r][c] = (label_f, direction_f),
+                 meeting_point – клетка пересечения или None
+        """
+        if self._unreachable(start, finish):
+            return self._origin_waves(start, finish) + (None,)
+        if tuple(start) == tuple(finish):
+            # A и B совпадают: путь из одной клетки при любом движке и порядке раскрытия.
+            # Статистика – как у flat_trace: помечены только исходные клетки, уровней нет.
+            if self.stats is not None:
+                self.stats.runs += 1
+                self.stats.begin()
+                self.stats.labelled_start += 1
+                self.stats.labelled_finish += 1
+                self.stats.lap("setup")
+            self.cells_expanded = 2
+            return self._origin_waves(start, finish) + (tuple(start),)
+        if self.engine == "numpy":
+            from algorithm.numpy_engine import NumpyWaveEngine
+            engine = NumpyWaveEngine(self.grid, self.directions)
+            result = engine.bidirectional_trace(start, finish, self.stats)
+            self.cells_expanded = engine.cells_expanded
+            return result
+
+        stats = self.stats
+        if stats is not None:
+            stats.runs += 1
+            stats.begin()
+        wave_s, wave_f, meeting = self.flat_trace(FlatWaveKernel(self.grid, self.directions), start, finish)
+        result = wave_s.fill(self._empty_wave()), wave_f.fill(self._empty_wave()), meeting
+        if stats is not None:
+            stats.lap("fill")
+        return result
+
+    def flat_trace(self, kernel, start, finish):
+        """
+        Встречная волна bidirectional_trace на готовом ядре, без матриц волн:
+        путь восстанавливается по самим волнам (FlatWave.trace_back).
+
+        :param kernel: FlatWaveKernel поля (algorithm.kernel); можно переиспользовать
+                       между трассировками, меняя клетки через set_free
+        :return: (wave_start, wave_finish, meeting_point), волны – FlatWave
+        """
+        stats = self.stats
+        wave_s = kernel.wave(start)
+        wave_f = kernel.wave(finish)
+        if stats is not None:
+            stats.labelled_start += 1
+            stats.labelled_finish += 1
+            stats.lap("setup")
+
+        # Совпадающие A и B встречаются сразу, без раскрытия волн.
+        meeting = tuple(start) if tuple(start) == tuple(finish) else None
+        while meeting is None and wave_s.pending and wave_f.pending:
+            _, _, meeting = self._expand_level(kernel, wave_s, wave_f)
+
+        self.cells_expanded = wave_s.tail + wave_f.tail
+        return wave_s, wave_f, meeting
+
+    def _empty_wave(self):
+        return [[None for _ in range(self.cols)] for _ in range(self.rows)]
+
+    def _scheduled_sides(self, wave_s, wave_f):
+        """
+        :return: (expand_s, expand_f) – какие волны раскрывать на этом шаге
+        """
+        if self.schedule == "alternate":
+            return True, True
+        frontier_s = wave_s.tail - wave_s.head
+        frontier_f = wave_f.tail - wave_f.head
+        if not (frontier_s and frontier_f):
+            # Одна волна исчерпана (пути нет); пошаговый режим дораскрывает другую.
+            return frontier_s > 0, frontier_f > 0
+        if self.schedule == "balanced":
+            expand_s = frontier_s <= frontier_f
+        else:
+            # Прогноз следующего уровня – фронт, выросший во столько же раз, что и на прошлом
+            # уровне: frontier ** 2 / previous; сравнение без деления.
+            expand_s = frontier_s * frontier_s * wave_f.previous <= frontier_f * frontier_f * wave_s.previous
+        return expand_s, not expand_s
+
+    def _expand_level(self, kernel, wave_s, wave_f):
+        """
+        Один шаг встречной волны на общем ядре (algorithm.kernel): весь фронт A и/или
+        весь фронт B (по self.schedule), затем поиск пересечений среди новых клеток.
+
+        Раскрываются только целые уровни, поэтому номера клеток каждой волны не зависят
+        от порядка раскрытия. Если за шаг растёт одна волна, все найденные пересечения
+        лежат на кратчайших путях: до шага волны не пересекались, значит, расстояние
+        A–B больше суммы их радиусов, а пересечение после шага даёт путь не длиннее
+        этой суммы плюс один.
+
+        :return: (new_s, new_f, meeting) – отрезки очередей волн, помеченные на шаге,
+                 и клетка встречи с минимальной суммой label_s + label_f или None
+        """
+        expand_s, expand_f = self._scheduled_sides(wave_s, wave_f)
+        stats = self.stats
+        if stats is None:
+            new_s = wave_s.expand(wave_f) if expand_s else (wave_s.tail, wave_s.tail)
+            new_f = wave_f.expand(wave_s) if expand_f else (wave_f.tail, wave_f.tail)
+            # Волна, не раскрытая на шаге, сохраняет met = False: иначе поиск уже остановился.
+            if not (wave_s.met or wave_f.met):
+                return new_s, new_f, None
+            return new_s, new_f, kernel.meeting(wave_s, new_s, wave_f, new_f)
+
+        stats.add_level(wave_s.frontier, wave_f.frontier)
+        new_s = (wave_s.tail, wave_s.tail)
+        new_f = (wave_f.tail, wave_f.tail)
+        if expand_s:
+            stats.expanded_start += wave_s.frontier
+            new_s = wave_s.expand_counting(stats.rejected, wave_f)
+            stats.lap("expand_start")
+        if expand_f:
+            stats.expanded_finish += wave_f.frontier
+            new_f = wave_f.expand_counting(stats.rejected, wave_s)
+            stats.lap("expand_finish")
+        meeting = kernel.meeting(wave_s, new_s, wave_f, new_f, stats)
+        stats.labelled_start += new_s[1] - new_s[0]
+        stats.labelled_finish += new_f[1] - new_f[0]
+        stats.lap("intersect")
+        return new_s, new_f, meeting
+
+    def _unreachable(self, start, finish):
+        """
+        Проверка по индексу связности: True, если путь заведомо не существует.
+        Волны тогда содержат только A и B, счётчики клеток обнуляются.
+        """
+        if self.connectivity is None or self.connectivity.connected(start, finish):
+            return False
+        self.cells_expanded = self.cells_labelled = 0
+        return True
+
+    def _origin_waves(self, start, finish):
+        wave_start = [[None for _ in range(self.cols)] for _ in range(self.rows)]
+        wave_finish = [[None for _ in range(self.cols)] for _ in range(self.rows)]
+        wave_start[start[0]][start[1]] = (0, None)
+        wave_finish[finish[0]][finish[1]] = (0, None)
+        return wave_start, wave_finish
+
+    def step_by_step_trace(self, start, finish, deltas=False):
+        """
+        Генератор для пошаговой двунаправленной волны.
+        На каждом уровне извлекаем все клетки очереди старта, затем все клетки очереди финиша,
+        назначаем новые номера в порядке обнаружения. Если есть пересечения – завершаем.
+
+        :param deltas: False – выдавать (iteration, wave_start, wave_finish, meeting) с полными
+                       матрицами волн; True – (iteration, new_start, new_finish, meeting), где
+                       new_* – клетки, помеченные на этой итерации: списки (r, c, label, direction).
+                       Первая итерация включает и исходные клетки A и B с номером 0, поэтому
+                       сумма всех дельт восстанавливает волны целиком.
+        """
+        stats = self.stats
+        if stats is not None:
+            stats.runs += 1
+            stats.begin()
+        kernel = FlatWaveKernel(self.grid, self.directions)
+        wave_s = kernel.wave(start)
+        wave_f = kernel.wave(finish)
+        if not deltas:
+            wave_start = wave_s.fill(self._empty_wave())
+            wave_finish = wave_f.fill(self._empty_wave())
+        if stats is not None:
+            stats.labelled_start += 1
+            stats.labelled_finish += 1
+            stats.lap("setup")
+
+        iteration = 0
+
+        def result(new_s, new_f, meeting):
+            if not deltas:
+                wave_s.fill(wave_start, *new_s)
+                wave_f.fill(wave_finish, *new_f)
+                return iteration, wave_start, wave_finish, meeting
+            return iteration, wave_s.cells(*new_s), wave_f.cells(*new_f), meeting
+
+        if tuple(start) == tuple(finish):
+            # Как в bidirectional_trace: встреча в исходной клетке, волны не раскрываются.
+            iteration = 1
+            yield result((0, 1), (0, 1), tuple(start))
+            return
+        while wave_s.pending or wave_f.pending:
+            iteration += 1
+            new_s, new_f, meeting = self._expand_level(kernel, wave_s, wave_f)
+            if iteration == 1:
+                # Исходные клетки (позиция 0 очереди) попадают в дельту первой итерации.
+                new_s = (0, new_s[1])
+                new_f = (0, new_f[1])
+            item = result(new_s, new_f, meeting)
+            if stats is not None:
+                stats.lap("fill")
+            yield item
+            if meeting is not None:
+                return
+            if stats is not None:
+                stats.begin()
+
+        yield result((0, 0), (0, 0), None)
+
+    def one_to_many_trace(self, source, targets):
+        """
+        Одна волна от source до всех targets: вместо отдельной встречной волны на каждую
+        пару волна идёт уровнями, как в bidirectional_trace, и останавливается, когда
+        помечены все цели (или волне некуда идти).
+
+        :param source: клетка-источник
+        :param targets: список клеток-приёмников
+        :return: (wave, paths), wave[r][c] = (label, direction);
+                 paths – {target: путь от source до target или None, если цель недостижима}
+        """
+        kernel = FlatWaveKernel(self.grid, self.directions)
+        front = kernel.wave(source)
+        remaining = {tuple(target) for target in targets} - {tuple(source)}
+        if self.connectivity is not None:
+            remaining = {target for target in remaining if self.connectivity.connected(source, target)}
+
+        while front.pending and remaining:
+            front.expand()
+            remaining = {target for target in remaining if not front.is_labelled(target)}
+
+        wave = front.fill(self._empty_wave())
+        label = front.tail
+        self.cells_expanded = self.cells_labelled = label
+        paths = {}
+        for target in targets:
+            target = tuple(target)
+            if wave[target[0]][target[1]] is None:
+                paths[target] = None
+            else:
+                paths[target] = reconstruct_path(wave, source, target)
+        return wave, paths
+
+    def search_trace(self, start, finish, mode="wave"):
+        """
+        Трассировка в выбранном режиме поиска:
+        "wave" – встречная волна (bidirectional_trace), "astar" – A*,
+        "bidirectional_astar" – двунаправленный A*, "jps" – Jump Point Search.
+        Эвристические режимы реализованы в algorithm.heuristic.HeuristicSearch
+        и требуют 4-связной сетки (ValueError при диагональных или иных ходах).
+
+        :return: (wave_start, wave_finish, meeting_point), как у bidirectional_trace
+        """
+        if mode == "wave":
+            result = self.bidirectional_trace(start, finish)
+            self.cells_labelled = self.cells_expanded
+            return result
+
+        from algorithm.heuristic import SEARCH_MODES, HeuristicSearch
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Неизвестный режим поиска: {mode}")
+        # Проверяет, что направления образуют 4-связную сетку, до ответа по индексу связности.
+        search = HeuristicSearch(self.grid, self.directions)
+        if self._unreachable(start, finish):
+            return self._origin_waves(start, finish) + (None,)
+        result = getattr(search, mode)(start, finish)
+        self.cells_expanded = search.cells_expanded
+        self.cells_labelled = search.cells_labelled
+        return result
+
+    def weighted_trace(self, start, finish, costs=None, bend_penalty=0, direction_costs=None):
+        """
+        Трассировка с весами клеток и штрафом за поворот
+        (algorithm.weighted.WeightedTracer, очередь-корзины Дайала).
+
+        :param costs: стоимость входа в клетку (2D-список или Grid целых >= 1) или None
+        :param bend_penalty: доплата за смену направления
+        :param direction_costs: доплаты за шаг по направлению {"U": 2, ...} или None
+        :return: (wave_start, wave_finish, meeting_point), как у bidirectional_trace;
+                 стоимость пути – в self.path_cost
+        """
+        self.path_cost = None
+        if self._unreachable(start, finish):
+            return self._origin_waves(start, finish) + (None,)
+        from algorithm.weighted import WeightedTracer
+        tracer = WeightedTracer(self.grid, costs, bend_penalty, direction_costs, self.directions)
+        result = tracer.trace(start, finish)
+        self.path_cost = tracer.path_cost
+        self.cells_expanded = tracer.cells_expanded
+        self.cells_labelled = tracer.cells_labelled
+        return result
+
+    def path_only_trace(self, start, finish):
+        """
+        Трассировка «только путь» на битовых досках (algorithm.bitset.BitsetTracer)
+        для очень больших полей: волны не сохраняются, возвращается только путь.
+
+        :return: (path, meeting_point) или (None, None), если пути нет
+        """
+        if self._unreachable(start, finish):
+            return None, None
+        from algorithm.bitset import BitsetTracer
+        tracer = BitsetTracer(self.grid, self.directions)
+        result = tracer.trace(start, finish)
+        self.cells_expanded = self.cells_labelled = tracer.cells_expanded
+        return result
+
+    @staticmethod
+    def reconstruct_path(wave, origin, meeting):
+        """
+        Восстанавливает путь в матрице wave (label, direction), см. algorithm.path.reconstruct_path.
+        """
+        return reconstruct_path(wave, origin, meeting)
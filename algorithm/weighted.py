@@ -0,0 +1,156 @@
+from array import array
+
+from algorithm.grid import Grid
+from algorithm.tracer import DEFAULT_DIRECTIONS
+
+
+class WeightedTracer:
+    """
+    Трассировка с весами клеток и штрафом за поворот (алгоритм Дейкстры с
+    очередью-корзинами Дайала).
+
+    Состояние – клетка и направление, которым в неё вошли: только так штраф за
+    поворот считается точно. Шаг в клетку стоит costs[клетка] + доплата за
+    направление + bend_penalty, если направление сменилось. Веса – небольшие
+    целые числа, поэтому вместо кучи используется кольцо из max_step + 1 корзин:
+    корзина с номером d % size хранит состояния с расстоянием d, и при единичных
+    весах поиск идёт уровнями, как обычная волна.
+
+    Результат имеет вид Tracer.bidirectional_trace: wave[r][c] = (label, direction),
+    label – порядковый номер клетки при окончательной пометке. Волна финиша
+    содержит только B, точка встречи – B. Направления клеток найденного пути
+    переписываются по самому пути, поэтому reconstruct_path восстанавливает
+    именно его, а Board.draw показывает исследованную область.
+    """
+
+    def __init__(self, grid, costs=None, bend_penalty=0, direction_costs=None, directions=None):
+        """
+        :param grid: 2D-список или Grid (A и B уже заменены на 0); непустые клетки непроходимы
+        :param costs: стоимость входа в клетку – 2D-список или Grid целых >= 1;
+                      по умолчанию все клетки стоят 1
+        :param bend_penalty: доплата за смену направления (целое >= 0)
+        :param direction_costs: доплаты за шаг по направлению {"U": 2, "D": 2, ...},
+                                например для предпочтительного направления слоя
+        :param directions: порядок просмотра соседей [(name, dr, dc), ...]
+        :raises ValueError: размеры costs не совпадают с полем или веса вне допустимых значений
+        """
+        self.grid = grid if isinstance(grid, Grid) else Grid.from_rows(grid)
+        self.rows = self.grid.rows
+        self.cols = self.grid.cols
+        self.directions = list(directions or DEFAULT_DIRECTIONS)
+        self.costs = self._flatten_costs(costs)
+        if bend_penalty < 0:
+            raise ValueError(f"Штраф за поворот не может быть отрицательным: {bend_penalty}")
+        self.bend_penalty = bend_penalty
+        direction_costs = direction_costs or {}
+        if any(cost < 0 for cost in direction_costs.values()):
+            raise ValueError("Доплаты за направление не могут быть отрицательными")
+        self.direction_costs = [direction_costs.get(dname, 0) for dname, _, _ in self.directions]
+        # Стоимость найденного пути, число раскрытых состояний и помеченных клеток.
+        self.path_cost = None
+        self.cells_expanded = 0
+        self.cells_labelled = 0
+
+    def _flatten_costs(self, costs):
+        size = self.rows * self.cols
+        if costs is None:
+            return array("i", [1]) * size
+        if isinstance(costs, Grid):
+            if (costs.rows, costs.cols) != (self.rows, self.cols):
+                raise ValueError(f"Размер весов {costs.rows}x{costs.cols} не совпадает с полем {self.rows}x{self.cols}")
+            # Клетки Grid – байты: array("i", bytearray) разобрал бы их как int32.
+            flat = array("B", bytes(costs.data))
+        else:
+            if len(costs) != self.rows or any(len(row) != self.cols for row in costs):
+                raise ValueError(f"Размер весов не совпадает с полем {self.rows}x{self.cols}")
+            flat = array("i")
+            for row in costs:
+                flat.extend(row)
+        if size and min(flat) < 1:
+            raise ValueError("Веса клеток должны быть целыми числами не меньше 1")
+        return flat
+
+    def trace(self, start, finish):
+        """
+        :return: (wave_start, wave_finish, meeting_point); meeting_point – B или None, если пути нет
+        """
+        rows, cols = self.rows, self.cols
+        wave_start = [[None for _ in range(cols)] for _ in range(rows)]
+        wave_finish = [[None for _ in range(cols)] for _ in range(rows)]
+        wave_finish[finish[0]][finish[1]] = (0, None)
+
+        free = self.grid.data
+        costs = self.costs
+        bend = self.bend_penalty
+        moves = [(k, dname, dr, dc, self.direction_costs[k])
+                 for k, (dname, dr, dc) in enumerate(self.directions)]
+        # Номер «направления» исходной клетки – за последним направлением: в неё не входили,
+        # поворота из неё нет. Состояний на клетку – по одному на направление и исходное.
+        no_direction = len(self.directions)
+        states_per_cell = no_direction + 1
+        size = max(costs, default=1) + max(self.direction_costs, default=0) + bend + 1
+
+        distance = array("i", [-1]) * (rows * cols * states_per_cell)
+        parent = array("i", [-1]) * (rows * cols * states_per_cell)
+        source = (start[0] * cols + start[1]) * states_per_cell + no_direction
+        target = finish[0] * cols + finish[1]
+        distance[source] = 0
+        buckets = [[] for _ in range(size)]
+        buckets[0].append(source)
+        pending = 1
+        current = 0
+        label = 0
+        reached = None
+        self.cells_expanded = 0
+
+        while pending:
+            slot = current % size
+            states = buckets[slot]
+            buckets[slot] = []
+            pending -= len(states)
+            for state in states:
+                if distance[state] != current:
+                    continue
+                self.cells_expanded += 1
+                index, came = divmod(state, states_per_cell)
+                r, c = divmod(index, cols)
+                if wave_start[r][c] is None:
+                    wave_start[r][c] = (label, self.directions[came][0] if came != no_direction else None)
+                    label += 1
+                if index == target:
+                    reached = state
+                    break
+                for k, dname, dr, dc, extra in moves:
+                    nr, nc = r + dr, c + dc
+                    if not (0 <= nr < rows and 0 <= nc < cols):
+                        continue
+                    n = nr * cols + nc
+                    if free[n]:
+                        continue
+                    step = costs[n] + extra
+                    if came != no_direction and came != k:
+                        step += bend
+                    nxt = n * states_per_cell + k
+                    total = current + step
+                    if distance[nxt] < 0 or total < distance[nxt]:
+                        distance[nxt] = total
+                        parent[nxt] = state
+                        buckets[total % size].append(nxt)
+                        pending += 1
+            if reached is not None:
+                break
+            current += 1
+
+        self.cells_labelled = label
+        if reached is None:
+            self.path_cost = None
+            return wave_start, wave_finish, None
+        self.path_cost = distance[reached]
+        # Направления пути – по цепочке состояний, а не по первой пометке клетки.
+        state = reached
+        while parent[state] >= 0:
+            index, came = divmod(state, states_per_cell)
+            r, c = divmod(index, cols)
+            wave_start[r][c] = (wave_start[r][c][0], self.directions[came][0])
+            state = parent[state]
+        return wave_start, wave_finish, (finish[0], finish[1])
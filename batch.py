@@ -0,0 +1,244 @@
+"""
+Пакетная трассировка файлов поля без GUI.
+
+Пример:
+    python batch.py boards/ "nightly/**/*.json" --workers 8 --engine numpy -o results.jsonl
+
+Для каждого поля выводится одна JSON-строка: путь к файлу, статус, длина пути,
+точка встречи, число помеченных клеток и время трассировки; с --stats –
+ещё и статистика трассировки (algorithm.stats.TraceStats): время фаз, раскрытые
+клетки волн, размеры фронтов и отказы соседям.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from algorithm.boardio import BOARD_EXTENSIONS, read_board_file
+from algorithm.cache import RouteCache, route_key
+from algorithm.grid import prepare_trace_grid
+from algorithm.heuristic import SEARCH_MODES
+from algorithm.multinet import ORDERINGS, MultiNetRouter, Net
+from algorithm.path import full_path
+from algorithm.stats import TraceStats
+from algorithm.tracer import ENGINES, SCHEDULES, Tracer
+
+# Кэш маршрутов процесса-воркера (создаётся при первом обращении, если задан --cache-dir).
+_route_cache = None
+
+
+def collect_board_files(patterns):
+    """
+    Раскрывает каталоги и glob-шаблоны в отсортированный список файлов полей.
+    """
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, names in os.walk(pattern):
+                files.extend(os.path.join(root, name) for name in names
+                             if name.lower().endswith(BOARD_EXTENSIONS))
+        else:
+            files.extend(path for path in glob.glob(pattern, recursive=True)
+                         if os.path.isfile(path))
+    return sorted(set(files))
+
+
+def _get_cache(cache_dir):
+    global _route_cache
+    if cache_dir is None:
+        return None
+    if _route_cache is None:
+        _route_cache = RouteCache(directory=cache_dir)
+    return _route_cache
+
+
+def trace_board(filename, engine="python", ordering="shortest", mode="wave", cache_dir=None, stats=False,
+                schedule="alternate"):
+    """
+    Трассирует одно поле. Выполняется в процессе-воркере, поэтому возвращает
+    только небольшой словарь с результатом.
+    Если в файле задан список цепей, поле разводится MultiNetRouter.
+    Если задан cache_dir, результат берётся из кэша маршрутов (algorithm.cache)
+    и сохраняется в него; у взятого из кэша результата cached = True.
+    Если stats, в результат добавляется TraceStats.as_dict() выполненной трассировки
+    (статистику собирает только волна; у результата из кэша её нет).
+    schedule – порядок раскрытия волн (Tracer(schedule=...)).
+    """
+    result = {"file": filename}
+    try:
+        data = read_board_file(filename)
+        board = data["board"]
+        if data["nets"]:
+            return _route_nets(result, board, data["nets"], engine, ordering)
+
+        grid, start, finish = prepare_trace_grid(board)
+        if grid is None:
+            result["status"] = "no_endpoints"
+            return result
+
+        t0 = time.perf_counter()
+        cache = _get_cache(cache_dir)
+        # Другой порядок раскрытия волн даёт другие номера и, возможно, другой путь.
+        cache_mode = mode if schedule == "alternate" else f"{mode}:{schedule}"
+        key = route_key(grid, start, finish, mode=cache_mode) if cache is not None else None
+        entry = cache.get(key) if cache is not None else None
+        cached = entry is not None
+        trace_stats = TraceStats() if stats else None
+        if entry is None:
+            entry = _trace_entry(grid, start, finish, engine, mode, trace_stats, schedule)
+            if cache is not None:
+                cache.put(key, entry)
+        wall_time = time.perf_counter() - t0
+
+        meeting = entry["meeting"]
+        result.update({
+            "status": "routed" if meeting is not None else "unroutable",
+            "path_length": len(entry["path"]) - 1 if entry["path"] is not None else None,
+            "meeting_point": list(meeting) if meeting is not None else None,
+            "cells_expanded": entry["cells_expanded"],
+            "cells_labelled": entry["cells_labelled"],
+            "wall_time": round(wall_time, 6),
+        })
+        if cached:
+            result["cached"] = True
+        elif trace_stats is not None and trace_stats.runs:
+            result["stats"] = trace_stats.as_dict()
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def _trace_entry(grid, start, finish, engine, mode, stats=None, schedule="alternate"):
+    """
+    :param stats: TraceStats для статистики трассировки или None
+    :return: запись кэша маршрутов: path (или None), meeting и счётчики клеток
+    """
+    tracer = Tracer(grid, engine=engine, stats=stats, schedule=schedule)
+    if mode == "path_only":
+        path, meeting = tracer.path_only_trace(start, finish)
+    else:
+        wave_s, wave_f, meeting = tracer.search_trace(start, finish, mode)
+        path = None
+        if meeting is not None:
+            if stats is None:
+                path = full_path(wave_s, wave_f, start, finish, meeting)
+            else:
+                with stats.timer("reconstruct"):
+                    path = full_path(wave_s, wave_f, start, finish, meeting)
+    return {
+        "path": path,
+        "meeting": meeting,
+        "cells_expanded": tracer.cells_expanded,
+        "cells_labelled": tracer.cells_labelled,
+    }
+
+
+def _route_nets(result, board, nets, engine, ordering):
+    t0 = time.perf_counter()
+    router = MultiNetRouter(board, [Net.from_dict(net, i) for i, net in enumerate(nets)],
+                            engine=engine, ordering=ordering)
+    routing = router.route()
+    result.update(routing.as_dict())
+    result["status"] = "routed" if not routing.failed else "partial"
+    result["wall_time"] = round(time.perf_counter() - t0, 6)
+    return result
+
+
+def _trace_board_task(args):
+    return trace_board(*args)
+
+
+def _init_worker(engine, cache_dir=None):
+    # Импорт движка и открытие кэша заранее, чтобы они не попадали во время трассировки первого поля.
+    if engine == "numpy":
+        import algorithm.numpy_engine  # noqa: F401
+    _get_cache(cache_dir)
+
+
+def run_batch(files, out, workers=None, engine="python", chunksize=None, ordering="shortest",
+              mode="wave", cache_dir=None, stats=False, schedule="alternate"):
+    """
+    Трассирует файлы в пуле процессов и пишет результаты в out построчно
+    по мере готовности (в порядке входного списка).
+
+    :param cache_dir: каталог кэша маршрутов (общий для всех воркеров) или None
+    :param stats: добавлять в результаты статистику трассировки
+    :param schedule: порядок раскрытия встречных волн
+
+    :return: словарь со счётчиками по статусам
+    """
+    workers = workers or os.cpu_count() or 1
+    if chunksize is None:
+        # Крупные порции снижают накладные расходы IPC на десятках тысяч мелких задач.
+        chunksize = max(1, min(256, len(files) // (workers * 8)))
+    counts = {}
+    tasks = ((filename, engine, ordering, mode, cache_dir, stats, schedule) for filename in files)
+    if workers == 1:
+        _init_worker(engine, cache_dir)
+        results = map(_trace_board_task, tasks)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(engine, cache_dir))
+        results = executor.map(_trace_board_task, tasks, chunksize=chunksize)
+    try:
+        for result in results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетная трассировка файлов поля (JSON/CSV)")
+    parser.add_argument("inputs", nargs="+", help="каталоги или glob-шаблоны файлов поля")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="число процессов (по умолчанию – число ядер)")
+    parser.add_argument("-e", "--engine", choices=ENGINES, default="python",
+                        help="движок трассировки")
+    parser.add_argument("-m", "--mode", choices=SEARCH_MODES + ("path_only",), default="wave",
+                        help="режим поиска; path_only – битовые доски без хранения волн")
+    parser.add_argument("--ordering", choices=sorted(ORDERINGS), default="shortest",
+                        help="порядок разводки цепей для полей со списком цепей")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="число файлов в одной порции для воркера")
+    parser.add_argument("--cache-dir", default=None,
+                        help="каталог кэша маршрутов (sqlite); повторные поля берутся из кэша")
+    parser.add_argument("--stats", action="store_true",
+                        help="добавить статистику трассировки: время фаз, фронты, отказы соседям")
+    parser.add_argument("--schedule", choices=SCHEDULES, default="alternate",
+                        help="порядок раскрытия волн: поочерёдно или сначала меньший фронт")
+    parser.add_argument("-o", "--output", default="-",
+                        help="файл JSON-lines для результатов (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+    if args.engine == "numpy" and args.schedule != "alternate":
+        parser.error("движок numpy поддерживает только --schedule alternate")
+
+    files = collect_board_files(args.inputs)
+    if not files:
+        print("Файлы полей не найдены", file=sys.stderr)
+        return 1
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    t0 = time.perf_counter()
+    try:
+        counts = run_batch(files, out, args.workers, args.engine, args.chunksize, args.ordering,
+                           args.mode, args.cache_dir, args.stats, args.schedule)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    summary = ", ".join(f"{status}: {count}" for status, count in sorted(counts.items()))
+    print(f"Обработано файлов: {len(files)} за {time.perf_counter() - t0:.2f} с ({summary})",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3 @@
+"""
+Бенчмарки трассировщика: генераторы полей и запуск замеров (python -m benchmarks.run).
+"""
@@ -0,0 +1,132 @@
+"""
+Генераторы тестовых полей с фиксированным зерном.
+
+Каждый генератор возвращает поле в формате Board.board (2D-список):
+0 – свободно, 1 – препятствие, 2 – A, 3 – B.
+"""
+import random
+
+from algorithm.grid import FINISH, FREE, OBSTACLE, START
+
+
+def _free_cells(board):
+    return [(r, c) for r, row in enumerate(board) for c, cell in enumerate(row) if cell == FREE]
+
+
+def place_endpoints(board, placement="far", seed=0):
+    """
+    Ставит A и B на свободные клетки (поле может быть прямоугольным).
+
+    :param placement: "far" – в противоположных углах (ближайшие к углам свободные клетки),
+                      "near" – на расстоянии нескольких клеток друг от друга
+    """
+    cells = _free_cells(board)
+    if len(cells) < 2:
+        raise ValueError("На поле меньше двух свободных клеток")
+    rows, cols = len(board), len(board[0])
+    if placement == "far":
+        start = min(cells, key=lambda rc: rc[0] + rc[1])
+        finish = min(cells, key=lambda rc: (rows - 1 - rc[0]) + (cols - 1 - rc[1]))
+    elif placement == "near":
+        rnd = random.Random(seed)
+        start = rnd.choice(cells)
+        radius = max(2, max(rows, cols) // 16)
+        near = [rc for rc in cells if rc != start
+                and abs(rc[0] - start[0]) + abs(rc[1] - start[1]) <= radius]
+        finish = rnd.choice(near or [rc for rc in cells if rc != start])
+    else:
+        raise ValueError(f"Неизвестное размещение: {placement}")
+    board[start[0]][start[1]] = START
+    board[finish[0]][finish[1]] = FINISH
+    return board
+
+
+def random_board(size, density=0.2, placement="far", seed=0):
+    """Случайные препятствия с заданной плотностью."""
+    rnd = random.Random(seed)
+    board = [[OBSTACLE if rnd.random() < density else FREE for _ in range(size)] for _ in range(size)]
+    board[0][0] = FREE
+    board[size - 1][size - 1] = FREE
+    return place_endpoints(board, placement, seed)
+
+
+def maze_board(size, placement="far", seed=0):
+    """Лабиринт (поиск в глубину по клеткам с нечётными координатами)."""
+    rnd = random.Random(seed)
+    board = [[OBSTACLE] * size for _ in range(size)]
+    if size < 3:
+        board = [[FREE] * size for _ in range(size)]
+        return place_endpoints(board, placement, seed)
+    board[0][0] = FREE
+    stack = [(0, 0)]
+    while stack:
+        r, c = stack[-1]
+        options = [(r + dr, c + dc, r + dr // 2, c + dc // 2)
+                   for dr, dc in ((-2, 0), (0, 2), (2, 0), (0, -2))
+                   if 0 <= r + dr < size and 0 <= c + dc < size and board[r + dr][c + dc] == OBSTACLE]
+        if not options:
+            stack.pop()
+            continue
+        nr, nc, wr, wc = rnd.choice(options)
+        board[wr][wc] = FREE
+        board[nr][nc] = FREE
+        stack.append((nr, nc))
+    return place_endpoints(board, placement, seed)
+
+
+def spiral_board(size, placement="far", seed=0):
+    """
+    Спиральный коридор шириной в клетку от угла (0, 0) к центру; витки разделены стенами.
+    При placement="far" A ставится в угол, а B – в конец коридора в центре,
+    так что путь обходит все витки (около size² / 2 клеток).
+    """
+    board = [[OBSTACLE] * size for _ in range(size)]
+    corridor = []
+
+    def carve(cells):
+        for r, c in cells:
+            if board[r][c] != FREE:
+                board[r][c] = FREE
+                corridor.append((r, c))
+
+    lo, hi = 0, size - 1
+    while lo <= hi:
+        # Верх витка начинается от левой стены предыдущего витка – так витки соединены.
+        carve((lo, c) for c in range(max(lo - 2, 0), hi + 1))
+        carve((r, hi) for r in range(lo, hi + 1))
+        carve((hi, c) for c in range(hi, lo - 1, -1))
+        carve((r, lo) for r in range(hi, lo + 1, -1))
+        lo += 2
+        hi -= 2
+    if placement != "far" or len(corridor) < 2:
+        return place_endpoints(board, placement, seed)
+    start, finish = corridor[0], corridor[-1]
+    board[start[0]][start[1]] = START
+    board[finish[0]][finish[1]] = FINISH
+    return board
+
+
+def corridor_board(size, placement="far", seed=0):
+    """Змейка из коридоров шириной в клетку – худший случай для встречной волны."""
+    board = [[FREE] * size for _ in range(size)]
+    for r in range(1, size, 2):
+        for c in range(size):
+            board[r][c] = OBSTACLE
+        gap = size - 1 if (r // 2) % 2 == 0 else 0
+        board[r][gap] = FREE
+    return place_endpoints(board, placement, seed)
+
+
+GENERATORS = {
+    "random": random_board,
+    "maze": maze_board,
+    "spiral": spiral_board,
+    "corridor": corridor_board,
+}
+
+
+def make_board(name, size, placement="far", seed=0, **params):
+    """
+    Создаёт поле генератором name из GENERATORS.
+    """
+    return GENERATORS[name](size, placement=placement, seed=seed, **params)
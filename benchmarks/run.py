@@ -0,0 +1,259 @@
+"""
+Замеры производительности Tracer на сгенерированных полях.
+
+Пример:
+    python -m benchmarks.run --sizes 8,64,512 -o bench.json
+    python -m benchmarks.run --baseline bench_base.json --time-threshold 1.3
+    python -m benchmarks.run --schedules alternate,balanced,cost
+
+Для каждого поля замеряются bidirectional_trace, step_by_step_trace и
+reconstruct_path: время (лучшее из --repeat запусков), пиковая память по
+tracemalloc (отдельным запуском, чтобы трассировка памяти не искажала время)
+и число помеченных клеток. При сравнении с базовым файлом замер считается
+регрессией, если время или память выросли больше допустимого множителя.
+С несколькими порядками раскрытия волн (--schedules) для каждого порядка,
+кроме "alternate", выводится доля помеченных клеток, сэкономленная относительно него.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from algorithm.grid import prepare_trace_grid
+from algorithm.path import full_path
+from algorithm.tracer import ENGINES, SCHEDULES, Tracer
+from benchmarks.generators import GENERATORS, make_board
+
+OPERATIONS = ("bidirectional_trace", "step_by_step_trace", "reconstruct_path")
+
+DEFAULT_CASES = [
+    ("random", "far", {"density": 0.1}),
+    ("random", "far", {"density": 0.3}),
+    ("random", "near", {"density": 0.2}),
+    ("maze", "far", {}),
+    ("spiral", "far", {}),
+    ("corridor", "far", {}),
+]
+
+
+def case_name(generator, placement, params):
+    suffix = "".join(f"-{key[0]}{value}" for key, value in sorted(params.items()))
+    return f"{generator}{suffix}-{placement}"
+
+
+def _run_operation(operation, grid, start, finish, engine, schedule="alternate"):
+    """
+    Выполняет одну операцию и возвращает волны последнего шага.
+    """
+    tracer = Tracer(grid, engine=engine, schedule=schedule)
+    if operation == "bidirectional_trace":
+        wave_s, wave_f, _ = tracer.bidirectional_trace(start, finish)
+        return wave_s, wave_f
+    if operation == "step_by_step_trace":
+        wave_s = wave_f = None
+        for _, wave_s, wave_f, _ in tracer.step_by_step_trace(start, finish):
+            pass
+        return wave_s, wave_f
+    raise ValueError(f"Неизвестная операция: {operation}")
+
+
+def _count_labelled(waves):
+    return sum(wave[r][c] is not None for wave in waves
+               for r in range(len(wave)) for c in range(len(wave[r])))
+
+
+def measure(operation, grid, start, finish, engine="python", repeat=3, schedule="alternate"):
+    """
+    :return: словарь с time (с), peak_kb и cells_labelled – число клеток, помеченных
+             волнами (для reconstruct_path – длина пути в клетках); None, если путь
+             не найден и восстанавливать нечего
+    """
+    if operation == "reconstruct_path":
+        wave_s, wave_f, meeting = Tracer(grid, engine=engine, schedule=schedule).bidirectional_trace(start, finish)
+        if meeting is None:
+            return None
+        run = lambda: full_path(wave_s, wave_f, start, finish, meeting)
+        count = len
+    else:
+        run = lambda: _run_operation(operation, grid, start, finish, engine, schedule)
+        count = _count_labelled
+
+    best = None
+    value = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        value = run()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    cells = count(value)
+    value = None
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"time": best, "peak_kb": peak // 1024, "cells_labelled": cells}
+
+
+def run_suite(sizes, cases=None, operations=OPERATIONS, engine="python", repeat=3, seed=0,
+              progress=None, schedules=("alternate",)):
+    """
+    Запускает все сочетания (случай, размер, операция, порядок раскрытия волн).
+
+    :return: список записей результатов
+    """
+    if engine == "numpy":
+        # Импорт NumPy не должен попадать в первый замер.
+        import algorithm.numpy_engine  # noqa: F401
+    results = []
+    for generator, placement, params in cases or DEFAULT_CASES:
+        for size in sizes:
+            board = make_board(generator, size, placement=placement, seed=seed, **params)
+            grid, start, finish = prepare_trace_grid(board)
+            for operation in operations:
+                for schedule in schedules:
+                    measured = measure(operation, grid, start, finish, engine, repeat, schedule)
+                    if measured is None:
+                        continue
+                    record = {
+                        "case": case_name(generator, placement, params),
+                        "size": size,
+                        "operation": operation,
+                        "engine": engine,
+                        "schedule": schedule,
+                    }
+                    record.update(measured)
+                    results.append(record)
+                    if progress:
+                        progress(record)
+    return results
+
+
+def result_key(record):
+    # В старых файлах результатов порядка раскрытия нет – это был "alternate".
+    return (record["case"], record["size"], record["operation"], record["engine"],
+            record.get("schedule", "alternate"))
+
+
+def work_saved(results):
+    """
+    Сравнивает порядки раскрытия волн с "alternate" по числу помеченных клеток.
+
+    :return: список записей {key, schedule, baseline, current, saved}, saved – сэкономленная доля
+    """
+    base = {result_key(record)[:4]: record for record in results
+            if record.get("schedule", "alternate") == "alternate"}
+    saved = []
+    for record in results:
+        old = base.get(result_key(record)[:4])
+        if old is None or old is record or record["operation"] == "reconstruct_path":
+            continue
+        saved.append({
+            "key": list(result_key(record)[:4]),
+            "schedule": record["schedule"],
+            "baseline": old["cells_labelled"],
+            "current": record["cells_labelled"],
+            "saved": round(1 - record["cells_labelled"] / old["cells_labelled"], 4) if old["cells_labelled"] else 0.0,
+        })
+    return saved
+
+
+def compare(results, baseline, time_threshold=1.25, memory_threshold=1.25, min_time=0.001):
+    """
+    Сравнивает результаты с базовыми.
+
+    :param min_time: замеры быстрее этого порога (с) не проверяются по времени – там шум
+    :return: список регрессий (словари с ключом, метрикой и отношением)
+    """
+    base = {result_key(record): record for record in baseline}
+    regressions = []
+    for record in results:
+        old = base.get(result_key(record))
+        if old is None:
+            continue
+        checks = [("peak_kb", memory_threshold)]
+        if max(old["time"], record["time"]) >= min_time:
+            checks.append(("time", time_threshold))
+        for metric, threshold in checks:
+            if old[metric] and record[metric] / old[metric] > threshold:
+                regressions.append({
+                    "key": list(result_key(record)),
+                    "metric": metric,
+                    "baseline": old[metric],
+                    "current": record[metric],
+                    "ratio": round(record[metric] / old[metric], 3),
+                })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки трассировщика")
+    parser.add_argument("--sizes", default="8,32,128,512",
+                        help="размеры полей через запятую (до 4096)")
+    parser.add_argument("--generators", default=",".join(GENERATORS),
+                        help="генераторы полей через запятую")
+    parser.add_argument("--operations", default=",".join(OPERATIONS),
+                        help="замеряемые операции через запятую")
+    parser.add_argument("-e", "--engine", choices=ENGINES, default="python")
+    parser.add_argument("--schedules", default="alternate",
+                        help=f"порядки раскрытия волн через запятую ({', '.join(SCHEDULES)})")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="bench_results.json",
+                        help="файл JSON с результатами")
+    parser.add_argument("--baseline", help="файл результатов для сравнения")
+    parser.add_argument("--time-threshold", type=float, default=1.25,
+                        help="допустимый рост времени (множитель)")
+    parser.add_argument("--memory-threshold", type=float, default=1.25,
+                        help="допустимый рост пиковой памяти (множитель)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    generators = set(args.generators.split(","))
+    cases = [case for case in DEFAULT_CASES if case[0] in generators]
+    operations = tuple(args.operations.split(","))
+    schedules = tuple(args.schedules.split(","))
+    for schedule in schedules:
+        if schedule not in SCHEDULES:
+            parser.error(f"неизвестный порядок раскрытия волн: {schedule}")
+        if args.engine == "numpy" and schedule != "alternate":
+            parser.error("движок numpy поддерживает только порядок alternate")
+
+    def progress(record):
+        print(f"{record['case']:>24} {record['size']:>5} {record['operation']:>20} {record['schedule']:>9} "
+              f"{record['time'] * 1000:10.2f} ms {record['peak_kb']:8d} KB "
+              f"{record['cells_labelled']}", file=sys.stderr)
+
+    results = run_suite(sizes, cases, operations, args.engine, args.repeat, args.seed, progress, schedules)
+    report = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "seed": args.seed, "repeat": args.repeat},
+        "results": results,
+    }
+    saved = work_saved(results)
+    if saved:
+        report["work_saved"] = saved
+        for item in saved:
+            print(f"Экономия {item['schedule']}: {item['key']} {item['baseline']} -> {item['current']} "
+                  f"клеток ({item['saved']:.1%})", file=sys.stderr)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.time_threshold, args.memory_threshold)
+        report["regressions"] = regressions
+        for item in regressions:
+            print(f"Регрессия {item['metric']}: {item['key']} "
+                  f"{item['baseline']} -> {item['current']} (x{item['ratio']})", file=sys.stderr)
+        status = 1 if regressions else 0
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,117 +1,569 @@
+import math
+from collections import OrderedDict
+
 import pygame
 
+from algorithm.grid import Grid
+
+ARROW_MAP = {"U": "↓", "R": "←", "D": "↑", "L": "→"}
+
+# Клетки мельче DETAIL_CELL_SIZE пикселей показываются растром (по пикселю на клетку
+# или мельче), номера волн пишутся только в клетках от LABEL_CELL_SIZE пикселей.
+DETAIL_CELL_SIZE = 6
+LABEL_CELL_SIZE = 16
+MAX_CELL_SIZE = 96
+# Сколько отрисованных подписей клеток (номера волн, стрелки) хранить: на больших полях
+# при прокрутке и пошаговой трассировке различных номеров миллионы, кэш – LRU.
+LABEL_CACHE_SIZE = 4096
+
+# Коды клеток растра: значения поля 0–5, затем клетки волн старта, финиша и обеих.
+WAVE_START, WAVE_FINISH, WAVE_BOTH = 6, 7, 8
+# При уменьшении из блока клеток берётся самая важная: путь и A/B видны на любом масштабе.
+_RASTER_PRIORITY = [0, WAVE_START, WAVE_FINISH, WAVE_BOTH, 1, 4, 5, 2, 3]
+
+_font_cache = {}
+
+
+def board_dimensions(size):
+    """
+    :param size: сторона квадратного поля или (rows, cols)
+    :return: (rows, cols)
+    :raises ValueError: размеры не положительны
+    """
+    rows, cols = (size, size) if isinstance(size, int) else size
+    if rows <= 0 or cols <= 0:
+        raise ValueError(f"Размер поля должен быть положительным: {rows}x{cols}")
+    return rows, cols
+
+
+def parse_board_size(text):
+    """
+    Разбирает размер поля из строки ввода: "N" (квадратное поле) или "RxC".
+
+    :return: (rows, cols)
+    :raises ValueError: строка не размер или размеры не положительны
+    """
+    parts = text.strip().lower().replace("х", "x").replace("×", "x").split("x")
+    if len(parts) == 1:
+        parts = parts * 2
+    if len(parts) != 2:
+        raise ValueError(f"Неверный размер поля: {text!r}")
+    return board_dimensions((int(parts[0]), int(parts[1])))
+
+
+def get_font(size, name="Segoe UI"):
+    """
+    Шрифт из кэша: pygame.font.SysFont ищет системный шрифт при каждом вызове,
+    поэтому создавать его на каждый кадр слишком дорого.
+    """
+    key = (name, size)
+    font = _font_cache.get(key)
+    if font is None:
+        font = pygame.font.SysFont(name, size)
+        _font_cache[key] = font
+    return font
+
+
 class Board:
+    """
+    Поле с отрисовкой в отложенном режиме: клетки рисуются на кэшированную
+    поверхность и перерисовываются только при изменении их состояния
+    (значение клетки, метки волн, стрелка пути). Надписи и полупрозрачные
+    заливки рендерятся один раз и переиспользуются.
+
+    Поле показывается через окно просмотра (масштаб scale – пикселей на клетку,
+    origin_row/origin_col – клетка в левом верхнем углу), перебираются только
+    видимые клетки. При мелком масштабе поле выводится растром, собранным
+    через pygame.surfarray из массива кодов клеток.
+    """
+
     def __init__(self, rect, grid_size, theme):
+        """
+        :param grid_size: сторона квадратного поля или (rows, cols)
+        """
         self.rect = rect
-        self.grid_size = grid_size
         self.theme = theme
-        self.rows = grid_size
-        self.cols = grid_size
-        self.cell_size = self.rect.width // self.cols
-        self.board = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
+        self.rows, self.cols = board_dimensions(grid_size)
+        # Для файлов, где хранится одна сторона поля (grid_size в JSON).
+        self.grid_size = max(self.rows, self.cols)
+        # Клетки поля – Grid: один буфер на всё поле, board[r][c] читается и пишется как раньше.
+        self.board = Grid(self.rows, self.cols)
+        # Слои многослойного поля; на экране – слой active_layer (self.board).
+        self.layers = [self.board]
+        self.active_layer = 0
+        self.preferred = [None]
+        # Волны слоёв после многослойной трассировки: [(wave_start, wave_finish), ...] или None.
+        self.layer_waves = None
 
         self.wave_start = None
         self.wave_finish = None
+        self.final_path_arrows = {}
+        # Клетка, изменённая последним щелчком в режиме препятствий.
+        self.last_edit = None
+
+        self.surface = None
+        self._drawn = None
+        self._view_changed = True
+        # Коды клеток для растрового режима (numpy-массив rows x cols) или None.
+        self._raster = None
+        # Сжатый растр видимой части: (окно просмотра, ранги блоков, несжатый bitmap) или None.
+        self._pooled = None
+        # Волны пошаговой трассировки (start_wave_deltas), которые дописывает apply_wave_delta.
+        self._delta_waves = None
+        # Клетки волн, изменённые на месте (mark_wave_cells) после последней отрисовки.
+        self._delta_cells = set()
+        # Прямоугольники экрана, изменившиеся при последней отрисовке.
+        self.dirty_rects = []
+        self.fit_view()
+
+    @property
+    def detailed(self):
+        """True – клетки рисуются по отдельности, False – растром."""
+        return self.scale >= DETAIL_CELL_SIZE
+
+    def fit_view(self):
+        """Масштаб, при котором поле целиком помещается в окно просмотра."""
+        scale = min(self.rect.width / self.cols, self.rect.height / self.rows)
+        self._set_scale(scale)
+        self.origin_row = 0.0
+        self.origin_col = 0.0
+        self.surface = None
+
+    def _set_scale(self, scale):
+        if scale >= DETAIL_CELL_SIZE:
+            scale = float(int(scale))
+        self.scale = scale
+        self.cell_size = max(1, int(scale))
+
+    def _min_scale(self):
+        # Уменьшать дальше, чем поле целиком помещается в окно, незачем.
+        scale = min(self.rect.width / self.cols, self.rect.height / self.rows)
+        return float(int(scale)) if scale >= DETAIL_CELL_SIZE else scale
+
+    def zoom(self, factor, pos):
+        """
+        Меняет масштаб в factor раз, оставляя клетку под точкой экрана pos на месте.
+        """
+        old = self.scale
+        scale = min(max(old * factor, self._min_scale()), MAX_CELL_SIZE)
+        if scale >= DETAIL_CELL_SIZE and int(scale) == int(old) and factor != 1:
+            # Крупные клетки – целого размера; шаг меньше пикселя округлился бы в ноль.
+            scale = min(int(old) + (1 if factor > 1 else -1), MAX_CELL_SIZE)
+        x = pos[0] - self.rect.x
+        y = pos[1] - self.rect.y
+        anchor_col = self.origin_col + x / old
+        anchor_row = self.origin_row + y / old
+        self._set_scale(scale)
+        self.origin_col = anchor_col - x / self.scale
+        self.origin_row = anchor_row - y / self.scale
+        self._clamp_origin()
+        self.surface = None
+
+    def pan(self, dx, dy):
+        """Сдвигает окно просмотра на (dx, dy) пикселей экрана."""
+        self.origin_col -= dx / self.scale
+        self.origin_row -= dy / self.scale
+        self._clamp_origin()
+        self._view_changed = True
+
+    def _clamp_origin(self):
+        max_col = max(0.0, self.cols - self.rect.width / self.scale)
+        max_row = max(0.0, self.rows - self.rect.height / self.scale)
+        self.origin_col = min(max(self.origin_col, 0.0), max_col)
+        self.origin_row = min(max(self.origin_row, 0.0), max_row)
+
+    def visible_range(self):
+        """
+        :return: (row0, row1, col0, col1) – видимые клетки, правые границы не включаются
+        """
+        row0 = int(self.origin_row)
+        col0 = int(self.origin_col)
+        row1 = min(self.rows, math.ceil(self.origin_row + self.rect.height / self.scale))
+        col1 = min(self.cols, math.ceil(self.origin_col + self.rect.width / self.scale))
+        return row0, row1, col0, col1
+
+    def cell_at(self, pos):
+        """
+        :return: клетка (row, col) под точкой экрана pos или None
+        """
+        if not self.rect.collidepoint(pos):
+            return None
+        col = int(self.origin_col + (pos[0] - self.rect.x) / self.scale)
+        row = int(self.origin_row + (pos[1] - self.rect.y) / self.scale)
+        if row < 0 or row >= self.rows or col < 0 or col >= self.cols:
+            return None
+        return row, col
+
+    def invalidate(self):
+        """Требует полной перерисовки поля при следующем вызове draw."""
+        self._drawn = None
 
     def draw(self, screen):
-        pygame.draw.rect(screen, self.theme["board_bg"], self.rect, border_radius=10)
-
-        font_small = pygame.font.SysFont("Segoe UI", max(12, self.cell_size // 4))
-        arrow_map = {"U": "↓", "R": "←", "D": "↑", "L": "→"}
-
-        for row in range(self.rows):
-            for col in range(self.cols):
-                cell_rect = pygame.Rect(
-                    self.rect.x + col * self.cell_size,
-                    self.rect.y + row * self.cell_size,
-                    self.cell_size,
-                    self.cell_size
-                )
-                cell_val = self.board[row][col]
-
-                if cell_val == 1:
-                    pygame.draw.rect(screen, (160, 160, 160), cell_rect, border_radius=5)
-                elif cell_val == 2:
-                    pygame.draw.rect(screen, self.theme["board_bg"], cell_rect)
-                    self.draw_text(screen, "A", cell_rect)
-                elif cell_val == 3:
-                    pygame.draw.rect(screen, self.theme["board_bg"], cell_rect)
-                    self.draw_text(screen, "B", cell_rect)
-                else:
-                    pygame.draw.rect(screen, self.theme["board_bg"], cell_rect)
-
-                if cell_val not in (2, 3):
-                    if self.wave_start:
-                        data_s = self.wave_start[row][col]
-                        if data_s is not None:
-                            composite_value, direction_s = data_s
-                            text = f"{composite_value}"
-                            text_surf = font_small.render(text, True, (0, 0, 0))
-                            text_rect = text_surf.get_rect(topright=(cell_rect.right - 2, cell_rect.y + 2))
-                            screen.blit(text_surf, text_rect)
-                            overlay_s = pygame.Surface((self.cell_size, self.cell_size), pygame.SRCALPHA)
-                            overlay_s.fill((200, 255, 200, 100))
-                            screen.blit(overlay_s, cell_rect)
-                            if direction_s:
-                                arrow_symbol = arrow_map.get(direction_s, "")
-                                arrow_surf = font_small.render(arrow_symbol, True, (0, 0, 0))
-                                arrow_rect = arrow_surf.get_rect(center=cell_rect.center)
-                                screen.blit(arrow_surf, arrow_rect)
-
-                    if self.wave_finish:
-                        data_f = self.wave_finish[row][col]
-                        if data_f is not None:
-                            composite_value, direction_f = data_f
-                            text = f"{composite_value}"
-                            text_surf = font_small.render(text, True, (0, 0, 0))
-                            text_rect = text_surf.get_rect(topright=(cell_rect.right - 2, cell_rect.y + 20))
-                            screen.blit(text_surf, text_rect)
-                            overlay_f = pygame.Surface((self.cell_size, self.cell_size), pygame.SRCALPHA)
-                            overlay_f.fill((200, 220, 255, 100))
-                            screen.blit(overlay_f, cell_rect)
-                            if direction_f:
-                                arrow_symbol = arrow_map.get(direction_f, "")
-                                arrow_surf = font_small.render(arrow_symbol, True, (0, 0, 0))
-                                arrow_rect = arrow_surf.get_rect(center=cell_rect.center)
-                                screen.blit(arrow_surf, arrow_rect)
-
-                if cell_val == 4:
-                    overlay_path = pygame.Surface((self.cell_size, self.cell_size), pygame.SRCALPHA)
-                    overlay_path.fill((255, 255, 0, 128))
-                    screen.blit(overlay_path, cell_rect)
-                elif cell_val == 5:
-                    overlay_path = pygame.Surface((self.cell_size, self.cell_size), pygame.SRCALPHA)
-                    overlay_path.fill((255, 165, 0, 128))
-                    screen.blit(overlay_path, cell_rect)
-                    if hasattr(self, "final_path_arrows") and (row, col) in self.final_path_arrows:
-                        arrow = self.final_path_arrows[(row, col)]
-                        big_font = pygame.font.SysFont("Segoe UI", int(self.cell_size * 0.6))
-                        arrow_surf = big_font.render(arrow, True, (0, 0, 0))
-                        arrow_rect = arrow_surf.get_rect()
-                        arrow_rect.centerx = cell_rect.centerx
-                        arrow_rect.centery = cell_rect.centery - 2
-                        screen.blit(arrow_surf, arrow_rect)
-
-
-                pygame.draw.rect(screen, self.theme["grid_color"], cell_rect, 1)
+        """
+        Обновляет изменившиеся клетки на кэшированной поверхности и выводит её на экран.
+
+        :return: список изменившихся прямоугольников экрана
+        """
+        if self.surface is None:
+            self._build_surface()
+            self._view_changed = True
+        cells = None if self._drawn is None else self._changed_cells()
+        if cells is None:
+            self._raster = None
+        elif cells and self._raster is not None:
+            for row, col in cells:
+                self._raster[row, col] = self._raster_code(row, col)
+        # Сдвиг или масштаб меняют всю видимую часть, но не состояние клеток:
+        # снимок остаётся в силе, перерисовываются только видимые клетки.
+        redraw_all = cells is None or self._view_changed
+
+        if not self.detailed:
+            if redraw_all or cells:
+                self._render_raster(None if redraw_all else cells)
+                self.dirty_rects = [self.rect.copy()]
+            else:
+                self.dirty_rects = []
+        elif redraw_all:
+            self._clear_surface()
+            row0, row1, col0, col1 = self.visible_range()
+            for row in range(row0, row1):
+                for col in range(col0, col1):
+                    self._render_cell(row, col)
+            self.dirty_rects = [self.rect.copy()]
+        else:
+            self.dirty_rects = []
+            bounds = self.surface.get_rect()
+            for row, col in cells:
+                cell_rect = self._cell_rect(row, col)
+                if cell_rect.colliderect(bounds):
+                    self._render_cell(row, col)
+                    self.dirty_rects.append(cell_rect.clip(bounds).move(self.rect.topleft))
+        if cells is None:
+            self._snapshot()
+        self._view_changed = False
+
+        screen.blit(self.surface, self.rect)
+        return self.dirty_rects
+
+    def _build_surface(self):
+        self.surface = pygame.Surface(self.rect.size)
+        self._clear_surface()
+
+        size = self.cell_size
+        self._labels = OrderedDict()
+        self._font_small = get_font(max(12, size // 4))
+        self._font_big = get_font(int(size * 0.6))
+        self._overlays = {}
+        for name, color in (("start", (200, 255, 200, 100)), ("finish", (200, 220, 255, 100)),
+                            ("trace", (255, 255, 0, 128)), ("path", (255, 165, 0, 128))):
+            overlay = pygame.Surface((size, size), pygame.SRCALPHA)
+            overlay.fill(color)
+            self._overlays[name] = overlay
+
+    def _clear_surface(self):
+        self.surface.fill(self.theme["background"])
+        pygame.draw.rect(self.surface, self.theme["board_bg"], self.surface.get_rect(), border_radius=10)
 
+    def _label(self, text, font):
+        key = (text, id(font))
+        surf = self._labels.get(key)
+        if surf is not None:
+            self._labels.move_to_end(key)
+            return surf
+        surf = font.render(text, True, (0, 0, 0))
+        self._labels[key] = surf
+        if len(self._labels) > LABEL_CACHE_SIZE:
+            self._labels.popitem(last=False)
+        return surf
 
+    def _snapshot(self):
+        # Волны в снимке – ссылки: изменения на месте сообщаются через mark_wave_cells.
+        self._drawn = {
+            "board": self.board.copy(),
+            "wave_start": self.wave_start,
+            "wave_finish": self.wave_finish,
+            "arrows": dict(self.final_path_arrows),
+        }
+
+    def _changed_cells(self):
+        """
+        Сравнивает текущее состояние со снимком последней отрисовки и обновляет снимок.
+        Строки сравниваются целиком (на уровне C), поклеточно – только изменившиеся.
+        Волны сравниваются только при замене объекта волны; иначе изменившиеся клетки
+        берутся из mark_wave_cells, так что кадр без замены волн не перебирает всё поле.
+
+        :return: множество клеток (row, col) или None, если нужна полная перерисовка
+        """
+        drawn = self._drawn
+        snapshot = drawn["board"]
+        if (snapshot.rows, snapshot.cols) != (self.rows, self.cols):
+            return None
+        changed = set()
+        # Целиком буферы сравниваются одной операцией; по строкам – только если они различаются.
+        if self.board != snapshot:
+            for row, (current, old) in enumerate(zip(self.board, snapshot)):
+                if current != old:
+                    changed.update((row, col) for col in range(self.cols) if current[col] != old[col])
+                    old[:] = current
+
+        changed |= self._delta_cells
+        self._delta_cells = set()
+        for name in ("wave_start", "wave_finish"):
+            wave = getattr(self, name)
+            old = drawn[name]
+            if wave is old:
+                continue
+            # Списочные волны сравниваются построчно с прежней волной: её изменения на месте
+            # уже учтены в _delta_cells. Прочие (WaveView, None) – полная перерисовка.
+            if not isinstance(wave, list) or not isinstance(old, list):
+                return None
+            for row, (current, old_row) in enumerate(zip(wave, old)):
+                if current != old_row:
+                    changed.update((row, col) for col in range(self.cols) if current[col] != old_row[col])
+            drawn[name] = wave
+
+        arrows = self.final_path_arrows
+        if arrows != drawn["arrows"]:
+            for cell in set(arrows) | set(drawn["arrows"]):
+                if arrows.get(cell) != drawn["arrows"].get(cell):
+                    changed.add(cell)
+            drawn["arrows"] = dict(arrows)
+        return changed
+
+    def start_wave_deltas(self, waves=None):
+        """
+        Начинает показ волн по дельтам: создаёт пустые волны старта и финиша (или берёт
+        готовые waves = (wave_start, wave_finish)), которые дальше меняются только через
+        apply_wave_delta и mark_wave_cells.
+        """
+        if waves is None:
+            waves = ([[None for _ in range(self.cols)] for _ in range(self.rows)],
+                     [[None for _ in range(self.cols)] for _ in range(self.rows)])
+        self.wave_start, self.wave_finish = waves
+        self._delta_waves = waves
+        self._delta_cells = set()
+        # Прежние волны стираются целиком – один раз, дальше перерисовываются только дельты.
+        self.invalidate()
+
+    def _showing_delta_waves(self):
+        return (self._delta_waves is not None and self.wave_start is self._delta_waves[0]
+                and self.wave_finish is self._delta_waves[1])
+
+    def apply_wave_delta(self, new_start, new_finish):
+        """
+        Дописывает в волны клетки, помеченные на шаге трассировки, и запоминает их
+        для перерисовки: шаг стоит столько, сколько клеток в его фронте.
+
+        :param new_start: клетки волны старта [(r, c, label, direction), ...]
+        :param new_finish: клетки волны финиша в том же виде
+        """
+        if not self._showing_delta_waves():
+            self.start_wave_deltas()
+        for wave, cells in ((self.wave_start, new_start), (self.wave_finish, new_finish)):
+            for r, c, label, direction in cells:
+                wave[r][c] = (label, direction)
+        self.mark_wave_cells([(r, c) for r, c, _, _ in new_start] + [(r, c) for r, c, _, _ in new_finish])
+
+    def mark_wave_cells(self, cells):
+        """
+        Сообщает, что клетки cells показанных волн изменились на месте (дельта шага,
+        воспроизведение записи назад, инкрементальная перетрассировка), – они
+        перерисуются без сравнения волн целиком. Волны, изменённые на месте, иначе
+        не перерисовываются: объект волны тот же, что и при прошлой отрисовке.
+        """
+        self._delta_cells.update(cells)
+
+    def _cell_rect(self, row, col):
+        """Прямоугольник клетки в координатах кэшированной поверхности (детальный режим)."""
+        size = self.cell_size
+        x = col * size - round(self.origin_col * size)
+        y = row * size - round(self.origin_row * size)
+        return pygame.Rect(x, y, size, size)
+
+    def _render_cell(self, row, col):
+        """
+        Рисует клетку на кэшированной поверхности. Рисование обрезается по клетке,
+        чтобы надписи не залезали на соседей – иначе перерисовка одной клетки
+        давала бы другую картинку, чем полная.
+
+        :return: прямоугольник клетки в координатах поверхности
+        """
+        surface = self.surface
+        cell_rect = self._cell_rect(row, col)
+        cell_val = self.board[row][col]
+        surface.set_clip(cell_rect)
+
+        pygame.draw.rect(surface, self.theme["board_bg"], cell_rect)
+        if cell_val == 1:
+            pygame.draw.rect(surface, (160, 160, 160), cell_rect, border_radius=5)
+        elif cell_val == 2:
+            self.draw_text(surface, "A", cell_rect)
+        elif cell_val == 3:
+            self.draw_text(surface, "B", cell_rect)
+
+        labels = self.cell_size >= LABEL_CELL_SIZE
+        if cell_val not in (2, 3):
+            for wave, overlay, label_y in ((self.wave_start, "start", 2), (self.wave_finish, "finish", 20)):
+                if not wave:
+                    continue
+                data = wave[row][col]
+                if data is None:
+                    continue
+                composite_value, direction = data
+                if labels:
+                    text_surf = self._label(f"{composite_value}", self._font_small)
+                    surface.blit(text_surf, text_surf.get_rect(topright=(cell_rect.right - 2, cell_rect.y + label_y)))
+                surface.blit(self._overlays[overlay], cell_rect)
+                if direction and labels:
+                    arrow_surf = self._label(ARROW_MAP.get(direction, ""), self._font_small)
+                    surface.blit(arrow_surf, arrow_surf.get_rect(center=cell_rect.center))
+
+        if cell_val == 4:
+            surface.blit(self._overlays["trace"], cell_rect)
+        elif cell_val == 5:
+            surface.blit(self._overlays["path"], cell_rect)
+            arrow = self.final_path_arrows.get((row, col))
+            if arrow and labels:
+                arrow_surf = self._label(arrow, self._font_big)
+                arrow_rect = arrow_surf.get_rect()
+                arrow_rect.centerx = cell_rect.centerx
+                arrow_rect.centery = cell_rect.centery - 2
+                surface.blit(arrow_surf, arrow_rect)
+
+        pygame.draw.rect(surface, self.theme["grid_color"], cell_rect, 1)
+        surface.set_clip(None)
+        return cell_rect
+
+    def _raster_palette(self):
+        """
+        Цвета кодов растра, смешанные так же, как полупрозрачные заливки детального режима.
+        """
+        def blend(base, color, alpha):
+            return tuple(round(b + (c - b) * alpha / 255) for b, c in zip(base, color))
+
+        bg = self.theme["board_bg"]
+        start = blend(bg, (200, 255, 200), 100)
+        finish = blend(bg, (200, 220, 255), 100)
+        return [bg, (160, 160, 160), (0, 150, 0), (0, 90, 200),
+                blend(bg, (255, 255, 0), 128), blend(bg, (255, 165, 0), 128),
+                start, finish, blend(start, (200, 220, 255), 100)]
+
+    def _raster_code(self, row, col):
+        value = self.board[row][col]
+        if value != 0:
+            return value
+        in_start = bool(self.wave_start) and self.wave_start[row][col] is not None
+        in_finish = bool(self.wave_finish) and self.wave_finish[row][col] is not None
+        if in_start and in_finish:
+            return WAVE_BOTH
+        if in_start:
+            return WAVE_START
+        return WAVE_FINISH if in_finish else 0
+
+    def _wave_mask(self, wave):
+        import numpy as np
+        labels = getattr(wave, "labels", None)
+        if isinstance(labels, np.ndarray):
+            return labels >= 0
+        cells = (data is not None for row in wave for data in row)
+        return np.fromiter(cells, dtype=bool, count=self.rows * self.cols).reshape(self.rows, self.cols)
+
+    def _build_raster(self):
+        """Массив кодов всех клеток; дальше он обновляется только в изменившихся клетках."""
+        import numpy as np
+        codes = np.frombuffer(self.board.data, dtype=np.uint8).reshape(self.rows, self.cols).copy()
+        free = codes == 0
+        in_start = self._wave_mask(self.wave_start) if self.wave_start else None
+        in_finish = self._wave_mask(self.wave_finish) if self.wave_finish else None
+        if in_start is not None:
+            codes[free & in_start] = WAVE_START
+        if in_finish is not None:
+            codes[free & in_finish] = WAVE_FINISH
+            if in_start is not None:
+                codes[free & in_start & in_finish] = WAVE_BOTH
+        return codes
+
+    def _render_raster(self, cells=None):
+        """
+        Выводит видимую часть поля растром: при масштабе меньше пикселя на клетку
+        блоки клеток сжимаются в пиксель по приоритету кодов (_RASTER_PRIORITY).
+
+        :param cells: изменившиеся клетки; если окно просмотра прежнее, пересчитываются
+                      только их блоки, иначе (или при None) – весь видимый растр
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            self._render_sampled()
+            return
+        if self._raster is None:
+            self._raster = self._build_raster()
+        row0, row1, col0, col1 = self.visible_range()
+        block = max(1, math.ceil(1 / self.scale))
+        key = (row0, row1, col0, col1, block, self.scale)
+
+        rank = np.zeros(len(_RASTER_PRIORITY), dtype=np.uint8)
+        rank[_RASTER_PRIORITY] = np.arange(len(_RASTER_PRIORITY), dtype=np.uint8)
+        colors = np.array(self._raster_palette(), dtype=np.uint8)[_RASTER_PRIORITY]
+        if cells is not None and self._pooled is not None and self._pooled[0] == key:
+            _, pooled, bitmap = self._pooled
+            pixels = pygame.PixelArray(bitmap)
+            for row, col in cells:
+                if row0 <= row < row1 and col0 <= col < col1:
+                    br = (row - row0) // block
+                    bc = (col - col0) // block
+                    r = row0 + br * block
+                    c = col0 + bc * block
+                    pooled[br, bc] = rank[self._raster[r:min(r + block, row1), c:min(c + block, col1)]].max()
+                    pixels[bc, br] = tuple(colors[pooled[br, bc]])
+            del pixels
+        else:
+            view = rank[self._raster[row0:row1, col0:col1]]
+            if block > 1:
+                height = -(-view.shape[0] // block) * block
+                width = -(-view.shape[1] // block) * block
+                view = np.pad(view, ((0, height - view.shape[0]), (0, width - view.shape[1])))
+                view = view.reshape(height // block, block, width // block, block).max(axis=(1, 3))
+            bitmap = pygame.surfarray.make_surface(colors[view].transpose(1, 0, 2))
+            self._pooled = (key, view, bitmap)
+
+        size = (round((col1 - col0) * self.scale), round((row1 - row0) * self.scale))
+        scaled = pygame.transform.scale(bitmap, (max(1, size[0]), max(1, size[1])))
+        self._clear_surface()
+        self.surface.blit(scaled, (round((col0 - self.origin_col) * self.scale),
+                                   round((row0 - self.origin_row) * self.scale)))
+
+    def _render_sampled(self):
+        # Без NumPy растр рисуется прямоугольниками по одной клетке из каждого блока.
+        palette = self._raster_palette()
+        row0, row1, col0, col1 = self.visible_range()
+        step = max(1, math.ceil(1 / self.scale))
+        size = max(1, round(step * self.scale))
+        self._clear_surface()
+        for row in range(row0, row1, step):
+            y = round((row - self.origin_row) * self.scale)
+            for col in range(col0, col1, step):
+                code = self._raster_code(row, col)
+                if code:
+                    x = round((col - self.origin_col) * self.scale)
+                    self.surface.fill(palette[code], (x, y, size, size))
 
     def draw_text(self, screen, text, rect):
-        font = pygame.font.SysFont("Segoe UI", self.cell_size - 4)
-        text_surf = font.render(text, True, (0, 0, 0))
+        text_surf = self._label(text, get_font(max(1, self.cell_size - 4)))
         text_rect = text_surf.get_rect(center=rect.center)
         screen.blit(text_surf, text_rect)
 
     def handle_click(self, pos, mode, combined_step):
-        col = (pos[0] - self.rect.x) // self.cell_size
-        row = (pos[1] - self.rect.y) // self.cell_size
-        if row < 0 or row >= self.rows or col < 0 or col >= self.cols:
+        self.last_edit = None
+        cell = self.cell_at(pos)
+        if cell is None:
             return mode, combined_step
+        row, col = cell
         if mode == "obstacle":
             if self.board[row][col] in (2, 3):
                 return mode, combined_step
             self.board[row][col] = 1 if self.board[row][col] == 0 else 0
+            self.last_edit = (row, col)
         elif mode == "combined":
             if combined_step == "start" and self.board[row][col] == 0:
                 self.board[row][col] = 2
@@ -121,9 +573,58 @@ class Board:
                 mode, combined_step = None, None
         return mode, combined_step
 
+    def layer_boards(self):
+        """
+        :return: список слоёв поля; на месте текущего – self.board
+        (его могут заменить целиком, например при очистке)
+        """
+        layers = list(self.layers)
+        layers[self.active_layer] = self.board
+        return layers
+
+    def set_layers(self, layers, preferred=None):
+        """
+        Заменяет слои поля (Grid размера поля) и показывает слой 0.
+
+        :param preferred: предпочтительные направления слоёв или None
+        """
+        self.layers = list(layers)
+        self.preferred = list(preferred or [None] * len(self.layers))
+        self.layer_waves = None
+        self.active_layer = 0
+        self.board = self.layers[0]
+
+    def add_layer(self):
+        """
+        Добавляет пустой слой; предпочтительные направления слоёв чередуются.
+        """
+        self.layers = self.layer_boards()
+        self.layers.append(Grid(self.rows, self.cols))
+        self.preferred.append("V" if self.preferred[-1] == "H" else "H")
+        self.layer_waves = None
+        return len(self.layers) - 1
+
+    def select_layer(self, index):
+        """
+        Показывает слой index вместе с его волнами, если они есть.
+        """
+        self.layers = self.layer_boards()
+        self.active_layer = index
+        self.board = self.layers[index]
+        if self.layer_waves is not None:
+            self.wave_start, self.wave_finish = self.layer_waves[index]
+
     def update_size(self, new_size):
-        self.grid_size = new_size
-        self.rows = new_size
-        self.cols = new_size
-        self.cell_size = self.rect.width // self.cols
-        self.board = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
+        """
+        :param new_size: сторона квадратного поля или (rows, cols)
+        """
+        self.rows, self.cols = board_dimensions(new_size)
+        self.grid_size = max(self.rows, self.cols)
+        self.board = Grid(self.rows, self.cols)
+        self.set_layers([self.board])
+        # Волны прежнего поля другого размера показывать нельзя.
+        self.wave_start = None
+        self.wave_finish = None
+        self.final_path_arrows = {}
+        self.fit_view()
+        self.invalidate()
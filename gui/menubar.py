@@ -16,17 +16,25 @@ class MenuBar:
                 ("Очистить всё", None),
                 ("Очистить преп.", None),
                 ("Очистить A/B", None),
-                ("Размер", None)
+                ("Размер", None),
+                ("Добавить слой", None),
+                ("След. слой", None)
             ],
             "Трассировка": [
                 ("Трасс.", None),
                 ("Пошаг", None),
-                ("Стоп", None)
+                ("Стоп", None),
+                ("Профиль", None),
+                ("Записать", None),
+                ("Воспроизвести", None)
             ]
         }
         self.menu_positions = {}
         self.active_menu = None
         self.active_menu_items = []
+        # Область выпадающего списка и подсвеченный пункт на момент последней отрисовки.
+        self.dropdown_rect = None
+        self.hover_index = None
 
     def set_callbacks(self, callbacks):
         # callbacks – словарь, сопоставляющий название пункта меню с функцией
@@ -51,6 +59,9 @@ class MenuBar:
             x_offset += text_rect.width + 2 * padding
         if self.active_menu:
             self.draw_dropdown(screen, self.active_menu)
+        else:
+            self.dropdown_rect = None
+            self.hover_index = None
 
     def draw_dropdown(self, screen, menu_title):
         items = self.menu_items[menu_title]
@@ -63,11 +74,14 @@ class MenuBar:
         dropdown_rect = pygame.Rect(dropdown_x, dropdown_y, dropdown_width, item_height * len(items))
         pygame.draw.rect(screen, self.theme["menu_bg"], dropdown_rect)
         pygame.draw.rect(screen, self.theme["grid_color"], dropdown_rect, 1)
+        self.dropdown_rect = dropdown_rect
+        self.hover_index = None
         self.active_menu_items = []
         for index, (item_text, callback) in enumerate(items):
             item_rect = pygame.Rect(dropdown_x, dropdown_y + index * item_height, dropdown_width, item_height)
             if item_rect.collidepoint(pygame.mouse.get_pos()):
                 pygame.draw.rect(screen, self.theme["menu_hover"], item_rect)
+                self.hover_index = index
             text_surf = font.render(item_text, True, self.theme["menu_text"])
             text_rect = text_surf.get_rect()
             text_rect.centery = item_rect.centery
@@ -75,6 +89,15 @@ class MenuBar:
             screen.blit(text_surf, text_rect)
             self.active_menu_items.append((item_text, item_rect, callback))
 
+    def hovered_item(self, pos):
+        """
+        Номер пункта открытого списка под курсором или None.
+        """
+        for index, (_, item_rect, _) in enumerate(self.active_menu_items):
+            if item_rect.collidepoint(pos):
+                return index
+        return None
+
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             pos = event.pos
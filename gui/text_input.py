@@ -24,10 +24,19 @@ class TextInput:
                 self.text += event.unicode
 
     def update(self, dt):
+        """
+        :return: True, если курсор мигнул и поле нужно перерисовать
+        """
         self.time_accumulator += dt
         if self.time_accumulator >= self.cursor_switch_ms:
             self.cursor_visible = not self.cursor_visible
             self.time_accumulator %= self.cursor_switch_ms
+            return True
+        return False
+
+    def time_to_blink(self):
+        """Миллисекунды до следующего переключения курсора."""
+        return max(1, self.cursor_switch_ms - self.time_accumulator)
 
     def draw(self, screen):
         bg_color = self.active_color if self.active else self.base_color
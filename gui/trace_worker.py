@@ -0,0 +1,75 @@
+import queue
+import threading
+import time
+
+from algorithm.incremental import IncrementalTracer
+
+
+class TraceWorker(threading.Thread):
+    """
+    Трассировка в фоновом потоке, чтобы окно не замирало на больших полях.
+
+    Поток не трогает Board: прогресс и новые клетки волн он кладёт в очередь messages,
+    а цикл отрисовки забирает их методом poll. Сообщения:
+        ("progress", iteration, cells_labelled, new_start, new_finish) – клетки волн,
+            помеченные с прошлого сообщения, списки (r, c, label, direction), как у
+            step_by_step_trace(deltas=True); их дописывает Board.apply_wave_delta;
+        ("done", tracer) – трассировка завершена, tracer – IncrementalTracer;
+        ("cancelled", None) – остановлена через cancel;
+        ("error", message) – исключение в потоке.
+    """
+
+    def __init__(self, grid, start, finish, direction_order=None, snapshot_interval=0.2):
+        """
+        :param grid: поле для трассировки (A и B уже заменены на 0)
+        :param snapshot_interval: как часто (с) отправлять новые клетки волн; каждое
+                                  сообщение – ещё и перерисовка, поэтому не на каждой итерации
+        """
+        super().__init__(daemon=True)
+        self.tracer = IncrementalTracer(grid, start, finish, direction_order=direction_order)
+        self.snapshot_interval = snapshot_interval
+        self.messages = queue.Queue()
+        self.cancel_event = threading.Event()
+        self._last_snapshot = 0.0
+        # Позиции в очередях волн, до которых клетки уже отправлены окну.
+        self._sent = (0, 0)
+
+    def run(self):
+        try:
+            self.tracer.trace(progress=self._progress, cancel=self.cancel_event)
+        except Exception as e:
+            self.messages.put(("error", str(e)))
+            return
+        if self.tracer.cancelled:
+            self.messages.put(("cancelled", None))
+        else:
+            self.messages.put(("done", self.tracer))
+
+    def _progress(self, iteration, cells_labelled):
+        now = time.perf_counter()
+        if now - self._last_snapshot < self.snapshot_interval:
+            return
+        self._last_snapshot = now
+        # Отправляются только клетки, помеченные с прошлого сообщения: матрицы волн
+        # не копируются, и сообщение стоит столько, сколько клеток в новых фронтах.
+        flat_start, flat_finish = self.tracer.flat_start, self.tracer.flat_finish
+        new_start = flat_start.cells(self._sent[0], flat_start.tail)
+        new_finish = flat_finish.cells(self._sent[1], flat_finish.tail)
+        self._sent = (flat_start.tail, flat_finish.tail)
+        self.messages.put(("progress", iteration, cells_labelled, new_start, new_finish))
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def poll(self):
+        """
+        Забирает накопившиеся сообщения без ожидания.
+
+        :return: список сообщений
+        """
+        messages = []
+        while True:
+            try:
+                messages.append(self.messages.get_nowait())
+            except queue.Empty:
+                return messages
@@ -3,10 +3,16 @@ import tkinter as tk
 from tkinter import filedialog, simpledialog
 from gui.buttons import Button
 from gui.text_input import TextInput
-from gui.board import Board
+from gui.board import Board, parse_board_size
 from gui.menubar import MenuBar
 from gui.file_manager import FileManager
-from gui.tracer import Tracer
+from algorithm import TraceStats, Tracer, find_endpoints, prepare_trace_grid, full_path, path_arrows
+from algorithm.cache import RouteCache, route_key
+from algorithm.connectivity import ConnectivityIndex
+from algorithm.grid import FREE, FINISH, OBSTACLE, START, Grid
+from algorithm.layers import LayeredTracer, layered_endpoints, prepare_layered_grid
+from algorithm.recording import Replay, record_trace
+from gui.trace_worker import TraceWorker
 
 class MainWindow:
     def __init__(self, width=800, height=600, grid_size=8):
@@ -17,6 +23,13 @@ class MainWindow:
         self.screen = pygame.display.set_mode((self.width, self.height))
         pygame.display.set_caption("Интерфейс трассировки")
         self.clock = pygame.time.Clock()
+        # Окно перерисовывается только после изменений: needs_redraw – нужно собрать кадр,
+        # dirty_rects – области экрана к обновлению, full_redraw – обновить всё окно.
+        self.needs_redraw = True
+        self.full_redraw = True
+        self.dirty_rects = []
+        # Поле сдвигается перетаскиванием правой кнопкой мыши.
+        self.panning = False
 
         self.theme = {
             "background": (240, 240, 240),
@@ -60,6 +73,23 @@ class MainWindow:
 
         self.step_mode = False
         self.step_generator = None
+        # Инкрементальный трассировщик последней трассировки: правки препятствий
+        # пересчитывают волны без полного перезапуска.
+        self.incremental = None
+        # Фоновая трассировка (TraceWorker) или None.
+        self.trace_worker = None
+        # Кэш результатов трассировки по содержимому поля; trace_key – ключ идущей трассировки,
+        # retrace_on_edit – показан результат без трассировщика (из кэша или по индексу
+        # связности), поэтому правка поля запускает трассировку заново.
+        self.route_cache = RouteCache(max_entries=32)
+        self.trace_key = None
+        self.retrace_on_edit = False
+        # Индекс связности поля (строится при первой трассировке, обновляется правками препятствий).
+        self.connectivity = None
+        # Стоимость перехода между слоями многослойного поля.
+        self.via_cost = 3
+        # Воспроизводимая запись трассировки (algorithm.recording.Replay) или None.
+        self.replay = None
 
         self.buttons = []
         self.mode_buttons = {}
@@ -75,10 +105,16 @@ class MainWindow:
             "Очистить преп.": self.clear_obstacles,
             "Очистить A/B": self.clear_startend,
             "Размер": self.activate_size_input,
+            "Добавить слой": self.add_layer,
+            "След. слой": self.next_layer,
             "Трасс.": self.start_tracing,
             "Пошаг. режим": self.activate_step_mode,
             "Шаг": self.perform_step,
-            "Убрать тр." : self.clear_tracing()
+            "Стоп": self.stop_tracing,
+            "Профиль": self.profile_tracing,
+            "Записать": self.record_tracing,
+            "Воспроизвести": self.open_replay,
+            "Убрать тр.": self.clear_tracing
         }
         self.menu_bar.set_callbacks(menu_callbacks)
 
@@ -135,25 +171,18 @@ class MainWindow:
                              btn_clear_trace, btn_step_mode, btn_step])
 
     def activate_step_mode(self):
-        start = None
-        finish = None
-        for r in range(self.board.rows):
-            for c in range(self.board.cols):
-                if self.board.board[r][c] == 2:
-                    start = (r, c)
-                elif self.board.board[r][c] == 3:
-                    finish = (r, c)
-        if not start or not finish:
+        if len(self.board.layers) > 1:
+            self.set_status("Пошаговый режим доступен только для однослойного поля")
+            return
+        prop_grid, start, finish = prepare_trace_grid(self.board.board)
+        if prop_grid is None:
             self.set_status("Не заданы и старт, и финиш")
             return
 
-        # Копия поля
-        prop_grid = [row.copy() for row in self.board.board]
-        prop_grid[start[0]][start[1]] = 0
-        prop_grid[finish[0]][finish[1]] = 0
-
-        tracer = Tracer(prop_grid)
-        self.step_generator = tracer.step_by_step_trace(start, finish)
+        tracer = Tracer(prop_grid, direction_order=self.direction_order)
+        # Генератор отдаёт только новые клетки шага: поле дорисовывает их без сравнения волн целиком.
+        self.step_generator = tracer.step_by_step_trace(start, finish, deltas=True)
+        self.board.start_wave_deltas()
         self.step_mode = True
         self.set_status("Пошаговый режим трассировки включён. Нажмите 'Шаг'.")
 
@@ -163,62 +192,28 @@ class MainWindow:
             return
 
         try:
-            iteration, wave_start, wave_finish, meeting = next(self.step_generator)
-            self.board.wave_start = wave_start
-            self.board.wave_finish = wave_finish
-
-            self.screen.fill(self.theme["background"])
-            self.board.draw(self.screen)
-            for button in self.buttons:
-                button.draw(self.screen)
-            if self.text_input:
-                self.text_input.draw(self.screen)
-            self.draw_status_bar()
-            self.menu_bar.draw(self.screen)
-            pygame.display.flip()
+            iteration, new_start, new_finish, meeting = next(self.step_generator)
+            self.board.apply_wave_delta(new_start, new_finish)
+            wave_start = self.board.wave_start
+            wave_finish = self.board.wave_finish
 
             self.set_status(f"Итерация {iteration} выполнена.")
             if meeting:
                 self.set_status(f"Встреча волн в клетке {meeting}. Трассировка завершена.")
-                start = None
-                finish = None
-                for r in range(self.board.rows):
-                    for c in range(self.board.cols):
-                        if self.board.board[r][c] == 2:
-                            start = (r, c)
-                        elif self.board.board[r][c] == 3:
-                            finish = (r, c)
+                start, finish = find_endpoints(self.board.board)
                 if start is None or finish is None:
                     self.set_status("Старт и Финиш не найдены")
                     return
-                path_s = Tracer.reconstruct_path(wave_start, start, meeting)
-                path_f = Tracer.reconstruct_path(wave_finish, finish, meeting)
-                path_f.reverse()
-                full_path = path_s + path_f[1:]
-
-                final_path_arrows = {}
-                for i in range(1, len(full_path)):
-                    r1, c1 = full_path[i - 1]
-                    r2, c2 = full_path[i]
-                    if r2 == r1 - 1:
-                        arrow = "↑"
-                    elif r2 == r1 + 1:
-                        arrow = "↓"
-                    elif c2 == c1 + 1:
-                        arrow = "→"
-                    elif c2 == c1 - 1:
-                        arrow = "←"
-                    else:
-                        arrow = ""
-                    final_path_arrows[full_path[i]] = arrow
+                full_path_cells = full_path(wave_start, wave_finish, start, finish, meeting)
+                final_path_arrows = path_arrows(full_path_cells)
 
                 self.board.final_path_arrows = final_path_arrows
 
-                for (r, c) in full_path:
+                for (r, c) in full_path_cells:
                     if self.board.board[r][c] not in (2, 3):
                         self.board.board[r][c] = 5  # значение 5 для финального пути
 
-                path_length = len(full_path) - 1
+                path_length = len(full_path_cells) - 1
                 self.set_status(f"Путь найден, сумма клеток пути: {path_length}")
                 self.step_mode = False
                 self.step_generator = None
@@ -235,20 +230,23 @@ class MainWindow:
         """
         self.board.wave_start = None
         self.board.wave_finish = None
-        for r in range(self.board.rows):
-            for c in range(self.board.cols):
-                if self.board.board[r][c] in (4, 5):
-                    self.board.board[r][c] = 0
+        self.board.layer_waves = None
+        self.drop_trace()
+        self.clear_path_marks()
         self.set_status("Трассировка убрана")
 
+    def clear_path_marks(self):
+        for layer in self.board.layer_boards():
+            layer.replace(4, FREE)
+            layer.replace(5, FREE)
+
     def clear_startend(self):
         """
         Убирает A и B, а также трассировку.
         """
-        for r in range(self.board.rows):
-            for c in range(self.board.cols):
-                if self.board.board[r][c] in (2, 3):
-                    self.board.board[r][c] = 0
+        for layer in self.board.layer_boards():
+            layer.replace(START, FREE)
+            layer.replace(FINISH, FREE)
         self.clear_tracing()
         self.current_mode = None
         self.combined_step = None
@@ -258,33 +256,42 @@ class MainWindow:
         """
         Полностью очищает поле, включая путь и волны.
         """
-        self.board.board = [[0 for _ in range(self.board.cols)] for _ in range(self.board.rows)]
+        self.board.set_layers([Grid(self.board.rows, self.board.cols) for _ in self.board.layers],
+                              self.board.preferred)
         self.board.wave_start = None
         self.board.wave_finish = None
+        self.drop_trace()
+        self.connectivity = None
         self.current_mode = None
         self.combined_step = None
         self.set_status("Поле очищено")
 
     def clear_obstacles(self):
-        for r in range(self.board.rows):
-            for c in range(self.board.cols):
-                if self.board.board[r][c] == 1:
-                    self.board.board[r][c] = 0
+        for layer in self.board.layer_boards():
+            layer.replace(OBSTACLE, FREE)
+        self.drop_trace()
+        self.connectivity = None
         self.set_status("Препятствия удалены")
 
     def activate_size_input(self):
-        input_width = 80
+        input_width = 120
         input_height = 35
         new_x = self.width - input_width - 20
         new_y = self.menu_bar_height + 5
-        self.text_input = TextInput(new_x, new_y, input_width, input_height, 20, str(self.board.grid_size))
-        self.set_status("Введите новый размер")
+        rows, cols = self.board.rows, self.board.cols
+        size = str(rows) if rows == cols else f"{rows}x{cols}"
+        self.text_input = TextInput(new_x, new_y, input_width, input_height, 20, size)
+        self.invalidate(self.text_input.rect)
+        self.set_status("Введите новый размер: N или RxC")
 
     def load_board_data(self):
         grid_size, board_data = self.file_manager.load()
         if grid_size and board_data:
-            self.board.update_size(grid_size)
-            self.board.board = board_data
+            # Размер берётся из самого поля: grid_size в файле – только одна сторона.
+            self.board.update_size((board_data.rows, board_data.cols))
+            self.board.set_layers([board_data] + self.file_manager.layers, self.file_manager.preferred)
+            self.drop_trace()
+            self.connectivity = None
             self.current_file = self.file_manager.current_file
             self.set_status("Данные загружены")
 
@@ -293,12 +300,17 @@ class MainWindow:
             root = tk.Tk()
             root.withdraw()
             filename = filedialog.asksaveasfilename(title="Сохранить", defaultextension=".json",
-                                                    filetypes=[("JSON Files", "*.json"), ("CSV Files", "*.csv")])
+                                                    filetypes=[("JSON Files", "*.json"), ("CSV Files", "*.csv"),
+                                                               ("Binary Boards", "*.wtb")])
             if not filename:
                 self.set_status("Сохранение отменено")
                 return
             self.current_file = filename
-        if self.file_manager.save(self.current_file, self.board.grid_size, self.board.board):
+        layers = self.board.layer_boards()
+        preferred = self.board.preferred if len(layers) > 1 else None
+        # Основное поле файла – слой 0, даже если сейчас показан другой слой.
+        if self.file_manager.save(self.current_file, self.board.grid_size, layers[0],
+                                  layers=layers[1:], preferred=preferred):
             self.set_status("Данные сохранены")
 
     def new_file(self):
@@ -311,9 +323,23 @@ class MainWindow:
         self.combined_step = None
         self.set_status("Режим препятствий")
 
+    def add_layer(self):
+        layer = self.board.add_layer()
+        self.clear_tracing()
+        # Индекс связности и инкрементальная волна строятся только для одного слоя.
+        self.connectivity = None
+        self.set_status(f"Добавлен слой {layer + 1} ({self.board.preferred[layer]}), "
+                        f"слоёв: {len(self.board.layers)}")
+
+    def next_layer(self):
+        layer = (self.board.active_layer + 1) % len(self.board.layers)
+        self.board.select_layer(layer)
+        preferred = self.board.preferred[layer] or "—"
+        self.set_status(f"Слой {layer + 1} из {len(self.board.layers)}, направление: {preferred}")
+
     def set_mode_startend(self):
-        if any(cell == 2 for row in self.board.board for cell in row) and \
-                any(cell == 3 for row in self.board.board for cell in row):
+        start, finish = layered_endpoints(self.board.layer_boards())
+        if start is not None and finish is not None:
             self.set_status("Старт и Финиш уже установлены")
             return
         self.current_mode = "combined"
@@ -321,106 +347,449 @@ class MainWindow:
         self.set_status("Выберите старт (A)")
 
     def start_tracing(self):
-        start = None
-        finish = None
-        for r in range(self.board.rows):
-            for c in range(self.board.cols):
-                if self.board.board[r][c] == 2:
-                    start = (r, c)
-                elif self.board.board[r][c] == 3:
-                    finish = (r, c)
-        if start is None or finish is None:
+        if len(self.board.layers) > 1:
+            self.start_layered_tracing()
+            return
+        # Путь прошлой трассировки не должен становиться препятствием.
+        self.clear_path_marks()
+        grid_copy, start, finish = prepare_trace_grid(self.board.board)
+        if grid_copy is None:
             self.set_status("Не заданы и старт, и финиш")
             return
 
-        grid_copy = [row.copy() for row in self.board.board]
-        grid_copy[start[0]][start[1]] = 0
-        grid_copy[finish[0]][finish[1]] = 0
+        self.drop_trace()
+        if self.connectivity is None:
+            # На поле A, B и отметки пути проходимы – препятствия только OBSTACLE.
+            self.connectivity = ConnectivityIndex(self.board.board, blocked=(OBSTACLE,),
+                                                  direction_order=self.direction_order)
+        if not self.connectivity.connected(start, finish):
+            self.show_disconnected()
+            return
+        key = route_key(grid_copy, start, finish, self.direction_order)
+        entry = self.route_cache.get(key)
+        if entry is not None and entry.get("waves") is not None:
+            wave_s, wave_f = entry["waves"]
+            self.show_trace_result(start, finish, wave_s, wave_f, entry["meeting"])
+            self.retrace_on_edit = True
+            self.set_status(self.status_message + " (из кэша)")
+            return
+        self.trace_key = key
+        self.trace_worker = TraceWorker(grid_copy, start, finish, direction_order=self.direction_order)
+        # Прежние волны стираются сразу: дальше поток присылает только новые клетки.
+        self.board.start_wave_deltas()
+        self.trace_worker.start()
+        self.set_status("Трассировка запущена")
+
+    def profile_tracing(self):
+        """
+        Трассировка текущего поля со сбором статистики (algorithm.stats.TraceStats):
+        краткая сводка – в строку состояния; полная статистика – в batch.py --stats.
+        """
+        if len(self.board.layers) > 1:
+            self.set_status("Профилирование доступно только для однослойного поля")
+            return
+        self.clear_path_marks()
+        grid, start, finish = prepare_trace_grid(self.board.board)
+        if grid is None:
+            self.set_status("Не заданы и старт, и финиш")
+            return
+        self.drop_trace()
+        stats = TraceStats()
+        wave_s, wave_f, meet = Tracer(grid, self.direction_order, stats=stats).bidirectional_trace(start, finish)
+        if meet is not None:
+            with stats.timer("reconstruct"):
+                full_path(wave_s, wave_f, start, finish, meet)
+        self.show_trace_result(start, finish, wave_s, wave_f, meet)
+        self.retrace_on_edit = True
+        self.set_status(stats.summary())
+
+    def record_tracing(self):
+        """
+        Выполняет пошаговую трассировку текущего поля и сохраняет её в файл .wtr.
+        """
+        if len(self.board.layers) > 1:
+            self.set_status("Запись доступна только для однослойного поля")
+            return
+        self.clear_path_marks()
+        grid, start, finish = prepare_trace_grid(self.board.board)
+        if grid is None:
+            self.set_status("Не заданы и старт, и финиш")
+            return
+        root = tk.Tk()
+        root.withdraw()
+        filename = filedialog.asksaveasfilename(title="Записать трассировку", defaultextension=".wtr",
+                                                filetypes=[("Trace Recordings", "*.wtr")])
+        if not filename:
+            self.set_status("Запись отменена")
+            return
+        iterations, meeting = record_trace(filename, grid, start, finish, self.direction_order)
+        result = f"встреча в {meeting}" if meeting else "путь не найден"
+        self.set_status(f"Записано итераций: {iterations}, {result}")
 
-        tracer = Tracer(grid_copy, direction_order=self.direction_order)
-        wave_s, wave_f, meet = tracer.bidirectional_trace(start, finish)
+    def open_replay(self):
+        """
+        Открывает запись .wtr: поле записи показывается с волнами нулевой итерации.
+        Стрелки влево/вправо – итерация назад/вперёд, вниз/вверх – на 1% записи,
+        PageDown/PageUp – на 10%, End – конец, Esc – выход из воспроизведения.
+        """
+        root = tk.Tk()
+        root.withdraw()
+        filename = filedialog.askopenfilename(title="Воспроизвести трассировку",
+                                              filetypes=[("Trace Recordings", "*.wtr"), ("All Files", "*.*")])
+        if not filename:
+            return
+        try:
+            replay = Replay(filename)
+        except (OSError, ValueError) as e:
+            self.set_status(f"Ошибка открытия записи: {e}")
+            return
+        self.close_replay()
+        self.update_board_size((replay.rows, replay.cols))
+        self.board.set_layers([replay.grid.copy()])
+        self.replay = replay
+        self.board.start_wave_deltas((replay.wave_start, replay.wave_finish))
+        self.replay_seek(0)
+
+    def close_replay(self):
+        if self.replay is not None:
+            self.replay.close()
+            self.replay = None
+
+    def replay_seek(self, iteration):
+        changed = self.replay.seek(iteration)
+        if changed is None:
+            self.board.start_wave_deltas((self.replay.wave_start, self.replay.wave_finish))
+        else:
+            self.board.mark_wave_cells(changed)
+        message = f"Воспроизведение: итерация {self.replay.iteration} из {self.replay.iterations}"
+        meeting = self.replay.meeting_at(self.replay.iteration)
+        if meeting is not None:
+            message += f", встреча волн в {meeting}"
+        self.set_status(message)
+
+    def handle_replay_event(self, event):
+        """
+        Клавиши перемотки записи; воспроизведение заканчивается, как только поле
+        показывает другие волны (новая трассировка, очистка, загрузка).
+        """
+        if self.replay is None:
+            return
+        if self.board.wave_start is not self.replay.wave_start:
+            self.close_replay()
+            return
+        if event.type != pygame.KEYDOWN or self.text_input:
+            return
+        step = max(1, self.replay.iterations // 100)
+        moves = {
+            pygame.K_RIGHT: 1,
+            pygame.K_LEFT: -1,
+            pygame.K_UP: step,
+            pygame.K_DOWN: -step,
+            pygame.K_PAGEUP: 10 * step,
+            pygame.K_PAGEDOWN: -10 * step,
+        }
+        if event.key in moves:
+            self.replay_seek(self.replay.iteration + moves[event.key])
+        elif event.key == pygame.K_END:
+            self.replay_seek(self.replay.iterations)
+        elif event.key == pygame.K_ESCAPE:
+            self.close_replay()
+            self.set_status("Воспроизведение закрыто")
+
+    def start_layered_tracing(self):
+        """
+        Трассировка многослойного поля с переходами между слоями (LayeredTracer).
+        Выполняется сразу, без фонового потока; правка поля запускает её заново.
+        """
+        self.clear_path_marks()
+        layers = self.board.layer_boards()
+        grid, start, finish = prepare_layered_grid(layers)
+        if grid is None:
+            self.set_status("Не заданы и старт, и финиш")
+            return
+        self.drop_trace()
+        tracer = LayeredTracer(grid, via_cost=self.via_cost, preferred=self.board.preferred,
+                               directions=self.direction_order)
+        path = tracer.trace(start, finish)
+        self.board.layer_waves = [(tracer.wave(layer), None) for layer in range(len(layers))]
+        self.board.select_layer(self.board.active_layer)
+        self.retrace_on_edit = True
+        if path is None:
+            self.set_status("Путь не найден")
+            return
+        for layer, r, c in path:
+            if layers[layer][r][c] not in (2, 3):
+                layers[layer][r][c] = 5
+        self.set_status(f"Путь найден, длина: {len(path) - 1}, стоимость: {tracer.path_cost}, "
+                        f"переходов: {tracer.vias}")
 
+    def poll_tracing(self):
+        """
+        Забирает сообщения фоновой трассировки: снимки волн и прогресс – в поле
+        и строку состояния, готовый результат – как после обычной трассировки.
+        """
+        worker = self.trace_worker
+        if worker is None:
+            return
+        for message in worker.poll():
+            kind = message[0]
+            if kind == "progress":
+                _, iteration, cells_labelled, new_s, new_f = message
+                self.board.apply_wave_delta(new_s, new_f)
+                self.set_status(f"Трассировка: уровень {iteration}, помечено клеток {cells_labelled}")
+                continue
+            self.trace_worker = None
+            if kind == "done":
+                tracer = message[1]
+                self.incremental = tracer
+                path = self.show_trace_result(tracer.start, tracer.finish,
+                                              tracer.wave_start, tracer.wave_finish, tracer.meeting)
+                cells_labelled = tracer.cells_labelled
+                # Волны копируются: IncrementalTracer меняет их на месте при правках поля.
+                self.route_cache.put(self.trace_key, {
+                    "path": path,
+                    "meeting": tracer.meeting,
+                    "cells_expanded": cells_labelled,
+                    "cells_labelled": cells_labelled,
+                    "waves": ([row[:] for row in tracer.wave_start], [row[:] for row in tracer.wave_finish]),
+                })
+            elif kind == "cancelled":
+                self.set_status("Трассировка остановлена")
+            else:
+                self.set_status(f"Ошибка трассировки: {message[1]}")
+            return
+
+    def drop_trace(self):
+        """
+        Забывает результат трассировки и останавливает фоновую, если она идёт.
+        Сообщения остановленного потока больше не читаются.
+        """
+        self.incremental = None
+        self.retrace_on_edit = False
+        if self.trace_worker is not None:
+            self.trace_worker.cancel()
+            self.trace_worker = None
+
+    def retrace_cell(self, row, col):
+        """
+        Инкрементально обновляет трассировку после правки клетки (row, col).
+        Если трассировка ещё идёт в фоне или показан результат из кэша,
+        трассировка запускается заново на изменённом поле.
+        """
+        if self.trace_worker is not None or self.retrace_on_edit:
+            self.start_tracing()
+            return
+        if self.incremental is None:
+            return
+        if not self.connectivity.connected(self.incremental.start, self.incremental.finish):
+            # Правка разрезала поле: волну не гоняем, новая правка запустит трассировку заново.
+            self.drop_trace()
+            self.clear_path_marks()
+            self.show_disconnected()
+            return
+        self.clear_path_marks()
+        wave_s, wave_f, meet = self.incremental.update(row, col, self.board.board[row][col])
+        # Волны меняются на месте: поле перерисует только клетки, затронутые правкой.
+        if self.incremental.changed_cells is not None:
+            self.board.mark_wave_cells(self.incremental.changed_cells)
+        self.show_trace_result(self.incremental.start, self.incremental.finish, wave_s, wave_f, meet)
+
+    def show_disconnected(self):
+        """
+        Ответ индекса связности «пути нет» – без запуска волны.
+        """
+        self.board.wave_start = None
+        self.board.wave_finish = None
+        self.retrace_on_edit = True
+        self.set_status("Путь не найден: A и B в разных областях поля")
+
+    def show_trace_result(self, start, finish, wave_s, wave_f, meet):
+        """
+        :return: найденный путь или None
+        """
         self.board.wave_start = wave_s
         self.board.wave_finish = wave_f
 
         if meet:
             self.set_status(f"Пересечение волн в {meet}")
-            path_s = Tracer.reconstruct_path(wave_s, start, meet)
-            path_f = Tracer.reconstruct_path(wave_f, finish, meet)
-            path_f.reverse()
-            full_path = path_s + path_f[1:]
+            path = full_path(wave_s, wave_f, start, finish, meet)
 
-            for (rr, cc) in full_path:
+            for (rr, cc) in path:
                 if self.board.board[rr][cc] not in (2, 3):
                     self.board.board[rr][cc] = 5
 
-            self.set_status(f"Путь найден, длина: {len(full_path) - 1}")
-        else:
-            self.set_status("Путь не найден")
+            self.set_status(f"Путь найден, длина: {len(path) - 1}")
+            return path
+        self.set_status("Путь не найден")
+        return None
 
-    
     def stop_tracing(self):
-        self.set_status("Трассировка остановлена")
-        print("Трассировка остановлена")
+        if self.trace_worker is None:
+            self.set_status("Трассировка не выполняется")
+            return
+        # Поток остановится после текущей итерации и сообщит об этом через очередь.
+        self.trace_worker.cancel()
+        self.set_status("Остановка трассировки...")
 
     def update_board_size(self, new_size):
+        """
+        :param new_size: сторона квадратного поля или (rows, cols)
+        """
         self.board.update_size(new_size)
-        self.set_status(f"Размер поля: {new_size}x{new_size}")
+        self.drop_trace()
+        self.connectivity = None
+        self.set_status(f"Размер поля: {self.board.rows}x{self.board.cols}")
 
     def set_status(self, message):
         self.status_message = message
+        self.invalidate(self.status_bar_rect)
         print(message)
 
+    def invalidate(self, rect=None):
+        """
+        Помечает окно к перерисовке.
+
+        :param rect: изменившаяся область экрана; None – обновить всё окно
+        """
+        self.needs_redraw = True
+        if rect is None:
+            self.full_redraw = True
+        else:
+            self.dirty_rects.append(pygame.Rect(rect))
+
     def draw_status_bar(self):
         pygame.draw.rect(self.screen, self.theme["status_bg"], self.status_bar_rect, border_radius=5)
         text_surf = self.status_font.render(self.status_message, True, (0, 0, 0))
         self.screen.blit(text_surf, (self.status_bar_rect.x + 10,
                                      self.status_bar_rect.y + (self.status_bar_rect.height - text_surf.get_height()) // 2))
 
+    def wait_events(self):
+        """
+        Возвращает накопившиеся события. Если перерисовывать нечего, ждёт
+        следующего события, не занимая процессор; тайм-аут нужен только для
+        мигания курсора в поле ввода.
+        """
+        if self.needs_redraw:
+            return pygame.event.get()
+        if self.trace_worker is not None:
+            # Во время фоновой трассировки очередь опрашивается каждый кадр.
+            event = pygame.event.wait(1000 // 60)
+        elif self.text_input:
+            event = pygame.event.wait(self.text_input.time_to_blink())
+        else:
+            event = pygame.event.wait()
+        return [event] + pygame.event.get()
+
+    def handle_idle_event(self, event):
+        """
+        Решает, требует ли событие перерисовки. Движение мыши перерисовывает
+        только подсветку открытого меню, и только если подсвеченный пункт сменился.
+        """
+        if event.type == pygame.NOEVENT:
+            return
+        if event.type == pygame.MOUSEMOTION:
+            if self.menu_bar.active_menu and \
+                    self.menu_bar.hovered_item(event.pos) != self.menu_bar.hover_index:
+                self.invalidate(self.menu_bar.dropdown_rect)
+            return
+        if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED):
+            self.invalidate()
+            return
+        # Изменения поля находит Board.draw, поэтому достаточно собрать кадр.
+        self.needs_redraw = True
+
+    def handle_view_event(self, event):
+        """
+        Масштаб и сдвиг поля: колесо мыши – масштаб вокруг курсора,
+        перетаскивание правой кнопкой – сдвиг, Home – поле целиком.
+        """
+        if event.type == pygame.MOUSEWHEEL:
+            pos = pygame.mouse.get_pos()
+            if self.board_rect.collidepoint(pos):
+                self.board.zoom(1.25 if event.y > 0 else 0.8, pos)
+                self.invalidate(self.board_rect)
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 3:
+            self.panning = self.board_rect.collidepoint(event.pos)
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 3:
+            self.panning = False
+        elif event.type == pygame.MOUSEMOTION and self.panning:
+            self.board.pan(*event.rel)
+            self.invalidate(self.board_rect)
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_HOME and not self.text_input:
+            self.board.fit_view()
+            self.invalidate(self.board_rect)
+
+    def draw_frame(self):
+        """
+        Собирает кадр и выводит на экран только изменившиеся области.
+        """
+        self.screen.fill(self.theme["background"])
+        board_rects = self.board.draw(self.screen)
+        for button in self.buttons:
+            button.draw(self.screen)
+        if self.text_input:
+            self.text_input.draw(self.screen)
+        self.draw_status_bar()
+        self.menu_bar.draw(self.screen)
+
+        if self.full_redraw:
+            pygame.display.flip()
+        else:
+            rects = board_rects + self.dirty_rects
+            if rects:
+                pygame.display.update(rects)
+        self.needs_redraw = False
+        self.full_redraw = False
+        self.dirty_rects = []
+
     def run(self):
         running = True
         while running:
+            events = self.wait_events()
             dt = self.clock.tick(60)
             self.highlight_timer += dt
-            self.hover_status = ""
-            mouse_pos = pygame.mouse.get_pos()
 
-            for event in pygame.event.get():
-                if self.menu_bar.handle_event(event):
+            for event in events:
+                self.handle_idle_event(event)
+                active_menu = self.menu_bar.active_menu
+                handled = self.menu_bar.handle_event(event)
+                if handled or self.menu_bar.active_menu != active_menu:
+                    # Выпадающий список перекрывает поле – обновляется всё окно.
+                    self.invalidate()
+                if handled:
                     continue
                 if event.type == pygame.QUIT:
                     running = False
+                self.handle_view_event(event)
+                self.handle_replay_event(event)
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     if self.board_rect.collidepoint(event.pos):
                         self.current_mode, self.combined_step = self.board.handle_click(
                             event.pos, self.current_mode, self.combined_step)
+                        if self.board.last_edit is not None:
+                            row, col = self.board.last_edit
+                            if self.connectivity is not None:
+                                self.connectivity.set_cell(row, col, self.board.board[row][col])
+                            self.retrace_cell(row, col)
                 for button in self.buttons:
                     button.handle_event(event)
                 if self.text_input:
                     self.text_input.handle_event(event)
+                    if event.type == pygame.KEYDOWN:
+                        self.invalidate(self.text_input.rect)
 
             if self.text_input and self.text_input.done:
                 try:
-                    new_size = int(self.text_input.text)
-                    if new_size > 0:
-                        self.update_board_size(new_size)
-                    else:
-                        self.set_status("Введите положительное число")
+                    self.update_board_size(parse_board_size(self.text_input.text))
                 except ValueError:
-                    self.set_status("Неверный ввод")
+                    self.set_status("Неверный ввод: размер N или RxC, например 200x20000")
+                self.invalidate(self.text_input.rect)
                 self.text_input = None
-            if self.text_input:
-                self.text_input.update(dt)
-
-            self.screen.fill(self.theme["background"])
-            self.board.draw(self.screen)
-            for button in self.buttons:
-                button.draw(self.screen)
-            if self.text_input:
-                self.text_input.draw(self.screen)
-            self.draw_status_bar()
-            self.menu_bar.draw(self.screen)
-            pygame.display.flip()
+            if self.text_input and self.text_input.update(dt):
+                self.invalidate(self.text_input.rect)
+            self.poll_tracing()
+
+            if running and self.needs_redraw:
+                self.draw_frame()
         pygame.quit()
         sys.exit()
-
@@ -0,0 +1,110 @@
+"""
+Общие помощники тестов: случайные поля и эталоны – обычный BFS, заливка компонент и Дейкстра.
+"""
+import heapq
+from collections import deque
+
+from algorithm.tracer import DEFAULT_DIRECTIONS
+
+DIAGONAL = DEFAULT_DIRECTIONS + [("UR", -1, 1), ("DR", 1, 1), ("DL", 1, -1), ("UL", -1, -1)]
+
+
+def random_grid(rnd, rows, cols, density):
+    """Поле rows x cols, каждая клетка – препятствие с вероятностью density."""
+    return [[int(rnd.random() < density) for _ in range(cols)] for _ in range(rows)]
+
+
+def random_board(rnd, rows=(1, 12), cols=(2, 12), density=0.3, same=False):
+    """
+    Случайное поле со свободными A и B.
+
+    :param rows: пределы числа строк (включительно)
+    :param cols: пределы числа столбцов; при двух различных A и B в поле должно быть хотя бы две клетки
+    :param same: True – A и B в одной клетке, иначе различны
+    :return: (grid, start, finish)
+    """
+    grid = random_grid(rnd, rnd.randint(*rows), rnd.randint(*cols), density)
+    cells = [(r, c) for r in range(len(grid)) for c in range(len(grid[0]))]
+    if same:
+        start = finish = rnd.choice(cells)
+    else:
+        start, finish = rnd.sample(cells, 2)
+    for r, c in (start, finish):
+        grid[r][c] = 0
+    return grid, start, finish
+
+
+def bfs(grid, origin, directions=DEFAULT_DIRECTIONS):
+    """
+    Обычный BFS: номер клетки – порядок её пометки, направление – ход, которым в неё вошли.
+
+    :return: {(r, c): (label, direction, distance)}
+    """
+    rows, cols = len(grid), len(grid[0])
+    marks = {origin: (0, None, 0)}
+    queue = deque([origin])
+    while queue:
+        r, c = queue.popleft()
+        distance = marks[(r, c)][2]
+        for name, dr, dc in directions:
+            cell = (r + dr, c + dc)
+            if 0 <= cell[0] < rows and 0 <= cell[1] < cols and not grid[cell[0]][cell[1]] and cell not in marks:
+                marks[cell] = (len(marks), name, distance + 1)
+                queue.append(cell)
+    return marks
+
+
+def bfs_distance(grid, start, finish, directions=DEFAULT_DIRECTIONS):
+    """:return: число шагов от start до finish или None, если пути нет"""
+    mark = bfs(grid, start, directions).get(finish)
+    return None if mark is None else mark[2]
+
+
+def flood_components(grid, directions=DEFAULT_DIRECTIONS):
+    """Компонента каждой свободной клетки обычной заливкой: {(r, c): первая клетка компоненты}."""
+    rows, cols = len(grid), len(grid[0])
+    component = {}
+    for cell in ((r, c) for r in range(rows) for c in range(cols)):
+        if grid[cell[0]][cell[1]] or cell in component:
+            continue
+        for reached in bfs(grid, cell, directions):
+            component[reached] = cell
+    return component
+
+
+def dijkstra(source, is_goal, neighbours):
+    """
+    Эталонная Дейкстра на heapq по произвольным состояниям.
+
+    :param source: начальное состояние
+    :param is_goal: is_goal(state) – True для целевого состояния
+    :param neighbours: neighbours(state) – пары (state, cost) допустимых ходов
+    :return: стоимость кратчайшего пути до цели или None
+    """
+    best = {source: 0}
+    heap = [(0, 0, source)]
+    order = 1
+    while heap:
+        distance, _, state = heapq.heappop(heap)
+        if distance > best[state]:
+            continue
+        if is_goal(state):
+            return distance
+        for n, cost in neighbours(state):
+            total = distance + cost
+            if total < best.get(n, total + 1):
+                best[n] = total
+                heapq.heappush(heap, (total, order, n))
+                order += 1
+    return None
+
+
+def assert_path(path, grid, start, finish, length, diagonal=False):
+    """Путь идёт от start до finish за length шагов по свободным соседним клеткам."""
+    assert (path[0], path[-1]) == (start, finish)
+    assert len(path) - 1 == length
+    if diagonal:
+        assert all(max(abs(r1 - r2), abs(c1 - c2)) == 1 for (r1, c1), (r2, c2) in zip(path, path[1:]))
+    else:
+        assert all(abs(r1 - r2) + abs(c1 - c2) == 1 for (r1, c1), (r2, c2) in zip(path, path[1:]))
+    assert not any(grid[r][c] for r, c in path)
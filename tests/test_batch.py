@@ -0,0 +1,37 @@
+"""
+Пакетная трассировка каталога: сводка по статусам и JSON-строка на каждый файл.
+"""
+import io
+import json
+
+import pytest
+
+from batch import collect_board_files, run_batch
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_batch_directory(tmp_path, workers):
+    (tmp_path / "solvable.csv").write_text("2,0,0\n1,1,0\n3,0,0\n")
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "unsolvable.json").write_text(json.dumps(
+        {"grid_size": 3, "board": [[2, 1, 3], [0, 1, 0], [0, 1, 0]]}))
+    (tmp_path / "malformed.json").write_text('{"grid_size": 3, "board": [[2, 0')
+    (tmp_path / "notes.txt").write_text("не поле")
+
+    files = collect_board_files([str(tmp_path)])
+    assert [name[len(str(tmp_path)) + 1:] for name in files] == [
+        "malformed.json", "nested/unsolvable.json", "solvable.csv"]
+
+    out = io.StringIO()
+    counts = run_batch(files, out, workers=workers)
+    assert counts == {"error": 1, "unroutable": 1, "routed": 1}
+
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [result["file"] for result in results] == files
+    malformed, unsolvable, solvable = results
+    assert malformed["status"] == "error" and malformed["error"]
+    assert unsolvable["status"] == "unroutable"
+    assert (unsolvable["path_length"], unsolvable["meeting_point"]) == (None, None)
+    assert solvable["status"] == "routed"
+    assert solvable["path_length"] == 6
+    assert solvable["cells_labelled"] >= 7
@@ -0,0 +1,65 @@
+"""
+Двоичный формат .wtb: запись и чтение при каждом сжатии, ошибки заголовка.
+"""
+import pytest
+
+from algorithm.binboard import COMPRESSIONS, read_board, write_board
+from algorithm.grid import Grid
+from algorithm.tracer import Tracer
+
+ROWS = [
+    [0, 0, 1, 0, 0, 0, 0],
+    [0, 1, 1, 0, 1, 1, 0],
+    [2, 0, 0, 0, 0, 1, 3],
+    [1, 1, 1, 1, 0, 0, 0],
+]
+NETS = [{"name": "n1", "start": [2, 0], "finish": [2, 6]}]
+
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+@pytest.mark.parametrize("compression", sorted(COMPRESSIONS))
+def test_round_trip(tmp_path, compression, use_mmap):
+    grid = Grid.from_rows(ROWS)
+    traced = grid.copy()
+    traced.set(2, 0, 0)
+    traced.set(2, 6, 0)
+    wave_start, wave_finish, _ = Tracer(traced).bidirectional_trace((2, 0), (2, 6))
+    extra = Grid.from_rows([[1 - cell % 2 for cell in row] for row in ROWS])
+
+    filename = tmp_path / f"board_{compression}.wtb"
+    write_board(filename, grid, nets=NETS, waves=(wave_start, wave_finish), compression=compression,
+                layers=[extra], preferred=["H", "V"])
+    data = read_board(filename, use_mmap=use_mmap)
+
+    assert data["grid"] == grid
+    assert data["nets"] == NETS
+    assert data["waves"] == (wave_start, wave_finish)
+    assert data["layers"] == [extra]
+    assert data["preferred"] == ["H", "V"]
+
+
+@pytest.mark.parametrize("compression", sorted(COMPRESSIONS))
+def test_round_trip_without_sections(tmp_path, compression):
+    grid = Grid.from_rows([[0] * 300, [1] * 150 + [0] * 150])
+    filename = tmp_path / "plain.wtb"
+    write_board(filename, grid, compression=compression)
+    data = read_board(filename)
+
+    assert data["grid"] == grid
+    assert (data["nets"], data["waves"], data["layers"], data["preferred"]) == ([], None, [], None)
+
+
+def test_unknown_compression_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Неизвестное сжатие"):
+        write_board(tmp_path / "board.wtb", ROWS, compression="lzma")
+
+
+@pytest.mark.parametrize("content, message", [
+    (b"WTBF", "слишком короткий"),
+    (b"NOPE" + bytes(28), "сигнатура"),
+])
+def test_malformed_header(tmp_path, content, message):
+    filename = tmp_path / "bad.wtb"
+    filename.write_bytes(content)
+    with pytest.raises(ValueError, match=message):
+        read_board(filename)
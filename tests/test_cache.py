@@ -0,0 +1,94 @@
+"""
+Кэш маршрутов: ключ по содержимому поля, порядок вытеснения LRU и хранилище sqlite.
+"""
+import pytest
+
+from algorithm.cache import RouteCache, route_key
+from algorithm.grid import Grid
+from algorithm.tracer import DEFAULT_DIRECTIONS
+
+GRID = [
+    [0, 0, 1],
+    [0, 0, 0],
+    [1, 0, 0],
+]
+
+
+def entry(n):
+    return {"path": [(0, 0), (0, n)], "meeting": (0, n), "cells_expanded": n, "cells_labelled": n}
+
+
+def test_key_changes_with_passability():
+    key = route_key(GRID, (0, 0), (2, 2))
+    assert route_key(Grid.from_rows(GRID), (0, 0), (2, 2)) == key
+    for r in range(3):
+        for c in range(3):
+            edited = [list(row) for row in GRID]
+            edited[r][c] = 1 - edited[r][c]
+            assert route_key(edited, (0, 0), (2, 2)) != key, (r, c)
+    # Код препятствия не важен – только проходимость.
+    relabelled = [[4 if cell else 0 for cell in row] for row in GRID]
+    assert route_key(relabelled, (0, 0), (2, 2)) == key
+
+
+def test_key_changes_with_query():
+    key = route_key(GRID, (0, 0), (2, 2))
+    assert route_key(GRID, (2, 2), (0, 0)) != key
+    assert route_key(GRID, (0, 0), (2, 2), direction_order=DEFAULT_DIRECTIONS[::-1]) != key
+    assert route_key(GRID, (0, 0), (2, 2), direction_order=DEFAULT_DIRECTIONS) == key
+    assert route_key(GRID, (0, 0), (2, 2), mode="astar") != key
+    # Тот же набор клеток другой формы – другой ключ.
+    assert route_key([[0] * 9], (0, 0), (0, 8)) != route_key([[0] * 3] * 3, (0, 0), (0, 8))
+
+
+def test_lru_eviction_order():
+    cache = RouteCache(max_entries=3)
+    for n in range(3):
+        cache.put(f"k{n}", entry(n))
+    # Чтение k0 делает его самым свежим: вытесняется k1.
+    assert cache.get("k0") == entry(0)
+    cache.put("k3", entry(3))
+    assert list(cache.memory) == ["k2", "k0", "k3"]
+    assert cache.get("k1") is None
+    cache.put("k2", entry(2))
+    cache.put("k4", entry(4))
+    assert list(cache.memory) == ["k3", "k2", "k4"]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_sqlite_round_trip(tmp_path):
+    stored = dict(entry(2), waves=([[None]], [[None]]))
+    first = RouteCache(directory=tmp_path)
+    try:
+        first.put("key", stored)
+        assert first.get("key") is stored
+    finally:
+        first.close()
+
+    second = RouteCache(max_entries=1, directory=tmp_path)
+    try:
+        # С диска запись приходит без волн, клетки – снова кортежи.
+        assert second.get("key") == entry(2)
+        assert "key" in second.memory
+        assert second.get("missing") is None
+        second.clear()
+    finally:
+        second.close()
+
+    third = RouteCache(directory=tmp_path)
+    try:
+        assert third.get("key") is None
+    finally:
+        third.close()
+
+
+@pytest.mark.parametrize("max_entries", [1, 2])
+def test_disk_keeps_evicted_entries(tmp_path, max_entries):
+    cache = RouteCache(max_entries=max_entries, directory=tmp_path)
+    try:
+        for n in range(3):
+            cache.put(f"k{n}", entry(n))
+        assert "k0" not in cache.memory
+        assert cache.get("k0") == entry(0)
+    finally:
+        cache.close()
@@ -0,0 +1,46 @@
+"""
+Индекс связности после правок клеток совпадает с заливкой поля заново.
+"""
+import random
+
+import pytest
+from conftest import DIAGONAL, flood_components, random_grid
+
+from algorithm.connectivity import ConnectivityIndex
+from algorithm.tracer import DEFAULT_DIRECTIONS
+
+
+def assert_matches_flood(index, grid, directions):
+    component = flood_components(grid, directions)
+    cells = [(r, c) for r in range(len(grid)) for c in range(len(grid[0]))]
+    for a in cells:
+        assert (index.component(a) is None) == (a not in component), a
+    for a in cells:
+        for b in cells:
+            expected = a in component and b in component and component[a] == component[b]
+            assert index.connected(a, b) == expected, (a, b)
+
+
+@pytest.mark.parametrize("directions", [DEFAULT_DIRECTIONS, DIAGONAL])
+@pytest.mark.parametrize("seed", range(25))
+def test_random_edits_match_flood_fill(seed, directions):
+    rnd = random.Random(seed)
+    rows, cols = rnd.randint(1, 8), rnd.randint(1, 8)
+    grid = random_grid(rnd, rows, cols, 0.4)
+    index = ConnectivityIndex(grid, direction_order=directions)
+    assert_matches_flood(index, grid, directions)
+    for _ in range(25):
+        r, c = rnd.randrange(rows), rnd.randrange(cols)
+        value = rnd.choice((0, 1))
+        grid[r][c] = value
+        index.set_cell(r, c, value)
+        assert_matches_flood(index, grid, directions)
+
+
+def test_blocked_codes():
+    # Для Board.board проходимы A, B и отметки пути – препятствие только 1.
+    index = ConnectivityIndex([[2, 5, 1, 3]], blocked=(1,))
+    assert index.connected((0, 0), (0, 1))
+    assert not index.connected((0, 0), (0, 3))
+    index.set_cell(0, 2, 4)
+    assert index.connected((0, 0), (0, 3))
@@ -0,0 +1,88 @@
+"""
+Потоковый импорт CSV/JSON: совпадение с исходным полем и сообщения об ошибках с номером строки.
+"""
+import json
+
+import pytest
+
+from algorithm.binboard import read_board
+from algorithm.grid import Grid
+from algorithm.importer import convert_board, import_board
+
+ROWS = [
+    [0, 1, 2, 0],
+    [0, 0, 1, 3],
+    [5, 4, 0, 0],
+]
+
+
+def write_csv(path, rows):
+    path.write_text("".join(",".join(map(str, row)) + "\n" for row in rows))
+    return path
+
+
+def test_import_csv(tmp_path):
+    data = import_board(str(write_csv(tmp_path / "board.csv", ROWS)))
+    assert data["board"] == Grid.from_rows(ROWS)
+    assert data["grid_size"] == 4
+
+
+def test_import_json_with_nets(tmp_path):
+    nets = [{"name": "n1", "start": [0, 2], "finish": [1, 3]}]
+    path = tmp_path / "board.json"
+    path.write_text(json.dumps({"grid_size": 4, "rows": 3, "cols": 4, "board": ROWS, "nets": nets}, indent=4))
+    data = import_board(str(path))
+    assert data["board"] == Grid.from_rows(ROWS)
+    assert data["nets"] == nets
+
+
+@pytest.mark.parametrize("compression", ["none", "zlib", "rle"])
+def test_convert_csv_to_wtb(tmp_path, compression):
+    target = tmp_path / "board.wtb"
+    assert convert_board(str(write_csv(tmp_path / "board.csv", ROWS)), str(target), compression) == (3, 4)
+    assert read_board(target)["grid"] == Grid.from_rows(ROWS)
+
+
+@pytest.mark.parametrize("text, message", [
+    ("0,1,0\n0,1\n", "Строка 2: 2 клеток вместо 3"),
+    ("0,1,0\n\n0,7,0\n", "Строка 3: недопустимый код клетки '7'"),
+    ("0,1,0\n0,,1\n", "Строка 2: ожидаются однозначные коды"),
+    ("0,12,0\n", "Строка 1: ожидаются однозначные коды"),
+    # Число запятых верное, но стоят они не между кодами.
+    ("0,1,0\n,01\n", "Строка 2: ожидаются однозначные коды"),
+    ("0,1\n0,1\n01,\n", "Строка 3: ожидаются однозначные коды"),
+    ("00,\n", "Строка 1: ожидаются однозначные коды"),
+    ("0,,1\n", "Строка 1: ожидаются однозначные коды"),
+])
+def test_csv_errors_report_line(tmp_path, text, message):
+    path = tmp_path / "bad.csv"
+    path.write_text(text)
+    with pytest.raises(ValueError, match=message):
+        import_board(str(path))
+    with pytest.raises(ValueError, match=message):
+        convert_board(str(path), str(tmp_path / "bad.wtb"))
+
+
+@pytest.mark.parametrize("board, message", [
+    ([[0, 1, 0], [0, 1, 0], [1, 0]], "Строка 3: 2 клеток вместо 3"),
+    ([[0, 1, 0], [0, 9, 0]], "Строка 2: недопустимый код клетки '9'"),
+])
+def test_json_errors_report_row(tmp_path, board, message):
+    path = tmp_path / "bad.json"
+    path.write_text(json.dumps({"grid_size": 3, "board": board}))
+    with pytest.raises(ValueError, match=message):
+        import_board(str(path))
+
+
+def test_json_dimensions_must_match(tmp_path):
+    path = tmp_path / "bad.json"
+    path.write_text(json.dumps({"rows": 5, "cols": 4, "board": ROWS}))
+    with pytest.raises(ValueError, match="rows = 5"):
+        import_board(str(path))
+
+
+def test_truncated_json_reports_row(tmp_path):
+    path = tmp_path / "bad.json"
+    path.write_text('{"board": [[0, 1], [0, 1')
+    with pytest.raises(ValueError, match="Строка поля 2: неверный формат массива board"):
+        import_board(str(path))
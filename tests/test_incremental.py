@@ -0,0 +1,39 @@
+"""
+Инкрементальная перетрассировка совпадает с полной трассировкой после каждой правки.
+"""
+import random
+
+import pytest
+from conftest import random_board
+
+from algorithm.grid import Grid
+from algorithm.incremental import IncrementalTracer
+from algorithm.tracer import Tracer
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_update_matches_full_retrace(seed):
+    rnd = random.Random(seed)
+    # Каждый пятый запуск – A и B в одной клетке.
+    board, start, finish = random_board(rnd, rows=(2, 12), cols=(2, 12), density=0.25, same=seed % 5 == 0)
+    grid = Grid.from_rows(board)
+
+    tracer = IncrementalTracer(grid, start, finish)
+    tracer.trace()
+    for _ in range(30):
+        r, c = rnd.randrange(grid.rows), rnd.randrange(grid.cols)
+        if (r, c) in (start, finish):
+            continue
+        value = rnd.choice((0, 1))
+        wave_start, wave_finish, meeting = tracer.update(r, c, value)
+        grid.set(r, c, value)
+
+        expected = Tracer(grid.copy()).bidirectional_trace(start, finish)
+        assert (wave_start, wave_finish, meeting) == expected
+
+
+def test_update_endpoint_is_rejected():
+    tracer = IncrementalTracer([[0, 0, 0]], (0, 0), (0, 2))
+    tracer.trace()
+    with pytest.raises(ValueError):
+        tracer.update(0, 0, 1)
@@ -0,0 +1,35 @@
+"""
+Сохранение многослойного поля из окна, когда показан не слой 0.
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+from algorithm.boardio import read_board_file
+from gui.window import MainWindow
+
+
+@pytest.mark.parametrize("extension", ["json", "wtb"])
+def test_save_with_active_layer_keeps_layer_order(tmp_path, extension):
+    pygame.init()
+    window = MainWindow()
+    window.update_board_size((6, 7))
+    window.add_layer()
+    window.board.layers[0][1][1] = 1
+    window.board.layers[0][0][0] = 2
+    window.board.select_layer(1)
+    window.board.board[4][5] = 1
+    window.board.board[5][6] = 3
+
+    window.current_file = str(tmp_path / f"board.{extension}")
+    window.save_board_data()
+    data = read_board_file(window.current_file)
+
+    base = [list(row) for row in data["board"]]
+    extra = [list(row) for row in data["layers"][0]]
+    assert (base[1][1], base[0][0], base[4][5]) == (1, 2, 0)
+    assert (extra[4][5], extra[5][6], extra[1][1]) == (1, 3, 0)
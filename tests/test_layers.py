@@ -0,0 +1,96 @@
+"""
+Многослойная трассировка против эталонной Дейкстры по клеткам (layer, row, col).
+"""
+import random
+
+import pytest
+from conftest import DIAGONAL, dijkstra, random_grid
+
+from algorithm.layers import LayeredGrid, LayeredTracer
+from algorithm.tracer import DEFAULT_DIRECTIONS
+
+
+def move_cost(a, b, via_cost, preferred, wrong_way_cost, directions=DEFAULT_DIRECTIONS):
+    """
+    Стоимость шага a -> b или None, если такой шаг недопустим.
+    """
+    if a[1:] == b[1:] and abs(a[0] - b[0]) == 1:
+        return via_cost
+    if a[0] != b[0]:
+        return None
+    for _, dr, dc in directions:
+        if (a[1] + dr, a[2] + dc) == b[1:]:
+            axis = preferred[a[0]]
+            along = (axis == "H" and dr == 0) or (axis == "V" and dc == 0)
+            return 1 if axis is None or along else 1 + wrong_way_cost
+    return None
+
+
+def layered_distance(layers, start, finish, via_cost, preferred, wrong_way_cost, directions=DEFAULT_DIRECTIONS):
+    """Эталон: Дейкстра по клеткам всех слоёв; ходы – соседи в слое и та же клетка на соседнем слое."""
+    depth, rows, cols = len(layers), len(layers[0]), len(layers[0][0])
+
+    def neighbours(cell):
+        layer, r, c = cell
+        candidates = [(layer, r + dr, c + dc) for _, dr, dc in directions]
+        candidates += [(layer - 1, r, c), (layer + 1, r, c)]
+        for n in candidates:
+            if 0 <= n[0] < depth and 0 <= n[1] < rows and 0 <= n[2] < cols and not layers[n[0]][n[1]][n[2]]:
+                yield n, move_cost(cell, n, via_cost, preferred, wrong_way_cost, directions)
+
+    return dijkstra(start, lambda cell: cell == finish, neighbours)
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_layered_matches_dijkstra(seed):
+    rnd = random.Random(seed)
+    depth, rows, cols = rnd.randint(1, 3), rnd.randint(1, 8), rnd.randint(1, 8)
+    layers = [random_grid(rnd, rows, cols, 0.35) for _ in range(depth)]
+    cells = [(layer, r, c) for layer in range(depth) for r in range(rows) for c in range(cols)]
+    start, finish = rnd.choice(cells), rnd.choice(cells)
+    for layer, r, c in (start, finish):
+        layers[layer][r][c] = 0
+    via_cost = rnd.randint(1, 5)
+    wrong_way_cost = rnd.randint(0, 3)
+    preferred = [rnd.choice(("H", "V", None)) for _ in range(depth)]
+    directions = rnd.sample(DEFAULT_DIRECTIONS, len(DEFAULT_DIRECTIONS))
+    expected = layered_distance(layers, start, finish, via_cost, preferred, wrong_way_cost)
+
+    tracer = LayeredTracer(LayeredGrid.from_layers(layers), via_cost=via_cost, preferred=preferred,
+                           wrong_way_cost=wrong_way_cost, directions=directions)
+    path = tracer.trace(start, finish)
+    assert tracer.path_cost == expected
+    if expected is None:
+        assert path is None
+        return
+    assert (path[0], path[-1]) == (start, finish)
+    assert not any(layers[layer][r][c] for layer, r, c in path)
+    costs = [move_cost(a, b, via_cost, preferred, wrong_way_cost) for a, b in zip(path, path[1:])]
+    assert None not in costs
+    assert sum(costs) == expected
+    assert tracer.vias == sum(a[0] != b[0] for a, b in zip(path, path[1:]))
+
+
+def test_layered_via_around_obstacle():
+    # На слое 0 стена поперёк поля – обход только через слой 1.
+    layers = [[[0, 1, 0], [0, 1, 0]], [[0, 0, 0], [0, 0, 0]]]
+    tracer = LayeredTracer(LayeredGrid.from_layers(layers), via_cost=2)
+    path = tracer.trace((0, 0, 0), (0, 0, 2))
+    assert path == [(0, 0, 0), (1, 0, 0), (1, 0, 1), (1, 0, 2), (0, 0, 2)]
+    assert (tracer.path_cost, tracer.vias) == (6, 2)
+
+
+def test_preferred_axis_with_diagonal_moves():
+    # Имена ходов не из U/R/D/L: ось берётся по смещению, диагональ – всегда поперёк.
+    directions = [("N", -1, 0), ("E", 0, 1), ("S", 1, 0), ("W", 0, -1)] + DIAGONAL[4:]
+    layers = [[[0] * 5 for _ in range(4)], [[0] * 5 for _ in range(4)]]
+    layers[0][1][1] = layers[1][2][3] = 1
+    preferred = ["H", "V"]
+    for start, finish in (((0, 0, 0), (0, 3, 4)), ((1, 3, 0), (0, 0, 4)), ((0, 2, 2), (1, 0, 0))):
+        expected = layered_distance(layers, start, finish, 2, preferred, 3, directions)
+        tracer = LayeredTracer(LayeredGrid.from_layers(layers), via_cost=2, preferred=preferred,
+                               wrong_way_cost=3, directions=directions)
+        path = tracer.trace(start, finish)
+        assert tracer.path_cost == expected
+        costs = [move_cost(a, b, 2, preferred, 3, directions) for a, b in zip(path, path[1:])]
+        assert sum(costs) == expected
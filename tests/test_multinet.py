@@ -0,0 +1,74 @@
+"""
+Многоцепная разводка: откат неудачной перекладки и согласованность общей сетки занятости.
+"""
+import random
+
+import pytest
+from conftest import random_grid
+
+from algorithm.kernel import BLOCKED
+from algorithm.multinet import PIN, ROUTED, MultiNetRouter, Net
+
+
+def assert_consistent(router, result):
+    """Сетка, владельцы клеток и ядро волны совпадают с путями разведённых цепей."""
+    grid = router.grid
+    routed = {}
+    for i, path in router.paths.items():
+        assert result.routed[router.nets[i].name] == path
+        assert all(abs(r1 - r2) + abs(c1 - c2) == 1 for (r1, c1), (r2, c2) in zip(path, path[1:]))
+        for cell in path:
+            if cell not in router.pins:
+                assert cell not in routed, "пути цепей пересекаются"
+                routed[cell] = i
+    for r in range(grid.rows):
+        for c in range(grid.cols):
+            owner = router.owner[r * grid.cols + c]
+            if (r, c) in routed:
+                assert grid.get(r, c) == ROUTED and owner == routed[(r, c)]
+            else:
+                assert grid.get(r, c) != ROUTED and owner == -1
+            if router.kernel is not None:
+                blocked = router.kernel.cells[router.kernel.index((r, c))] == BLOCKED
+                assert blocked == bool(grid.get(r, c)), (r, c)
+
+
+def test_failed_reroute_restores_grid():
+    # Цепь b может пройти только через центр, занятый цепью a, а a некуда переложить:
+    # её обход закрыт выводами b.
+    nets = [Net("a", (1, 0), (1, 2)), Net("b", (0, 1), (2, 1))]
+    router = MultiNetRouter([[0] * 3 for _ in range(3)], nets, ordering="input")
+    result = router.route()
+
+    assert result.failed == {"b": "congested"}
+    assert result.ripups == 0
+    assert result.attempts == 3
+    assert result.routed == {"a": [(1, 0), (1, 1), (1, 2)]}
+    assert router.grid.to_rows() == [[0, PIN, 0], [PIN, ROUTED, PIN], [0, PIN, 0]]
+    assert_consistent(router, result)
+
+
+def test_successful_reroute_moves_blocker():
+    # Цепь a сначала идёт через (1, 1); b нужна эта клетка, a перекладывается через нижний ряд.
+    nets = [Net("a", (1, 0), (1, 2)), Net("b", (0, 1), (2, 1))]
+    grid = [[0] * 3 for _ in range(3)] + [[0] * 3]
+    router = MultiNetRouter(grid, nets, ordering="input")
+    result = router.route()
+    assert_consistent(router, result)
+    assert result.ripups == 1
+    assert result.routed["b"] == [(0, 1), (1, 1), (2, 1)]
+    assert (3, 1) in result.routed["a"]
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_random_boards_stay_consistent(seed):
+    rnd = random.Random(seed)
+    rows, cols = rnd.randint(3, 10), rnd.randint(3, 10)
+    grid = random_grid(rnd, rows, cols, 0.15)
+    cells = [(r, c) for r in range(rows) for c in range(cols)]
+    rnd.shuffle(cells)
+    nets = [Net(f"n{i}", cells[2 * i], cells[2 * i + 1]) for i in range(rnd.randint(2, 6))]
+    router = MultiNetRouter(grid, nets, ordering=rnd.choice(["input", "shortest", "longest"]), max_ripups=2)
+    result = router.route()
+    assert_consistent(router, result)
+    assert len(result.routed) + len(result.failed) == len(nets)
@@ -0,0 +1,75 @@
+"""
+Оракул по ориентирам и трассировка «один ко многим» против обычного BFS.
+"""
+import random
+
+import pytest
+from conftest import DIAGONAL, assert_path, bfs, bfs_distance, random_grid
+
+from algorithm.grid import Grid
+from algorithm.oracle import LandmarkOracle
+from algorithm.tracer import DEFAULT_DIRECTIONS, Tracer
+
+
+@pytest.mark.parametrize("directions", [DEFAULT_DIRECTIONS, DIAGONAL])
+@pytest.mark.parametrize("seed", range(40))
+def test_oracle_matches_bfs(seed, directions):
+    rnd = random.Random(seed)
+    grid = random_grid(rnd, rnd.randint(1, 10), rnd.randint(1, 10), 0.35)
+    oracle = LandmarkOracle(grid, landmarks=rnd.randint(1, 4), direction_order=directions)
+    cells = [(r, c) for r in range(len(grid)) for c in range(len(grid[0]))]
+    # Пары включают занятые клетки, совпадающие клетки и клетки разных компонент.
+    for _ in range(30):
+        a, b = rnd.choice(cells), rnd.choice(cells)
+        distance = bfs_distance(grid, a, b, directions) if not (grid[a[0]][a[1]] or grid[b[0]][b[1]]) else None
+        bound = oracle.lower_bound(a, b)
+        assert oracle.distance(a, b) == distance, (a, b)
+        if distance is None:
+            assert bound is None, (a, b)
+            assert oracle.path(a, b) is None
+            continue
+        assert 0 <= bound <= distance, (a, b)
+        assert_path(oracle.path(a, b), grid, a, b, distance, diagonal=directions is DIAGONAL)
+
+
+def test_component_without_landmark():
+    # Единственный ориентир – в левом кармане; правая часть поля ориентирами не покрыта.
+    grid = [
+        [0, 1, 0, 0, 0],
+        [1, 1, 0, 1, 0],
+        [0, 1, 0, 0, 0],
+    ]
+    oracle = LandmarkOracle(grid, landmarks=1)
+    assert oracle.landmarks == [(0, 0)]
+    assert oracle.lower_bound((0, 2), (2, 4)) == 0
+    assert oracle.distance((0, 2), (2, 4)) == 4
+    assert oracle.lower_bound((0, 2), (2, 0)) is None
+    assert oracle.lower_bound((0, 0), (2, 0)) is None
+    assert oracle.distance((0, 0), (2, 0)) is None
+
+
+def test_blocked_endpoints():
+    oracle = LandmarkOracle([[0, 1, 0]])
+    assert oracle.lower_bound((0, 1), (0, 2)) is None
+    assert oracle.path((0, 0), (0, 1)) is None
+    assert oracle.distance((0, 2), (0, 2)) == 0
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_one_to_many_matches_bfs(seed):
+    rnd = random.Random(seed)
+    grid = random_grid(rnd, rnd.randint(1, 10), rnd.randint(1, 10), 0.3)
+    cells = [(r, c) for r in range(len(grid)) for c in range(len(grid[0]))]
+    source = rnd.choice(cells)
+    grid[source[0]][source[1]] = 0
+    targets = [cell for cell in rnd.sample(cells, min(len(cells), 5)) if not grid[cell[0]][cell[1]]]
+    marks = bfs(grid, source)
+
+    wave, paths = Tracer(Grid.from_rows(grid)).one_to_many_trace(source, targets)
+    assert set(paths) == set(targets)
+    for target in targets:
+        if target not in marks:
+            assert paths[target] is None, target
+            continue
+        assert_path(paths[target], grid, source, target, marks[target][2])
+        assert wave[target[0]][target[1]] == marks[target][:2]
@@ -0,0 +1,125 @@
+"""
+Воспроизведение .wtr против step_by_step_trace: волны совпадают кадр в кадр
+при проигрывании подряд и при переходах к произвольным итерациям.
+"""
+import copy
+import random
+
+import pytest
+from conftest import DIAGONAL, random_board
+
+from algorithm import recording
+from algorithm.grid import Grid
+from algorithm.recording import Replay, record_trace
+from algorithm.tracer import Tracer
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # Короткие куски, ключевой кадр почти после каждого и короткая прокрутка –
+    # иначе на маленьких полях seek никогда не доходит до ключевых кадров.
+    monkeypatch.setattr(recording, "CHUNK_ITERATIONS", 3)
+    monkeypatch.setattr(recording, "KEYFRAME_FRACTION", 1 << 20)
+    monkeypatch.setattr(recording, "MIN_KEYFRAME_CELLS", 6)
+    monkeypatch.setattr(Replay, "SCRUB_LIMIT", 2)
+
+
+def expected_frames(grid, start, finish, direction_order=None):
+    """Кадры step_by_step_trace: [(wave_start, wave_finish, meeting)], нулевой – до первого шага."""
+    rows, cols = len(grid), len(grid[0])
+    empty = [[None] * cols for _ in range(rows)]
+    frames = [(empty, empty, None)]
+    tracer = Tracer(Grid.from_rows(grid), direction_order=direction_order)
+    for _, wave_start, wave_finish, meeting in tracer.step_by_step_trace(start, finish):
+        frames.append((copy.deepcopy(wave_start), copy.deepcopy(wave_finish), meeting))
+    return frames
+
+
+def assert_frame(replay, frames, iteration):
+    wave_start, wave_finish, meeting = frames[iteration]
+    assert replay.iteration == iteration
+    assert replay.wave_start == wave_start, iteration
+    assert replay.wave_finish == wave_finish, iteration
+    assert replay.meeting_at(iteration) == meeting
+
+
+def changed_cells(before, after):
+    rows, cols = len(after[0]), len(after[0][0])
+    return {(r, c) for r in range(rows) for c in range(cols)
+            if before[0][r][c] != after[0][r][c] or before[1][r][c] != after[1][r][c]}
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_replay_matches_step_by_step(tmp_path, small_chunks, seed):
+    rnd = random.Random(seed)
+    grid, start, finish = random_board(rnd, density=0.25)
+    frames = expected_frames(grid, start, finish)
+    filename = tmp_path / "trace.wtr"
+    iterations, meeting = record_trace(filename, grid, start, finish)
+    assert iterations == len(frames) - 1
+    assert meeting == frames[-1][2]
+
+    replay = Replay(filename)
+    try:
+        assert replay.grid.to_rows() == grid
+        assert replay.iterations == iterations
+        assert_frame(replay, frames, 0)
+        for iteration in range(1, iterations + 1):
+            assert replay.seek(iteration) == changed_cells(frames[iteration - 1], frames[iteration])
+            assert_frame(replay, frames, iteration)
+        for iteration in range(iterations - 1, -1, -1):
+            assert replay.seek(iteration) == changed_cells(frames[iteration + 1], frames[iteration])
+            assert_frame(replay, frames, iteration)
+
+        for _ in range(40):
+            iteration = rnd.randint(0, iterations)
+            before = frames[replay.iteration][:2]
+            changed = replay.seek(iteration)
+            assert_frame(replay, frames, iteration)
+            if changed is not None:
+                assert changed == changed_cells(before, frames[iteration][:2])
+    finally:
+        replay.close()
+
+
+def test_seek_uses_keyframes(tmp_path, small_chunks):
+    grid = [[0] * 12 for _ in range(12)]
+    frames = expected_frames(grid, (0, 0), (11, 11))
+    filename = tmp_path / "trace.wtr"
+    iterations, _ = record_trace(filename, grid, (0, 0), (11, 11))
+
+    replay = Replay(filename)
+    try:
+        assert replay.keyframes
+        # Далеко вперёд, назад к началу и снова вперёд – каждый раз через ключевой кадр.
+        for iteration in (iterations, 0, iterations - 1, 4):
+            assert replay.seek(iteration) is None
+            assert_frame(replay, frames, iteration)
+    finally:
+        replay.close()
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_replay_with_custom_directions(tmp_path, small_chunks, seed):
+    # Диагонали и свои имена ходов: коды направлений берутся из порядка трассировщика.
+    rnd = random.Random(seed)
+    grid, start, finish = random_board(rnd, density=0.25)
+    directions = rnd.sample(DIAGONAL, len(DIAGONAL))
+    frames = expected_frames(grid, start, finish, directions)
+    filename = tmp_path / "trace.wtr"
+    iterations, meeting = record_trace(filename, grid, start, finish, direction_order=directions)
+    assert (iterations, meeting) == (len(frames) - 1, frames[-1][2])
+
+    replay = Replay(filename)
+    try:
+        for iteration in list(range(iterations + 1)) + [0, iterations]:
+            replay.seek(iteration)
+            assert_frame(replay, frames, iteration)
+    finally:
+        replay.close()
+
+
+def test_duplicate_direction_names_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match="повторяются"):
+        record_trace(tmp_path / "trace.wtr", [[0, 0]], (0, 0), (0, 1),
+                     direction_order=[("X", 0, 1), ("X", 0, -1)])
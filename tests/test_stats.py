@@ -0,0 +1,62 @@
+"""
+Счётчики TraceStats на маленьком поле, посчитанные вручную.
+"""
+import pytest
+
+from algorithm.stats import TraceStats
+from algorithm.tracer import Tracer
+
+# Коридор из пяти клеток над стеной: волны встречаются в (0, 2) на втором уровне.
+CORRIDOR = [[0] * 5, [1] * 5]
+
+
+def counters(stats):
+    return {name: value for name, value in stats.as_dict().items() if name != "times"}
+
+
+def test_corridor_counts():
+    stats = TraceStats()
+    _, _, meeting = Tracer(CORRIDOR, stats=stats).bidirectional_trace((0, 0), (0, 4))
+    assert meeting == (0, 2)
+    assert counters(stats) == {
+        "runs": 1,
+        # Уровень 1: A и B раскрывают по одной клетке; уровень 2: (0, 1) и (0, 3).
+        "expanded": {"start": 2, "finish": 2},
+        # Исходная клетка и по одной новой на уровень; (0, 2) помечают обе волны.
+        "labelled": {"start": 3, "finish": 3},
+        "levels": 2,
+        "peak_frontier": 2,
+        "frontier": {"start": [1, 1], "finish": [1, 1]},
+        # U за верхним краем (4 раза), L у A и R у B на первом уровне; D – всегда стена;
+        # на втором уровне шаг назад к исходной клетке.
+        "rejected": {"bounds": 6, "obstacle": 4, "visited": 2},
+        # Проверяются все новые клетки обоих уровней; (0, 2) – пересечение для каждой волны.
+        "intersection_checks": 4,
+        "intersections": 2,
+    }
+    assert (stats.cells_expanded, stats.cells_labelled) == (4, 6)
+    assert stats.times["total"] == pytest.approx(sum(stats.times[phase] for phase in
+                                                     ("setup", "expand_start", "expand_finish", "intersect", "fill")))
+
+
+def test_step_by_step_counts_match():
+    stats = TraceStats()
+    Tracer(CORRIDOR, stats=stats).bidirectional_trace((0, 0), (0, 4))
+    stepped = TraceStats()
+    for _ in Tracer(CORRIDOR, stats=stepped).step_by_step_trace((0, 0), (0, 4), deltas=True):
+        pass
+    assert counters(stepped) == counters(stats)
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_same_cell_counts(engine):
+    if engine == "numpy":
+        pytest.importorskip("numpy")
+    stats = TraceStats()
+    tracer = Tracer(CORRIDOR, engine=engine, stats=stats)
+    assert tracer.bidirectional_trace((0, 2), (0, 2))[2] == (0, 2)
+    stepped = TraceStats()
+    for _ in Tracer(CORRIDOR, stats=stepped).step_by_step_trace((0, 2), (0, 2)):
+        pass
+    assert counters(stats) == counters(stepped)
+    assert (stats.runs, stats.cells_expanded, stats.cells_labelled, stats.levels) == (1, 0, 2, 0)
@@ -0,0 +1,163 @@
+"""
+Движки встречной волны против обычного BFS: номера и направления клеток, точка встречи и путь.
+"""
+import random
+
+import pytest
+from conftest import DIAGONAL, assert_path, bfs, bfs_distance, random_board
+
+from algorithm.grid import Grid
+from algorithm.incremental import IncrementalTracer
+from algorithm.path import full_path
+from algorithm.tracer import DEFAULT_DIRECTIONS, Tracer
+
+DIRECTION_ORDERS = [DEFAULT_DIRECTIONS, [DEFAULT_DIRECTIONS[k] for k in (2, 3, 0, 1)]]
+
+
+def expected_trace(grid, start, finish, directions):
+    """
+    Ожидаемый результат поочерёдной встречной волны: волны раскрыты на level уровней,
+    где level – первый уровень, на котором они пересекаются; если пути нет – пока одна
+    из волн не раскроет пустой уровень.
+
+    :return: (marks_start, marks_finish, level, meeting)
+    """
+    marks_s = bfs(grid, start, directions)
+    marks_f = bfs(grid, finish, directions)
+    if finish not in marks_s:
+        level = min(max(mark[2] for mark in marks.values()) for marks in (marks_s, marks_f)) + 1
+        return marks_s, marks_f, level, None
+    level = (marks_s[finish][2] + 1) // 2
+    # Пересечения в порядке ядра: новые клетки волны A по номерам, затем волны B.
+    candidates = [cell for cell in sorted(marks_s, key=lambda cell: marks_s[cell][0])
+                  if marks_s[cell][2] == level and cell in marks_f and marks_f[cell][2] <= level]
+    candidates += [cell for cell in sorted(marks_f, key=lambda cell: marks_f[cell][0])
+                   if marks_f[cell][2] == level and cell in marks_s and marks_s[cell][2] <= level]
+    meeting = min(candidates, key=lambda cell: marks_s[cell][0] + marks_f[cell][0])
+    return marks_s, marks_f, level, meeting
+
+
+def run_engine(engine, grid, start, finish, directions):
+    if engine == "incremental":
+        return IncrementalTracer(grid, start, finish, direction_order=directions).trace()
+    if engine == "numpy":
+        pytest.importorskip("numpy")
+    return Tracer(Grid.from_rows(grid), direction_order=directions, engine=engine).bidirectional_trace(start, finish)
+
+
+def assert_wave_matches(wave, marks, level, rows, cols):
+    for r in range(rows):
+        for c in range(cols):
+            mark = marks.get((r, c))
+            if mark is not None and mark[2] <= level:
+                assert wave[r][c] == mark[:2], (r, c)
+            else:
+                assert wave[r][c] is None, (r, c)
+
+
+@pytest.mark.parametrize("directions", DIRECTION_ORDERS)
+@pytest.mark.parametrize("engine", ["python", "numpy", "incremental"])
+@pytest.mark.parametrize("seed", range(40))
+def test_engine_matches_bfs(engine, seed, directions):
+    grid, start, finish = random_board(random.Random(seed), rows=(1, 14), cols=(2, 14))
+    wave_start, wave_finish, meeting = run_engine(engine, grid, start, finish, directions)
+    marks_s, marks_f, level, expected_meeting = expected_trace(grid, start, finish, directions)
+
+    assert meeting == expected_meeting
+    rows, cols = len(grid), len(grid[0])
+    assert_wave_matches(wave_start, marks_s, level, rows, cols)
+    assert_wave_matches(wave_finish, marks_f, level, rows, cols)
+    if meeting is not None:
+        path = full_path(wave_start, wave_finish, start, finish, meeting)
+        assert_path(path, grid, start, finish, marks_s[finish][2])
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy", "incremental"])
+@pytest.mark.parametrize("seed", range(10))
+def test_engine_same_cell(engine, seed):
+    # A и B в одной клетке: встреча в ней же, помечены только исходные клетки.
+    grid, start, finish = random_board(random.Random(seed), same=True)
+    wave_start, wave_finish, meeting = run_engine(engine, grid, start, finish, DEFAULT_DIRECTIONS)
+    assert meeting == start
+    for wave in (wave_start, wave_finish):
+        assert [(r, c) for r, row in enumerate(wave) for c, mark in enumerate(row) if mark is not None] == [start]
+    assert full_path(wave_start, wave_finish, start, finish, meeting) == [start]
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_schedules_agree(seed):
+    # Каждый пятый запуск – A и B в одной клетке.
+    grid, start, finish = random_board(random.Random(seed), same=seed % 5 == 0)
+    distance = bfs_distance(grid, start, finish)
+
+    for schedule in ("alternate", "balanced", "cost"):
+        wave_start, wave_finish, meeting = Tracer(Grid.from_rows(grid), schedule=schedule).bidirectional_trace(
+            start, finish)
+        if distance is None:
+            assert meeting is None
+            continue
+        if start == finish:
+            assert meeting == start
+        path = full_path(wave_start, wave_finish, start, finish, meeting)
+        assert len(path) - 1 == distance, schedule
+
+
+@pytest.mark.parametrize("schedule", ["alternate", "balanced", "cost"])
+def test_same_cell_step_by_step(schedule):
+    steps = list(Tracer([[0, 0]], schedule=schedule).step_by_step_trace((0, 1), (0, 1), deltas=True))
+    assert steps == [(1, [(0, 1, 0, None)], [(0, 1, 0, None)], (0, 1))]
+
+
+@pytest.mark.parametrize("mode", ["astar", "bidirectional_astar", "jps"])
+@pytest.mark.parametrize("seed", range(60))
+def test_search_modes_match_bfs_distance(mode, seed):
+    rnd = random.Random(seed)
+    # Каждый пятый запуск – A и B в одной клетке; на плотных полях B часто недостижима.
+    grid, start, finish = random_board(rnd, same=seed % 5 == 0)
+    directions = rnd.choice(DIRECTION_ORDERS)
+    distance = bfs_distance(grid, start, finish, directions)
+
+    wave_start, wave_finish, meeting = Tracer(Grid.from_rows(grid), direction_order=directions).search_trace(
+        start, finish, mode)
+    if distance is None:
+        assert meeting is None
+        return
+    path = full_path(wave_start, wave_finish, start, finish, meeting)
+    assert_path(path, grid, start, finish, distance)
+
+
+@pytest.mark.parametrize("directions", [DIAGONAL, DEFAULT_DIRECTIONS[:3], [("U", -2, 0)] + DEFAULT_DIRECTIONS[1:]])
+@pytest.mark.parametrize("mode", ["astar", "bidirectional_astar", "jps"])
+def test_search_modes_reject_non_orthogonal_moves(mode, directions):
+    # Манхэттенская эвристика с диагоналями недопустима, JPS знает только четыре хода.
+    tracer = Tracer([[0] * 4 for _ in range(4)], direction_order=directions)
+    with pytest.raises(ValueError, match="4-связной"):
+        tracer.search_trace((0, 0), (3, 3), mode)
+
+
+def test_bidirectional_astar_same_cell():
+    wave_start, wave_finish, meeting = Tracer([[0] * 4 for _ in range(4)]).search_trace(
+        (1, 1), (1, 1), "bidirectional_astar")
+    assert meeting == (1, 1)
+    assert full_path(wave_start, wave_finish, (1, 1), (1, 1), meeting) == [(1, 1)]
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_path_only_matches_bfs_distance(seed):
+    rnd = random.Random(seed)
+    grid, start, finish = random_board(rnd, rows=(1, 14), cols=(2, 14))
+    directions = rnd.sample(DEFAULT_DIRECTIONS, len(DEFAULT_DIRECTIONS))
+    distance = bfs_distance(grid, start, finish, directions)
+
+    path, meeting = Tracer(Grid.from_rows(grid), direction_order=directions).path_only_trace(start, finish)
+    if distance is None:
+        assert (path, meeting) == (None, None)
+        return
+    assert meeting in path
+    assert_path(path, grid, start, finish, distance)
+
+
+def test_path_only_diagonal_moves():
+    grid = [[0] * 6 for _ in range(4)]
+    path, _ = Tracer(Grid.from_rows(grid), direction_order=DIAGONAL).path_only_trace((0, 0), (3, 5))
+    assert_path(path, grid, (0, 0), (3, 5), 5, diagonal=True)
@@ -0,0 +1,68 @@
+"""
+Взвешенная трассировка против эталонной Дейкстры по состояниям (клетка, направление входа).
+"""
+import random
+
+import pytest
+from conftest import dijkstra, random_board
+
+from algorithm.grid import Grid
+from algorithm.path import full_path
+from algorithm.tracer import DEFAULT_DIRECTIONS, Tracer
+
+
+def step_cost(costs, cell, k, came, bend_penalty, direction_costs):
+    name = DEFAULT_DIRECTIONS[k][0]
+    cost = costs[cell[0]][cell[1]] + direction_costs.get(name, 0)
+    if came is not None and came != k:
+        cost += bend_penalty
+    return cost
+
+
+def weighted_distance(grid, costs, start, finish, bend_penalty, direction_costs):
+    """Эталон: Дейкстра по состояниям (клетка, индекс направления входа или None)."""
+    rows, cols = len(grid), len(grid[0])
+
+    def neighbours(state):
+        cell, came = state
+        for k, (_, dr, dc) in enumerate(DEFAULT_DIRECTIONS):
+            n = (cell[0] + dr, cell[1] + dc)
+            if 0 <= n[0] < rows and 0 <= n[1] < cols and not grid[n[0]][n[1]]:
+                yield (n, k), step_cost(costs, n, k, came, bend_penalty, direction_costs)
+
+    return dijkstra((start, None), lambda state: state[0] == finish, neighbours)
+
+
+def path_cost(path, costs, bend_penalty, direction_costs):
+    moves = {(dr, dc): k for k, (_, dr, dc) in enumerate(DEFAULT_DIRECTIONS)}
+    total = 0
+    came = None
+    for a, b in zip(path, path[1:]):
+        k = moves[(b[0] - a[0], b[1] - a[1])]
+        total += step_cost(costs, b, k, came, bend_penalty, direction_costs)
+        came = k
+    return total
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_weighted_matches_dijkstra(seed):
+    rnd = random.Random(seed)
+    # Каждый пятый запуск – A и B в одной клетке.
+    grid, start, finish = random_board(rnd, rows=(1, 9), cols=(2, 9), density=0.25, same=seed % 5 == 0)
+    costs = [[rnd.randint(1, 5) for _ in row] for row in grid]
+    bend_penalty = rnd.randint(0, 4)
+    direction_costs = {name: rnd.randint(0, 3) for name, _, _ in DEFAULT_DIRECTIONS if rnd.random() < 0.5}
+    directions = rnd.sample(DEFAULT_DIRECTIONS, len(DEFAULT_DIRECTIONS))
+    expected = weighted_distance(grid, costs, start, finish, bend_penalty, direction_costs)
+
+    tracer = Tracer(Grid.from_rows(grid), direction_order=directions)
+    wave_start, wave_finish, meeting = tracer.weighted_trace(start, finish, Grid.from_rows(costs), bend_penalty,
+                                                             direction_costs)
+    assert tracer.path_cost == expected
+    if expected is None:
+        assert meeting is None
+        return
+    path = full_path(wave_start, wave_finish, start, finish, meeting)
+    assert (path[0], path[-1]) == (start, finish)
+    assert not any(grid[r][c] for r, c in path)
+    assert path_cost(path, costs, bend_penalty, direction_costs) == expected